@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+"""
+Benchmark the per-validation cost of the token fingerprint schemes
+
+Measures the CPU time spent by OAuthCredMgr.validate_token on signature verification and token
+fingerprinting (the database lookup is excluded) for each TokenHashScheme.
+
+Usage: python benchmarks/token_hash_benchmark.py [--iterations N]
+"""
+import argparse
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from fabric_cm.credmgr.token.token_hash import TokenHasher, TokenHashScheme
+
+
+def time_per_call(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--key-size', type=int, default=4096)
+    args = parser.parse_args()
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=args.key_size)
+    public_key = private_key.public_key()
+    now = int(time.time())
+    token = jwt.encode({'email': 'user@example.org', 'aud': 'benchmark', 'iat': now, 'exp': now + 3600},
+                       private_key, algorithm='RS256', headers={'kid': 'benchmark'})
+
+    def verify():
+        jwt.decode(token, key=public_key, algorithms=['RS256'], audience='benchmark')
+
+    verify_cost = time_per_call(verify, args.iterations)
+    print(f"RS256 verify ({args.key_size} bit key): {verify_cost * 1e6:10.1f} us")
+
+    for scheme in TokenHashScheme:
+        hasher = TokenHasher(secret='benchmark-secret', scheme=scheme)
+        hash_cost = time_per_call(lambda: hasher.hash(token=token), args.iterations)
+        total = verify_cost + hash_cost
+        print(f"{str(scheme):<13} hash: {hash_cost * 1e6:10.1f} us   per validation: {total * 1e6:10.1f} us   "
+              f"({1 / total:8.0f} validations/s per core)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+
+class CryptoExecutor:
+    """
+    Runs CPU-bound cryptographic operations in a pool of worker processes so that they do not hold the GIL
+    of the process serving requests and scale with the number of cores.
+    Operations run inline when the pool is disabled (workers = 0), cannot be started or breaks; a broken pool
+    is recreated on the next call. Functions and arguments must be picklable.
+    """
+    def __init__(self, *, workers: int, logger=None):
+        """
+        @param workers number of worker processes; 0 runs every operation inline
+        @param logger logger
+        """
+        self.workers = workers
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def is_enabled(self) -> bool:
+        return self.workers > 0
+
+    def __get_pool(self):
+        if not self.is_enabled():
+            return None
+        with self.lock:
+            if self.pool is None and self.is_enabled():
+                try:
+                    # Workers are spawned rather than forked; the parent holds threads and database connections
+                    self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                    mp_context=multiprocessing.get_context('spawn'))
+                except Exception as e:
+                    self.workers = 0
+                    self.__log_error(f"Unable to start crypto worker pool, running inline: {e}")
+            return self.pool
+
+    def __discard_pool(self, *, pool, error: Exception):
+        with self.lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False)
+        self.__log_error(f"Crypto worker pool failed, running inline: {error}")
+
+    def __log_error(self, message: str):
+        if self.logger is not None:
+            self.logger.error(message)
+
+    def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a function in a worker process and wait for its result
+        @param fn picklable function
+        @return result of the function
+        """
+        pool = self.__get_pool()
+        if pool is None:
+            return fn(*args, **kwargs)
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # RuntimeError is raised when submitting to a pool that is shutting down
+            self.__discard_pool(pool=pool, error=e)
+            return fn(*args, **kwargs)
+        try:
+            return future.result()
+        except BrokenProcessPool as e:
+            self.__discard_pool(pool=pool, error=e)
+            return fn(*args, **kwargs)
+
+    def shutdown(self):
+        with self.lock:
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import copy
+import threading
+from typing import Any, Callable, Hashable
+
+import prometheus_client
+
+coalesced_counter = prometheus_client.Counter('Upstream_Calls_Coalesced',
+                                              'Upstream calls answered by an identical call already in flight',
+                                              ['upstream'])
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls to an upstream service.
+    While a call with a given key is in flight, other callers with the same key wait for its outcome
+    instead of making their own call. Only use it for reads whose answer is the same for every caller of the key.
+    """
+    def __init__(self, *, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn unless a call with the same key is in flight, in which case wait for that call instead
+        @param key key identifying the call
+        @param fn function making the call
+        @param args positional arguments for fn
+        @param kwargs keyword arguments for fn
+        @return result of the call; callers that waited get their own copy
+        @raises the exception raised by the call
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not leader:
+            coalesced_counter.labels(self.name).inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            self.__finish(key=key, call=call)
+            raise
+
+        self.__finish(key=key, call=call, result=result)
+        return result
+
+    def __finish(self, *, key: Hashable, call: _Call, result: Any = None):
+        with self.lock:
+            self.calls.pop(key, None)
+        # No caller can join the call any more; hand the waiting ones a snapshot the leader cannot modify
+        if call.waiters > 0 and call.error is None:
+            call.result = copy.deepcopy(result)
+        call.done.set()
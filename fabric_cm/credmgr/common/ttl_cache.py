@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional
+
+
+class TTLCache:
+    """
+    Bounded, thread safe LRU cache where every entry carries its own absolute expiry time.
+    Least recently used entries are evicted once the cache reaches max_size.
+    """
+    def __init__(self, *, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def is_enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Return the cached value for the key
+        @param key key
+        @return cached value or None if not present or expired
+        """
+        if not self.is_enabled():
+            return None
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                self.entries.pop(key, None)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: float):
+        """
+        Add or replace a cache entry
+        @param key key
+        @param value value
+        @param expires_at absolute expiry time as epoch seconds
+        """
+        if not self.is_enabled() or expires_at <= time.time():
+            return
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """
+        Remove an entry
+        @param key key
+        @return removed value or None
+        """
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def keys(self) -> List[Hashable]:
+        """
+        Return a snapshot of the keys currently held, expired entries included
+        """
+        with self.lock:
+            return list(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self.lock:
+            entry = self.entries.get(key)
+        return entry is not None and entry[1] > time.time()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
@@ -55,6 +55,13 @@ class Config:
     LLT_ROLE_SUFFIX = 'llt-role-suffix'
     BASE_URL = 'base-url'
     CORS_ALLOWED_ORIGINS = 'cors-allowed-origins'
+    TOKEN_VALIDATION_CACHE_SIZE = 'token-validation-cache-size'
+    TOKEN_VALIDATION_CACHE_TTL = 'token-validation-cache-ttl'
+    TOKEN_HASH_SCHEME = 'token-hash-scheme'
+    TOKEN_STATE_INDEX_MAX_STALENESS = 'token-state-index-max-staleness'
+    CRYPTO_WORKERS = 'crypto-workers'
+    TOKEN_REAPER_INTERVAL = 'token-reaper-interval'
+    TOKEN_REAPER_BATCH_SIZE = 'token-reaper-batch-size'
 
     # Logging Parameters
     LOGGER = 'logger'
@@ -85,16 +92,40 @@ class Config:
     JWT_PUBLIC_KEY_KID = 'jwt-public-key-kid'
     JWT_PRIVATE_KEY = 'jwt-private-key'
     JWT_PRIVATE_KEY_PASS_PHRASE = 'jwt-pass-phrase'
+    JWT_PUBLIC_KEYS_DIR = 'jwt-public-keys-dir'
+    JWT_KEYS_REFRESH = 'jwt-keys-refresh'
 
     # Database Parameters
     DB_USER = "db-user"
     DB_PASSWORD = "db-password"
     DB_NAME = "db-name"
     DB_HOST = "db-host"
+    DB_TOKEN_STORE = "token-store"
+    DB_TOKEN_STORE_PATH = "token-store-path"
+    DB_REPLICA_HOSTS = "db-replica-hosts"
+    DB_POOL_SIZE = "db-pool-size"
+    DB_MAX_OVERFLOW = "db-max-overflow"
+    DB_SLOW_QUERY_MS = "db-slow-query-ms"
+    DB_HEALTH_CHECK_INTERVAL = "db-health-check-interval"
+    DB_DRIVER = "db-driver"
+    DB_ASYNC_POOL_SIZE = "db-async-pool-size"
+    DB_ASYNC_MAX_OVERFLOW = "db-async-max-overflow"
+    DB_WRITE_BATCH_DELAY_MS = "write-batch-delay-ms"
+    DB_WRITE_BATCH_MAX_SIZE = "write-batch-max-size"
+    DB_COMPACT_SCHEMA = "compact-schema"
+    DB_TOKENS_PARTITIONING = "tokens-partitioning"
+    DB_TOKENS_PARTITION_MONTHS_AHEAD = "tokens-partition-months-ahead"
+    DB_TOKENS_PARTITION_ARCHIVE = "tokens-partition-archive"
 
     # Project Registry Parameters
     CORE_API_URL = 'core-api-url'
     SSL_VERIFY = 'ssl_verify'
+    CORE_API_POOL_SIZE = 'pool-size'
+    CORE_API_WORKERS = 'workers'
+    CORE_API_CACHE_SIZE = 'cache-size'
+    CORE_API_IDENTITY_CACHE_TTL = 'identity-cache-ttl'
+    CORE_API_ROLES_CACHE_TTL = 'roles-cache-ttl'
+    CORE_API_PROJECTS_CACHE_TTL = 'projects-cache-ttl'
 
     # LLM Parameters
     LLM_URL = 'llm-url'
@@ -163,6 +194,55 @@ class Config:
         except ConfigError:
             return []
 
+    def get_token_validation_cache_size(self) -> int:
+        """Return the maximum number of cached token validation results; 0 disables the cache."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_RUNTIME, self.TOKEN_VALIDATION_CACHE_SIZE))
+        except ConfigError:
+            return 10000
+
+    def get_token_validation_cache_ttl(self) -> int:
+        """Return the seconds a cached validation result is used while the token state index is not current."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_RUNTIME, self.TOKEN_VALIDATION_CACHE_TTL))
+        except ConfigError:
+            return 0
+
+    def get_token_hash_scheme(self) -> str:
+        """Return the scheme used to fingerprint new tokens: hmac-sha256 (default) or pbkdf2-sha256."""
+        try:
+            return self._get_config_from_section(self.SECTION_RUNTIME, self.TOKEN_HASH_SCHEME)
+        except ConfigError:
+            return 'hmac-sha256'
+
+    def get_token_state_index_max_staleness(self) -> int:
+        """Return the seconds the token state index may go unconfirmed before lookups use the database; 0 disables it."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_RUNTIME, self.TOKEN_STATE_INDEX_MAX_STALENESS))
+        except ConfigError:
+            return 30
+
+    def get_crypto_workers(self) -> int:
+        """Return the number of worker processes for token signing and PBKDF2 hashing; 0 runs them inline."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_RUNTIME, self.CRYPTO_WORKERS))
+        except ConfigError:
+            return 0
+
+    def get_token_reaper_interval(self) -> int:
+        """Return the seconds between removals of expired tokens from the database; 0 disables the reaper."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_RUNTIME, self.TOKEN_REAPER_INTERVAL))
+        except ConfigError:
+            return 300
+
+    def get_token_reaper_batch_size(self) -> int:
+        """Return the maximum number of expired tokens removed by a single statement."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_RUNTIME, self.TOKEN_REAPER_BATCH_SIZE))
+        except ConfigError:
+            return 500
+
     def get_logger_name(self) -> str:
         return self._get_config_from_section(self.SECTION_LOGGING, self.LOGGER)
 
@@ -196,6 +276,21 @@ class Config:
     def get_jwt_private_key_pass_phrase(self) -> str:
         return self._get_config_from_section(self.SECTION_JWT, self.JWT_PRIVATE_KEY_PASS_PHRASE)
 
+    def get_jwt_public_keys_dir(self) -> str or None:
+        """Return the directory with additional public keys named <kid>.pem, if configured."""
+        try:
+            value = self._get_config_from_section(self.SECTION_JWT, self.JWT_PUBLIC_KEYS_DIR)
+            return value.strip() or None
+        except ConfigError:
+            return None
+
+    def get_jwt_keys_refresh(self) -> int:
+        """Return the interval in seconds at which public key files are checked for changes."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_JWT, self.JWT_KEYS_REFRESH))
+        except ConfigError:
+            return 60
+
     def get_oauth_provider(self) -> str:
         return self._get_config_from_section(self.SECTION_OAUTH, self.PROVIDER)
 
@@ -239,6 +334,48 @@ class Config:
     def get_core_api_url(self) -> str:
         return self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_URL)
 
+    def get_core_api_pool_size(self) -> int:
+        """Return the number of connections to the Core API kept alive and shared by all requests."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_POOL_SIZE))
+        except ConfigError:
+            return 10
+
+    def get_core_api_workers(self) -> int:
+        """Return the number of threads running Core API lookups concurrently with those of the request thread."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_WORKERS))
+        except ConfigError:
+            return 8
+
+    def get_core_api_cache_size(self) -> int:
+        """Return the maximum number of cached Core API answers of each kind; 0 disables the cache."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_CACHE_SIZE))
+        except ConfigError:
+            return 10000
+
+    def get_core_api_identity_cache_ttl(self) -> int:
+        """Return the number of seconds a user's uuid and email are cached for a cookie or token."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_IDENTITY_CACHE_TTL))
+        except ConfigError:
+            return 300
+
+    def get_core_api_roles_cache_ttl(self) -> int:
+        """Return the number of seconds a user's roles are cached."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_ROLES_CACHE_TTL))
+        except ConfigError:
+            return 300
+
+    def get_core_api_projects_cache_ttl(self) -> int:
+        """Return the number of seconds a user's project memberships are cached."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_CORE_API, self.CORE_API_PROJECTS_CACHE_TTL))
+        except ConfigError:
+            return 60
+
     def get_vouch_secret(self) -> str:
         return self._get_config_from_section(self.SECTION_VOUCH, self.SECRET)
 
@@ -287,6 +424,121 @@ class Config:
     def get_database_host(self) -> str:
         return self._get_config_from_section(section_name=self.SECTION_DATABASE, parameter_name=self.DB_HOST)
 
+    def get_token_store(self) -> str:
+        """Return where tokens are stored: postgres, sqlite or memory."""
+        try:
+            return self._get_config_from_section(self.SECTION_DATABASE, self.DB_TOKEN_STORE).lower()
+        except ConfigError:
+            return 'postgres'
+
+    def get_token_store_path(self) -> str:
+        """Return the database file of the sqlite token store."""
+        try:
+            return self._get_config_from_section(self.SECTION_DATABASE, self.DB_TOKEN_STORE_PATH)
+        except ConfigError:
+            return '/var/lib/credmgr/credmgr.db'
+
+    def get_database_replica_hosts(self) -> List[str]:
+        """Return the host:port of the read replicas serving read only queries; empty if reads go to db-host."""
+        try:
+            value = self._get_config_from_section(self.SECTION_DATABASE, self.DB_REPLICA_HOSTS)
+            return [h.strip() for h in value.split(',') if h.strip()]
+        except ConfigError:
+            return []
+
+    def get_database_driver(self) -> str:
+        """Return the driver serving the async request handlers: psycopg2 (default, worker threads) or asyncpg."""
+        try:
+            return self._get_config_from_section(self.SECTION_DATABASE, self.DB_DRIVER)
+        except ConfigError:
+            return 'psycopg2'
+
+    def get_database_pool_size(self) -> int:
+        """Return the number of connections kept open to each database host."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_POOL_SIZE))
+        except ConfigError:
+            return 10
+
+    def get_database_max_overflow(self) -> int:
+        """Return the number of connections opened on top of the pool under load."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_MAX_OVERFLOW))
+        except ConfigError:
+            return 20
+
+    def get_database_slow_query_threshold(self) -> float:
+        """Return the seconds after which a query is logged as slow; 0 disables the slow query log."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_SLOW_QUERY_MS)) / 1000
+        except ConfigError:
+            return 0
+
+    def get_database_health_check_interval(self) -> int:
+        """Return the seconds between background checks of idle connections; 0 tests connections on checkout."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_HEALTH_CHECK_INTERVAL))
+        except ConfigError:
+            return 0
+
+    def get_database_async_pool_size(self) -> int:
+        """Return the number of connections kept open per database by the asyncpg driver."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_ASYNC_POOL_SIZE))
+        except ConfigError:
+            return 20
+
+    def get_database_async_max_overflow(self) -> int:
+        """Return the number of connections the asyncpg driver opens on top of the pool under load."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_ASYNC_MAX_OVERFLOW))
+        except ConfigError:
+            return 10
+
+    def get_write_batch_delay(self) -> float:
+        """Return the seconds concurrent inserts wait to be committed together; 0 disables write batching."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_WRITE_BATCH_DELAY_MS)) / 1000
+        except ConfigError:
+            return 0
+
+    def get_write_batch_max_size(self) -> int:
+        """Return the number of inserts committed together at most."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_WRITE_BATCH_MAX_SIZE))
+        except ConfigError:
+            return 100
+
+    def is_compact_schema_enabled(self) -> bool:
+        """Return True if token and API key hashes are stored as bytea and token states as smallint."""
+        try:
+            value = self._get_config_from_section(self.SECTION_DATABASE, self.DB_COMPACT_SCHEMA)
+            return value.lower() == 'true'
+        except ConfigError:
+            return False
+
+    def is_tokens_partitioning_enabled(self) -> bool:
+        """Return True if the Tokens table is partitioned by month of expiry."""
+        try:
+            value = self._get_config_from_section(self.SECTION_DATABASE, self.DB_TOKENS_PARTITIONING)
+            return value.lower() == 'true'
+        except ConfigError:
+            return False
+
+    def get_tokens_partition_months_ahead(self) -> int:
+        """Return the number of future months for which Tokens partitions are created ahead."""
+        try:
+            return int(self._get_config_from_section(self.SECTION_DATABASE, self.DB_TOKENS_PARTITION_MONTHS_AHEAD))
+        except ConfigError:
+            return 3
+
+    def get_tokens_partition_archive(self) -> str:
+        """Return what happens to a Tokens partition once all its tokens expired: detach (default) or drop."""
+        try:
+            return self._get_config_from_section(self.SECTION_DATABASE, self.DB_TOKENS_PARTITION_ARCHIVE)
+        except ConfigError:
+            return 'detach'
+
     def get_max_llt_per_project(self) -> int:
         return int(self._get_config_from_section(self.SECTION_RUNTIME, self.MAX_LLT_CNT_PER_PROJECT))
 
@@ -2,9 +2,79 @@ from fabric_cm.credmgr.logging import LOG
 
 from fabric_cm.credmgr.config import CONFIG_OBJ
 
+from fabric_cm.credmgr.common.ttl_cache import TTLCache
+from fabric_cm.credmgr.core.token_cache import TokenValidationCache
+from fabric_cm.credmgr.core.token_reaper import TokenReaper
+from fabric_cm.credmgr.core.token_state_index import TokenStateIndex
+from fabric_cm.credmgr.token.token_hash import TokenHasher, TokenHashScheme
 from fabric_cm.db.db_api import DbApi
+from fabric_cm.db.memory_token_store import MemoryTokenStore
+from fabric_cm.db.partitions import TokenPartitions
+from fabric_cm.db.pool_health import PoolHealthChecker
+from fabric_cm.db.sqlite_token_store import SqliteTokenStore
+from fabric_cm.db.write_batcher import WriteBatcher
 
-DB_OBJ = DbApi(database=CONFIG_OBJ.get_database_name(), user=CONFIG_OBJ.get_database_user(),
-               password=CONFIG_OBJ.get_database_password(), db_host=CONFIG_OBJ.get_database_host(),
-               logger=LOG)
-DB_OBJ.create_db()
\ No newline at end of file
+PARTITIONS = None
+WRITE_BATCHER = None
+POOL_HEALTH_CHECKER = None
+ASYNC_DB_OBJ = None
+TOKEN_STORE = CONFIG_OBJ.get_token_store()
+if TOKEN_STORE == 'memory':
+    DB_OBJ = MemoryTokenStore(logger=LOG)
+elif TOKEN_STORE == 'sqlite':
+    DB_OBJ = SqliteTokenStore(path=CONFIG_OBJ.get_token_store_path(), logger=LOG)
+else:
+    DB_OBJ = DbApi(database=CONFIG_OBJ.get_database_name(), user=CONFIG_OBJ.get_database_user(),
+                   password=CONFIG_OBJ.get_database_password(), db_host=CONFIG_OBJ.get_database_host(),
+                   logger=LOG, replica_hosts=CONFIG_OBJ.get_database_replica_hosts(),
+                   pool_size=CONFIG_OBJ.get_database_pool_size(), max_overflow=CONFIG_OBJ.get_database_max_overflow(),
+                   slow_query_threshold=CONFIG_OBJ.get_database_slow_query_threshold(),
+                   compact_schema=CONFIG_OBJ.is_compact_schema_enabled(),
+                   pre_ping=CONFIG_OBJ.get_database_health_check_interval() <= 0)
+    POOL_HEALTH_CHECKER = PoolHealthChecker(engines=[DB_OBJ.db_engine] + DB_OBJ.replica_engines,
+                                            interval=CONFIG_OBJ.get_database_health_check_interval(), logger=LOG)
+    if CONFIG_OBJ.is_tokens_partitioning_enabled():
+        PARTITIONS = TokenPartitions(db=DB_OBJ, months_ahead=CONFIG_OBJ.get_tokens_partition_months_ahead(),
+                                     archive=CONFIG_OBJ.get_tokens_partition_archive(), logger=LOG)
+        DB_OBJ.set_token_partitions(PARTITIONS)
+
+    WRITE_BATCHER = WriteBatcher(db=DB_OBJ, max_delay=CONFIG_OBJ.get_write_batch_delay(),
+                                 max_batch_size=CONFIG_OBJ.get_write_batch_max_size(), logger=LOG)
+    DB_OBJ.set_write_batcher(WRITE_BATCHER)
+
+    if CONFIG_OBJ.get_database_driver() == 'asyncpg':
+        from fabric_cm.db.async_db_api import AsyncDbApi
+        ASYNC_DB_OBJ = AsyncDbApi(database=CONFIG_OBJ.get_database_name(), user=CONFIG_OBJ.get_database_user(),
+                                  password=CONFIG_OBJ.get_database_password(), db_host=CONFIG_OBJ.get_database_host(),
+                                  logger=LOG, replica_hosts=CONFIG_OBJ.get_database_replica_hosts(),
+                                  pool_size=CONFIG_OBJ.get_database_async_pool_size(),
+                                  max_overflow=CONFIG_OBJ.get_database_async_max_overflow(),
+                                  slow_query_threshold=CONFIG_OBJ.get_database_slow_query_threshold(),
+                                  compact_schema=CONFIG_OBJ.is_compact_schema_enabled())
+DB_OBJ.create_db()
+
+TOKEN_CACHE = TokenValidationCache(max_size=CONFIG_OBJ.get_token_validation_cache_size())
+# Hash with the configured scheme -> legacy hash of the tokens found under a legacy scheme, so that they are looked
+# up directly instead of after a miss and a PBKDF2 run; both hashes derive from the token, so entries never go stale
+LEGACY_TOKEN_HASHES = TTLCache(max_size=CONFIG_OBJ.get_token_validation_cache_size())
+
+TOKEN_HASHER = TokenHasher(secret=CONFIG_OBJ.get_vouch_secret(),
+                           scheme=TokenHashScheme.from_config(CONFIG_OBJ.get_token_hash_scheme()))
+
+
+def _on_token_state_change(token_hash: str = None):
+    # Drop cached validation results for tokens changed by any replica
+    if token_hash is None:
+        TOKEN_CACHE.clear()
+    else:
+        TOKEN_CACHE.invalidate(token_hash=token_hash)
+
+
+# The index follows the change notifications of Postgres; the other stores are local and need no index
+TOKEN_STATE_INDEX = TokenStateIndex(db=DB_OBJ, max_staleness=CONFIG_OBJ.get_token_state_index_max_staleness()
+                                    if isinstance(DB_OBJ, DbApi) else 0,
+                                    logger=LOG, on_change=_on_token_state_change)
+
+TOKEN_REAPER = TokenReaper(db=DB_OBJ, interval=CONFIG_OBJ.get_token_reaper_interval(),
+                           batch_size=CONFIG_OBJ.get_token_reaper_batch_size(), partitions=PARTITIONS,
+                           logger=LOG)
@@ -28,26 +28,30 @@ Module responsible for handling Credmgr REST API logic
 
 import base64
 import enum
-import hashlib
+import time
+from contextlib import nullcontext
 from datetime import datetime, timezone, timedelta
 from enum import Enum
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable
 
 import jwt
 import requests
 from jwt import ExpiredSignatureError
 from requests_oauthlib import OAuth2Session
+from starlette.concurrency import run_in_threadpool
 
-from . import DB_OBJ
+from . import ASYNC_DB_OBJ, DB_OBJ, LEGACY_TOKEN_HASHES, TOKEN_CACHE, TOKEN_HASHER, TOKEN_STATE_INDEX
 from fabric_cm.credmgr.config import CONFIG_OBJ
 from fabric_cm.credmgr.logging import LOG, log_event
 from fabric_cm.credmgr.token.token_encoder import TokenEncoder
-from fabric_cm.credmgr.swagger_server import jwt_validator, jwk_public_key_rsa
+from fabric_cm.credmgr.token.token_hash import TokenHashScheme
+from fabric_cm.credmgr.swagger_server import jwt_validator, CRYPTO_EXECUTOR, KEY_RING, TOKEN_SIGNER
 from fss_utils.jwt_manager import ValidateCode
 
 from http.client import INTERNAL_SERVER_ERROR, NOT_FOUND
 
 from fabric_cm.credmgr.external_apis.litellm_api import LiteLLMApi, LiteLLMApiError
+from fabric_cm.db.token_store import TokenStore
 from ..common.utils import Utils
 
 
@@ -107,6 +111,7 @@ class OAuthCredMgr:
     CREATED_AT = "created_at"
     EXPIRES_AT = "expires_at"
     TOKEN_HASH = "token_hash"
+    TOKEN_ID = "token_id"
     COMMENT = "comment"
     STATE = "state"
     CREATED_FROM = "created_from"
@@ -126,26 +131,131 @@ class OAuthCredMgr:
         self.log = LOG
 
     @staticmethod
-    def __generate_token_hash(*, token: str) -> str:
+    def __generate_token_hash(*, token: str, scheme: TokenHashScheme = None) -> str:
         """
-        Generate a PBKDF2-HMAC-SHA256 fingerprint for a high-entropy token.
+        Generate the fingerprint for a high-entropy token, used as a database lookup key
 
-        Uses a server-side secret (vouch secret) as a fixed salt so the output
-        is deterministic and can be used as a database lookup key. The iteration
-        count adds computational cost, making offline brute-force impractical
-        even if the database is compromised.
+        @param token token string
+        @param scheme hash scheme; defaults to the configured scheme
+        @return hex digest
+        """
+        if (scheme or TOKEN_HASHER.get_scheme()) == TokenHashScheme.Pbkdf2Sha256:
+            # Key stretching burns tens of milliseconds of CPU; keep it off the request threads
+            return CRYPTO_EXECUTOR.run(TOKEN_HASHER.hash, token=token, scheme=scheme)
+        return TOKEN_HASHER.hash(token=token, scheme=scheme)
+
+    def __find_token(self, *, token: str, token_hash: str = None) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Look up a token by its fingerprint, falling back to the legacy schemes for tokens created before
+        the configured scheme was introduced.
 
         @param token token string
-        @return hex digest of the PBKDF2-HMAC-SHA256 derivation
+        @param token_hash token hash with the configured scheme, if already computed
+        @return tuple of token hash and the matching tokens
         """
-        salt = CONFIG_OBJ.get_vouch_secret().encode('utf-8')
-        dk = hashlib.pbkdf2_hmac('sha256', token.encode('utf-8'), salt, iterations=100_000)
-        return dk.hex()
+        if token_hash is None:
+            token_hash = self.__generate_token_hash(token=token)
+        stored_hash = self.__get_stored_hash(token_hash=token_hash)
+        tokens = self.get_tokens(token_hash=stored_hash)
+        if (tokens is None or len(tokens) == 0) and DB_OBJ.has_replicas():
+            # Tokens created moments ago may not have reached the read replica yet
+            with DB_OBJ.read_from_primary():
+                tokens = self.get_tokens(token_hash=stored_hash)
+        if tokens is not None and len(tokens) > 0:
+            return stored_hash, tokens
+
+        return self.__find_legacy_token(token=token, token_hash=token_hash)
+
+    @staticmethod
+    def __get_stored_hash(*, token_hash: str) -> str:
+        """
+        @param token_hash token hash with the configured scheme
+        @return hash the token is stored under: its legacy hash if it was found under a legacy scheme before
+        """
+        legacy_token_hash = LEGACY_TOKEN_HASHES.get(token_hash)
+        return legacy_token_hash if legacy_token_hash is not None else token_hash
+
+    def __find_legacy_token(self, *, token: str, token_hash: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Look up a token not found by its fingerprint with the configured scheme under the legacy schemes.
+        The token keeps the hash it was created with: that hash was handed to the client and is how the
+        token is revoked, deleted and listed in the revocation list. Tokens found are remembered in
+        LEGACY_TOKEN_HASHES so that their next lookups skip the legacy schemes.
+
+        @param token token string
+        @param token_hash token hash with the configured scheme
+        @return tuple of token hash and the matching tokens
+        """
+        for scheme in TOKEN_HASHER.get_legacy_schemes():
+            legacy_token_hash = self.__generate_token_hash(token=token, scheme=scheme)
+            tokens = self.get_tokens(token_hash=legacy_token_hash)
+            if tokens is not None and len(tokens) > 0:
+                expires_at = tokens[0].get(self.EXPIRES_AT)
+                LEGACY_TOKEN_HASHES.set(token_hash, legacy_token_hash,
+                                        expires_at=expires_at.timestamp() if expires_at is not None
+                                        else time.time() + 24 * 3600)
+                return legacy_token_hash, tokens
+
+        return token_hash, []
+
+    def __find_token_state(self, *, token: str, token_hash: str) -> Tuple[str, str]:
+        """
+        Look up the state of a token to validate it, selecting only its state and expiry
+
+        @param token token string
+        @param token_hash token hash with the configured scheme, or the legacy hash it is known to be stored under
+        @return tuple of token hash and token state
+        @raises OAuthCredMgrError if the token is not found
+        """
+        found = DB_OBJ.get_token_state(token_hash=token_hash)
+        if found is None and DB_OBJ.has_replicas():
+            # Tokens created moments ago may not have reached the read replica yet
+            with DB_OBJ.read_from_primary():
+                found = DB_OBJ.get_token_state(token_hash=token_hash)
+        if found is not None:
+            state, expires_at = found
+            return token_hash, str(self.__get_effective_state(state=state, expires_at=expires_at))
+
+        token_hash, tokens = self.__find_legacy_token(token=token, token_hash=token_hash)
+        if len(tokens) == 0:
+            raise OAuthCredMgrError(http_error_code=NOT_FOUND, message="Token not found!")
+        return token_hash, tokens[0].get(self.STATE)
+
+    async def __find_token_state_async(self, *, token: str, token_hash: str) -> Tuple[str, str]:
+        """
+        Look up the state of a token to validate it without blocking the event loop; see __find_token_state
+        """
+        found = await ASYNC_DB_OBJ.get_token_state(token_hash=token_hash)
+        if found is None and ASYNC_DB_OBJ.has_replicas():
+            # Tokens created moments ago may not have reached the read replica yet
+            with ASYNC_DB_OBJ.read_from_primary():
+                found = await ASYNC_DB_OBJ.get_token_state(token_hash=token_hash)
+        if found is not None:
+            state, expires_at = found
+            return token_hash, str(self.__get_effective_state(state=state, expires_at=expires_at))
+
+        # Legacy hashes are rare and looked up on the synchronous path
+        token_hash, tokens = await run_in_threadpool(self.__find_legacy_token, token=token, token_hash=token_hash)
+        if len(tokens) == 0:
+            raise OAuthCredMgrError(http_error_code=NOT_FOUND, message="Token not found!")
+        return token_hash, tokens[0].get(self.STATE)
+
+    @staticmethod
+    def __get_effective_state(*, state: int, expires_at: datetime) -> TokenState:
+        """
+        @param state stored token state
+        @param expires_at token expiry time
+        @return token state; Expired once the token has expired, whatever its stored state
+        """
+        if expires_at is not None and expires_at < datetime.now(timezone.utc):
+            return TokenState.Expired
+        return TokenState(state)
 
     def __generate_token_and_save_info(self, ci_logon_id_token: str, scope: str, remote_addr: str,
                                        comment: str = None, cookie: str = None, lifetime: int = 4,
                                        refresh: bool = False, project_id: str = None,
-                                       project_name: str = None) -> Dict[str, str]:
+                                       project_name: str = None,
+                                       check_quota: Callable[[], None] = None) -> Dict[str, str]:
         """
         Generate Fabric Token and save the corresponding meta information in the database
         @param ci_logon_id_token    CI logon Identity Token
@@ -157,6 +267,7 @@ class OAuthCredMgr:
         @param cookie               Vouch Cookie
         @param lifetime             Token lifetime in hours; default 1 hour; max is 9 weeks i.e. 1512 hours
         @param refresh              Flag indicating if token was refreshed (True) or created new (False)
+        @param check_quota          Raises if the token may not be saved; runs in the transaction saving the token
         """
         if project_name is None and project_id is None:
             raise OAuthCredMgrError(f"CredMgr: Either Project ID: '{project_id}' or Project Name'{project_name}' "
@@ -188,19 +299,15 @@ class OAuthCredMgr:
 
             # convert lifetime to seconds
             validity = lifetime * 3600
-            private_key = CONFIG_OBJ.get_jwt_private_key()
-            pass_phrase = CONFIG_OBJ.get_jwt_private_key_pass_phrase()
-            kid = CONFIG_OBJ.get_jwt_public_key_kid()
 
             # token timestamps
             created_at = datetime.now(timezone.utc)
             expires_at = created_at + timedelta(hours=lifetime)
 
             # create/encode the token
-            token = token_encoder.encode(private_key=private_key, validity_in_seconds=validity, kid=kid,
-                                         pass_phrase=pass_phrase)
+            token = token_encoder.encode(signer=TOKEN_SIGNER, validity_in_seconds=validity)
 
-            # Generate SHA256 hash
+            # Generate token fingerprint
             token_hash = self.__generate_token_hash(token=token)
 
             state = TokenState.Valid
@@ -213,16 +320,17 @@ class OAuthCredMgr:
             if comment is None:
                 comment = "Created via GUI"
 
-            # Delete any expired tokens
-            self.delete_expired_tokens(user_email=token_encoder.claims.get(self.EMAIL),
-                                       user_id=token_encoder.claims.get(self.UUID))
-
-            # Add token meta info to the database
-            DB_OBJ.add_token(user_id=token_encoder.claims.get(self.UUID),
-                             user_email=token_encoder.claims.get(self.EMAIL),
-                             project_id=token_encoder.project_id, token_hash=token_hash, created_at=created_at,
-                             expires_at=expires_at, state=state.value, created_from=remote_addr,
-                             comment=comment)
+            # Add token meta info to the database; the quota check and the insert share one transaction, other
+            # inserts may be batched with those of concurrent requests
+            with DB_OBJ.unit_of_work() if check_quota is not None else nullcontext():
+                if check_quota is not None:
+                    check_quota()
+                DB_OBJ.add_token(user_id=token_encoder.claims.get(self.UUID),
+                                 user_email=token_encoder.claims.get(self.EMAIL),
+                                 project_id=token_encoder.project_id, token_hash=token_hash,
+                                 hash_version=TOKEN_HASHER.get_scheme().value, created_at=created_at,
+                                 expires_at=expires_at, state=state.value, created_from=remote_addr,
+                                 comment=comment)
 
             log_event(token_hash=token_hash, action=action, project_id=token_encoder.project_id,
                       user_id=token_encoder.claims.get(self.UUID), user_email=token_encoder.claims.get(self.EMAIL))
@@ -237,6 +345,22 @@ class OAuthCredMgr:
         else:
             LOG.warning("JWT Token validator not initialized, skipping validation")
 
+    def __check_long_lived_token_quota(self, *, project_id: str, user_email: str):
+        """
+        Check that a user may create another long lived token in a project
+        @param project_id Project Id
+        @param user_email User's email
+        @raises OAuthCredMgrError if the user already has the maximum number of long lived tokens
+        """
+        long_lived_tokens = self.get_tokens(project_id=project_id, user_email=user_email,
+                                            columns=[self.STATE, self.EXPIRES_AT])
+        # Expired tokens are removed by the reaper; do not count the ones it has not reached yet
+        if long_lived_tokens is not None:
+            long_lived_tokens = [t for t in long_lived_tokens if t.get(self.STATE) != str(TokenState.Expired)]
+        if long_lived_tokens is not None and len(long_lived_tokens) > CONFIG_OBJ.get_max_llt_per_project():
+            raise OAuthCredMgrError(f"User: {user_email} already has {CONFIG_OBJ.get_max_llt_per_project()} "
+                                    f"long lived tokens")
+
     def create_token(self, project_id: str, project_name: str, scope: str, ci_logon_id_token: str, refresh_token: str,
                      remote_addr: str, user_email: str, comment: str = None, cookie: str = None,
                      lifetime: int = 4) -> dict:
@@ -274,16 +398,16 @@ class OAuthCredMgr:
         short = Utils.is_short_lived(lifetime_in_hours=lifetime)
         LOG.info(f"Token lifetime: {lifetime} short: {short}")
 
+        check_quota = None
         if not short:
-            long_lived_tokens = self.get_tokens(project_id=project_id, user_email=user_email)
-            if long_lived_tokens is not None and len(long_lived_tokens) > CONFIG_OBJ.get_max_llt_per_project():
-                raise OAuthCredMgrError(f"User: {user_email} already has {CONFIG_OBJ.get_max_llt_per_project()} "
-                                        f"long lived tokens")
+            def check_quota():
+                self.__check_long_lived_token_quota(project_id=project_id, user_email=user_email)
 
         # Generate the Token
         result = self.__generate_token_and_save_info(ci_logon_id_token=ci_logon_id_token, project_id=project_id,
                                                      scope=scope, remote_addr=remote_addr, cookie=cookie,
-                                                     lifetime=lifetime, comment=comment, project_name=project_name)
+                                                     lifetime=lifetime, comment=comment, project_name=project_name,
+                                                     check_quota=check_quota)
 
         # Only include refresh token for short lived tokens
         if short:
@@ -400,22 +524,27 @@ class OAuthCredMgr:
         if user_email is None and token_hash is None:
             raise OAuthCredMgrError(f"User Id/Email or Token Hash required")
 
-        # Facility Operator query all tokens
-        if Utils.is_facility_operator(cookie=cookie, token=token):
-            tokens = self.get_tokens(token_hash=token_hash)
-        # Otherwise query only this user's tokens
-        else:
-            tokens = self.get_tokens(token_hash=token_hash, user_email=user_email, project_id=project_id)
+        facility_operator = Utils.is_facility_operator(cookie=cookie, token=token)
 
-        if tokens is None or len(tokens) == 0:
-            raise OAuthCredMgrError(http_error_code=NOT_FOUND,
-                                    message=f"Token# {token_hash} not found!")
+        # Look up and revoke in one transaction
+        with DB_OBJ.unit_of_work():
+            # Facility Operator query all tokens
+            if facility_operator:
+                tokens = self.get_tokens(token_hash=token_hash)
+            # Otherwise query only this user's tokens
+            else:
+                tokens = self.get_tokens(token_hash=token_hash, user_email=user_email, project_id=project_id)
 
-        if tokens[0].get(self.STATE) == str(TokenState.Revoked):
-            LOG.info(f"Token {token_hash} for user {tokens[0].get('user_email')}/{tokens[0].get('user_id')} "
-                     f"is already revoked!")
-            return
-        DB_OBJ.update_token(token_hash=token_hash, state=TokenState.Revoked.value)
+            if tokens is None or len(tokens) == 0:
+                raise OAuthCredMgrError(http_error_code=NOT_FOUND,
+                                        message=f"Token# {token_hash} not found!")
+
+            if tokens[0].get(self.STATE) == str(TokenState.Revoked):
+                LOG.info(f"Token {token_hash} for user {tokens[0].get('user_email')}/{tokens[0].get('user_id')} "
+                         f"is already revoked!")
+                return
+            DB_OBJ.update_token(token_hash=token_hash, state=TokenState.Revoked.value)
+        TOKEN_CACHE.invalidate(token_hash=token_hash)
 
         log_event(token_hash=token_hash, action="revoke", project_id=tokens[0].get('project_id'),
                   user_id=tokens[0].get('user_id'), user_email=tokens[0].get('user_email'))
@@ -437,38 +566,90 @@ class OAuthCredMgr:
         result = []
 
         tokens = self.get_tokens(project_id=project_id, user_email=user_email, user_id=user_id,
-                                 states=[str(TokenState.Revoked)], query_all=True)
+                                 states=[str(TokenState.Revoked)], query_all=True, columns=[self.TOKEN_HASH])
         if tokens is None:
             return result
         for t in tokens:
             result.append(t.get(self.TOKEN_HASH))
         return result
 
+    async def get_token_revoke_list_async(self, project_id: str, user_email: str = None,
+                                          user_id: str = None) -> List[str]:
+        """
+        Get token revoke list without blocking the event loop; see get_token_revoke_list
+        """
+        tokens = await self.get_tokens_async(project_id=project_id, user_email=user_email, user_id=user_id,
+                                             states=[str(TokenState.Revoked)], query_all=True,
+                                             columns=[self.TOKEN_HASH])
+        return [t.get(self.TOKEN_HASH) for t in tokens or []]
+
     def get_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None, token_hash: str = None,
                    expires: datetime = None, states: List[str] = None, offset: int = 0,
-                   limit: int = 5, query_all: bool = False) -> List[Dict[str, Any]]:
+                   limit: int = 5, query_all: bool = False,
+                   cursor: Tuple[datetime, int] = None, columns: List[str] = None) -> List[Dict[str, Any]]:
         """
         Get Tokens
+        @param cursor decoded cursor returned with the previous page; see decode_cursor
+        @param columns names of the columns to return; all columns if not specified
         @return list of tokens
         """
         if not query_all and project_id is None and user_id is None and user_email is None and token_hash is None:
             raise OAuthCredMgrError(f"User Id/Email/Token Hash or Project Id required")
 
-        self.delete_expired_tokens(user_email=user_email, user_id=user_id)
         tokens = DB_OBJ.get_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
                                    token_hash=token_hash, expires=expires,
                                    states=TokenState.translate_list(states=states),
-                                   offset=offset, limit=limit)
-        now = datetime.now(timezone.utc)
-        # Change the state from integer value to string
-        for t in tokens:
-            state = TokenState(t[self.STATE])
-            if t.get(self.EXPIRES_AT) < now:
-                state = TokenState.Expired
-            t[self.STATE] = str(state)
+                                   offset=offset, limit=limit, cursor=cursor, columns=columns)
+        return self.__translate_states(tokens=tokens)
+
+    async def get_tokens_async(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                               token_hash: str = None, expires: datetime = None, states: List[str] = None,
+                               offset: int = 0, limit: int = 5, query_all: bool = False,
+                               cursor: Tuple[datetime, int] = None,
+                               columns: List[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get Tokens awaiting the database; see get_tokens. Only available with the asyncpg driver
+        """
+        if not query_all and project_id is None and user_id is None and user_email is None and token_hash is None:
+            raise OAuthCredMgrError(f"User Id/Email/Token Hash or Project Id required")
+
+        tokens = await ASYNC_DB_OBJ.get_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                               token_hash=token_hash, expires=expires,
+                                               states=TokenState.translate_list(states=states),
+                                               offset=offset, limit=limit, cursor=cursor, columns=columns)
+        return self.__translate_states(tokens=tokens)
 
+    def __translate_states(self, *, tokens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Change the state of tokens from integer value to string
+        """
+        for t in tokens:
+            if self.STATE in t:
+                t[self.STATE] = str(self.__get_effective_state(state=t[self.STATE], expires_at=t.get(self.EXPIRES_AT)))
         return tokens
 
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        """
+        Decode a token listing cursor
+        @param cursor cursor returned as next by a previous listing
+        @return tuple of expiry time and token id
+        @raises ValueError if the cursor is malformed
+        """
+        return TokenStore.decode_cursor(cursor=cursor)
+
+    def get_next_cursor(self, *, tokens: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """
+        Build the cursor for the page following a token listing
+        @param tokens tokens returned by get_tokens
+        @param limit limit passed to get_tokens
+        @return cursor; None if this is the last page
+        """
+        if limit is None or len(tokens) < limit:
+            return None
+        last = tokens[-1]
+        return TokenStore.encode_cursor(sort_key=last.get(self.EXPIRES_AT), row_id=last.get(self.TOKEN_ID))
+
     @staticmethod
     def validate_scope(scope: str):
         allowed_scopes = CONFIG_OBJ.get_allowed_scopes()
@@ -477,36 +658,18 @@ class OAuthCredMgr:
 
     def delete_tokens(self, user_email: str = None, user_id: str = None, token_hash: str = None):
         """
-        Delete Expired Tokens
+        Delete Tokens
         @param user_id user uuid
         @param user_email user email
         @param token_hash token hash
         """
-        tokens = DB_OBJ.get_tokens(user_email=user_email, user_id=user_id, token_hash=token_hash)
-        if tokens is None:
-            return
-
-        # Remove the expired tokens
-        for t in tokens:
-            DB_OBJ.remove_token(token_hash=t.get(self.TOKEN_HASH))
-            log_event(token_hash=t.get(self.TOKEN_HASH), action="delete", project_id=tokens[0].get('project_id'),
-                      user_id=tokens[0].get('user_id'), user_email=tokens[0].get('user_email'))
-
-    def delete_expired_tokens(self, user_email: str = None, user_id: str = None):
-        """
-        Delete Expired Tokens
-        @param user_id user uuid
-        @param user_email user email
-        """
-        tokens = DB_OBJ.get_tokens(user_email=user_email, user_id=user_id, expires=datetime.now(timezone.utc))
-        if tokens is None:
-            return
+        tokens = DB_OBJ.remove_tokens(user_email=user_email, user_id=user_id,
+                                      token_hashes=[token_hash] if token_hash is not None else None)
 
-        # Remove the expired tokens
         for t in tokens:
-            DB_OBJ.remove_token(token_hash=t.get(self.TOKEN_HASH))
-            log_event(token_hash=t.get(self.TOKEN_HASH), action="delete", project_id=tokens[0].get('project_id'),
-                      user_id=tokens[0].get('user_id'), user_email=tokens[0].get('user_email'))
+            TOKEN_CACHE.invalidate(token_hash=t.get(self.TOKEN_HASH))
+            log_event(token_hash=t.get(self.TOKEN_HASH), action="delete", project_id=t.get('project_id'),
+                      user_id=t.get('user_id'), user_email=t.get('user_email'))
 
     def _ensure_llm_user_and_team(self, llm_api: LiteLLMApi, uuid: str, email: str):
         """
@@ -649,6 +812,7 @@ class OAuthCredMgr:
         # Save record to local DB for audit trail
         DB_OBJ.add_llm_key(user_id=uuid, user_email=email, llm_key_id=llm_key_id,
                            llm_key_name=key_name, api_key_hash=api_key_hash,
+                           hash_version=TOKEN_HASHER.get_scheme().value,
                                created_at=created_at, expires_at=expires_at, comment=comment)
 
         log_event(token_hash=api_key_hash, action="create_llm_key", project_id=allowed_project,
@@ -782,10 +946,59 @@ class OAuthCredMgr:
         @param token token
         @return token state and claims
         """
+        key, cached = self.__get_validation_key(token=token)
+        if cached is not None:
+            return cached
+
         claims = {}
-        # Pin the algorithm to RS256 to prevent algorithm confusion attacks.
-        # The token header is only used to extract the kid for key lookup.
-        PINNED_ALG = "RS256"
+        try:
+            claims, token_hash, state, generation = self.__verify_token(token=token, key=key)
+            if state is None:
+                # Index stale, or token unknown to it, e.g. just created or hashed with a legacy scheme
+                token_hash, state = self.__find_token_state(token=token, token_hash=token_hash)
+            self.__cache_token_state(token=token, token_hash=token_hash, state=state, claims=claims,
+                                     generation=generation)
+        except ExpiredSignatureError:
+            state = TokenState.Expired
+        except Exception:
+            raise Exception(ValidateCode.INVALID)
+
+        return str(state), claims
+
+    async def validate_token_async(self, *, token: str) -> Tuple[str, dict]:
+        """
+        Validate a token awaiting the database; see validate_token. Only available with the asyncpg driver
+        @param token token
+        @return token state and claims
+        """
+        # Key ring refresh, signature verification and token hashing block; keep them off the event loop
+        key, cached = await run_in_threadpool(self.__get_validation_key, token=token)
+        if cached is not None:
+            return cached
+
+        claims = {}
+        try:
+            claims, token_hash, state, generation = await run_in_threadpool(self.__verify_token, token=token,
+                                                                            key=key)
+            if state is None:
+                token_hash, state = await self.__find_token_state_async(token=token, token_hash=token_hash)
+            self.__cache_token_state(token=token, token_hash=token_hash, state=state, claims=claims,
+                                     generation=generation)
+        except ExpiredSignatureError:
+            state = TokenState.Expired
+        except Exception:
+            raise Exception(ValidateCode.INVALID)
+
+        return str(state), claims
+
+    @staticmethod
+    def __get_validation_key(*, token: str) -> Tuple[Any, Optional[Tuple[str, dict]]]:
+        """
+        Find the key a token was signed with and any cached validation result
+        @param token token
+        @return tuple of the public key and the cached token state and claims, if any
+        @raises Exception if the token cannot be parsed or its key is unknown
+        """
         try:
             kid = jwt.get_unverified_header(token).get('kid', None)
         except jwt.DecodeError as e:
@@ -794,29 +1007,49 @@ class OAuthCredMgr:
         if kid is None:
             raise Exception(ValidateCode.UNSPECIFIED_KEY)
 
-        if kid != jwk_public_key_rsa['kid']:
+        key = KEY_RING.get_key(kid=kid)
+        if key is None:
             raise Exception(ValidateCode.UNKNOWN_KEY)
 
-        key = jwt.algorithms.RSAAlgorithm.from_jwk(jwk_public_key_rsa)
-
+        # Token validated recently and neither revoked nor deleted since; revocations by other replicas
+        # only reach the cache through the token state index, so without a current index only results
+        # cached within token-validation-cache-ttl are used
+        if TOKEN_STATE_INDEX.is_running() and TOKEN_STATE_INDEX.is_fresh():
+            return key, TOKEN_CACHE.get(token=token)
+        ttl = CONFIG_OBJ.get_token_validation_cache_ttl()
+        if ttl > 0:
+            return key, TOKEN_CACHE.get(token=token, max_age=ttl)
+        return key, None
+
+    def __verify_token(self, *, token: str, key) -> Tuple[dict, str, Optional[str], int]:
+        """
+        Verify the signature, expiry and audience of a token and look up its state in the token state index
+        @param token token
+        @param key public key the token was signed with
+        @return tuple of claims, token hash, token state (None if the index cannot tell) and cache generation
+        @raises ExpiredSignatureError if the token has expired
+        """
+        # Pin the algorithm to RS256 to prevent algorithm confusion attacks.
+        # The token header is only used to extract the kid for key lookup.
+        PINNED_ALG = "RS256"
         options = {"verify_exp": True, "verify_aud": True}
 
         # options https://pyjwt.readthedocs.io/en/latest/api.html
-        try:
-            claims = jwt.decode(token, key=key, algorithms=[PINNED_ALG], options=options,
-                                audience=CONFIG_OBJ.get_oauth_client_id())
-
-            # Check if the Token is Revoked
-            token_hash = self.__generate_token_hash(token=token)
-            token_found_in_db = self.get_tokens(token_hash=token_hash)
-            if token_found_in_db is None or len(token_found_in_db) == 0:
-                raise OAuthCredMgrError(http_error_code=NOT_FOUND, message="Token not found!")
-
-            state = token_found_in_db[0].get(self.STATE)
+        claims = jwt.decode(token, key=key, algorithms=[PINNED_ALG], options=options,
+                            audience=CONFIG_OBJ.get_oauth_client_id())
 
-        except ExpiredSignatureError:
-            state = TokenState.Expired
-        except Exception:
-            raise Exception(ValidateCode.INVALID)
+        # Check if the Token is Revoked
+        generation = TOKEN_CACHE.get_generation()
+        token_hash = self.__get_stored_hash(token_hash=self.__generate_token_hash(token=token))
+        state = TOKEN_STATE_INDEX.get_state(token_hash=token_hash)
+        if state is not None:
+            state = str(TokenState(state))
+        return claims, token_hash, state, generation
 
-        return str(state), claims
+    @staticmethod
+    def __cache_token_state(*, token: str, token_hash: str, state: str, claims: dict, generation: int):
+        # Results are only ever used while the index runs or within the TTL
+        if not TOKEN_STATE_INDEX.is_running() and CONFIG_OBJ.get_token_validation_cache_ttl() <= 0:
+            return
+        if state in [str(TokenState.Valid), str(TokenState.Refreshed)]:
+            TOKEN_CACHE.put(token=token, token_hash=token_hash, state=state, claims=claims, generation=generation)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fabric_cm.credmgr.common.ttl_cache import TTLCache
+
+
+class TokenValidationCache:
+    """
+    Caches the result of validating a Fabric Identity Token so that repeated validations of the same token
+    skip signature verification, token hashing and the database lookup.
+    Entries are keyed by a SHA-256 digest of the raw token, expire at the token's exp claim and
+    are dropped as soon as the token is revoked or deleted. Callers that may miss revocations pass
+    max_age to get() to only use recently cached results.
+    """
+    def __init__(self, *, max_size: int):
+        self.cache = TTLCache(max_size=max_size)
+        self.lock = threading.Lock()
+        # token_hash -> cache key, used to invalidate entries on revoke/delete
+        self.keys_by_hash = {}
+        # Bumped on every invalidation; a result read from the database before a concurrent revoke is not cached
+        self.generation = 0
+        # token_hash -> generation at which the token was last invalidated, most recent last
+        self.invalidated = OrderedDict()
+        # Results read before this generation are not cached, e.g. after clear()
+        self.floor = 0
+
+    @staticmethod
+    def __get_key(*, token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, *, token: str, max_age: float = None) -> Optional[Tuple[str, dict]]:
+        """
+        Look up a previously validated token
+        @param token raw token
+        @param max_age seconds since the result was cached after which it is not used; None for no limit
+        @return tuple of token state and a copy of the claims; None on a cache miss
+        """
+        if not self.cache.is_enabled():
+            return None
+        entry = self.cache.get(self.__get_key(token=token))
+        if entry is None:
+            return None
+        state, claims, token_hash, cached_at = entry
+        if max_age is not None and time.time() - cached_at > max_age:
+            return None
+        return state, dict(claims)
+
+    def get_generation(self) -> int:
+        with self.lock:
+            return self.generation
+
+    def put(self, *, token: str, token_hash: str, state: str, claims: dict, generation: int):
+        """
+        Cache a validation result until the token expires
+        @param token raw token
+        @param token_hash token hash as stored in the database
+        @param state token state
+        @param claims decoded claims
+        @param generation value of get_generation() taken before the token state was read
+        """
+        if not self.cache.is_enabled() or claims.get('exp') is None:
+            return
+        key = self.__get_key(token=token)
+        with self.lock:
+            # Only a change of this token since the state was read makes the result stale
+            if generation < self.floor or self.invalidated.get(token_hash, 0) > generation:
+                return
+            self.cache.set(key, (state, dict(claims), token_hash, time.time()), expires_at=claims.get('exp'))
+            self.keys_by_hash[token_hash] = key
+            # Keep the reverse index bounded by the cache contents
+            if len(self.keys_by_hash) > 2 * self.cache.max_size:
+                self.keys_by_hash = {h: k for h, k in self.keys_by_hash.items()
+                                     if k in self.cache}
+
+    def invalidate(self, *, token_hash: str):
+        """
+        Drop the cached validation result for a token
+        @param token_hash token hash
+        """
+        with self.lock:
+            self.generation += 1
+            self.invalidated[token_hash] = self.generation
+            self.invalidated.move_to_end(token_hash)
+            # Keep the history bounded; results read before the forgotten invalidations are no longer cached
+            while len(self.invalidated) > max(self.cache.max_size, 1):
+                _, generation = self.invalidated.popitem(last=False)
+                self.floor = max(self.floor, generation)
+            key = self.keys_by_hash.pop(token_hash, None)
+            if key is not None:
+                self.cache.pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.floor = self.generation
+            self.invalidated.clear()
+            self.keys_by_hash.clear()
+            self.cache.clear()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+from datetime import datetime, timezone
+
+import prometheus_client
+
+from fabric_cm.credmgr.logging import log_event
+
+reaped_counter = prometheus_client.Counter('Tokens_Reaped', 'Expired tokens removed from the database')
+
+
+class TokenReaper:
+    """
+    Periodically removes expired tokens from the database in batches, away from the request path.
+    When the Tokens table is partitioned, expired tokens are instead removed a month at a time by archiving
+    their partition.
+    """
+    def __init__(self, *, db, interval: int, batch_size: int, partitions=None, logger=None):
+        """
+        @param db TokenStore
+        @param interval seconds between runs; 0 disables the reaper
+        @param batch_size maximum number of tokens removed per statement
+        @param partitions TokenPartitions if the Tokens table is partitioned
+        @param logger logger
+        """
+        self.db = db
+        self.interval = interval
+        self.batch_size = batch_size
+        self.partitions = partitions
+        self.logger = logger
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the reaper thread; a no-op if the reaper is disabled or already running
+        """
+        if self.interval <= 0 or self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.__run, name="TokenReaper", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.reap()
+            except Exception as e:
+                if self.logger is not None:
+                    self.logger.error(f"Failed to remove expired tokens: {e}")
+
+    def reap(self) -> int:
+        """
+        Remove all tokens expired so far, one batch at a time
+        @return number of tokens removed
+        """
+        if self.partitions is not None:
+            self.partitions.maintain()
+            return 0
+
+        expires = datetime.now(timezone.utc)
+        count = 0
+        while not self.stopped.is_set():
+            tokens = self.db.remove_expired_tokens(expires=expires, limit=self.batch_size)
+            for t in tokens:
+                log_event(token_hash=t.get('token_hash'), action="delete", project_id=t.get('project_id'),
+                          user_id=t.get('user_id'), user_email=t.get('user_email'))
+            reaped_counter.inc(len(tokens))
+            count += len(tokens)
+            if len(tokens) < self.batch_size:
+                break
+        if count > 0 and self.logger is not None:
+            self.logger.info(f"Removed {count} expired tokens")
+        return count
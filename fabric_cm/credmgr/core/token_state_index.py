@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import json
+import select
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+
+class TokenStateIndex:
+    """
+    In-memory index of token hash to token state for every token that has not expired, so that validation
+    does not need a database round-trip to learn whether a token is known or revoked.
+    The index is loaded from the database and kept current by listening for the change notifications DbApi
+    publishes on every token insert, update and delete, which keeps replicas consistent with each other.
+    The listener confirms the index is current every poll interval; when that has not happened within
+    max_staleness seconds, e.g. while the database connection is down, lookups return None and callers
+    fall back to the database.
+    """
+    def __init__(self, *, db, max_staleness: int, logger=None,
+                 on_change: Callable[[Optional[str]], None] = None, poll_interval: float = None):
+        """
+        @param db DbApi providing listen() and get_token_states()
+        @param max_staleness seconds after the last confirmation for which the index is trusted; 0 disables it
+        @param logger logger
+        @param on_change invoked with the token hash of every changed token, and with None after a reload
+        @param poll_interval seconds between confirmations; defaults to a third of max_staleness
+        """
+        self.db = db
+        self.max_staleness = max_staleness
+        self.logger = logger
+        self.on_change = on_change
+        self.poll_interval = poll_interval if poll_interval is not None else max_staleness / 3
+        self.states = {}
+        self.lock = threading.Lock()
+        self.synced_at = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def is_fresh(self) -> bool:
+        """
+        @return True if the index was confirmed current within the last max_staleness seconds
+        """
+        synced_at = self.synced_at
+        return synced_at is not None and time.monotonic() - synced_at <= self.max_staleness
+
+    def get_state(self, *, token_hash: str) -> Optional[int]:
+        """
+        Look up the state of a token
+        @param token_hash token hash
+        @return token state; None if the index is stale or does not know the token
+        """
+        if not self.is_fresh():
+            return None
+        return self.states.get(token_hash)
+
+    def load(self, *, states: Iterable[Tuple[str, int]], synced_at: float = None):
+        """
+        Replace the index contents with a snapshot of the database
+        @param states token hash and state tuples
+        @param synced_at monotonic time at which the snapshot was known to be current; None leaves the index stale
+        """
+        with self.lock:
+            self.states = {token_hash: state for token_hash, state in states}
+            self.synced_at = synced_at
+        self.__notify(token_hash=None)
+
+    def apply(self, *, payload: str):
+        """
+        Apply a change notification published by DbApi
+        @param payload JSON encoded token hash and state; a null state marks a removed token,
+                       a null token hash asks for a reload
+        @return False if the index must be reloaded from the database
+        """
+        change = json.loads(payload)
+        token_hash = change.get('token_hash')
+        if token_hash is None:
+            return False
+        state = change.get('state')
+        with self.lock:
+            if state is None:
+                self.states.pop(token_hash, None)
+            else:
+                self.states[token_hash] = state
+        self.__notify(token_hash=token_hash)
+        return True
+
+    def mark_synced(self, *, synced_at: float):
+        self.synced_at = synced_at
+
+    def size(self) -> int:
+        return len(self.states)
+
+    def start(self):
+        """
+        Start the listener thread; a no-op if the index is disabled or already running
+        """
+        if self.max_staleness <= 0 or self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.__run, name="TokenStateIndex", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __notify(self, *, token_hash: Optional[str]):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(token_hash)
+        except Exception as e:
+            self.__log_error(f"Token state change callback failed for {token_hash}: {e}")
+
+    def __log_error(self, message: str):
+        if self.logger is not None:
+            self.logger.error(message)
+
+    def __run(self):
+        while not self.stopped.is_set():
+            conn = None
+            try:
+                # Listen before taking the snapshot so that no change falls in between
+                conn = self.db.listen(channel=self.db.TOKENS_CHANNEL)
+                self.load(states=self.db.get_token_states())
+                if self.logger is not None:
+                    self.logger.info(f"Token state index loaded with {self.size()} tokens")
+                self.__listen(conn=conn)
+            except Exception as e:
+                self.__log_error(f"Token state index listener failed: {e}")
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self.stopped.wait(self.poll_interval)
+
+    def __listen(self, *, conn):
+        """
+        Apply notifications until stopped; returns to request a reload
+        @param conn connection listening on the tokens channel
+        """
+        while not self.stopped.is_set():
+            # Notifications committed before this round-trip are delivered before its result,
+            # so once it completes the index reflects the database as of when it was sent
+            started = time.monotonic()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if not self.__drain(conn=conn):
+                return
+            self.mark_synced(synced_at=started)
+
+            if select.select([conn], [], [], self.poll_interval) != ([], [], []):
+                conn.poll()
+                if not self.__drain(conn=conn):
+                    return
+
+    def __drain(self, *, conn) -> bool:
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            if not self.apply(payload=notify.payload):
+                return False
+        return True
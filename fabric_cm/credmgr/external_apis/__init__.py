@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+from concurrent.futures import ThreadPoolExecutor
+
+from fabric_cm.credmgr.common.single_flight import SingleFlight
+from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.credmgr.external_apis.core_api_cache import CoreApiCache
+from fabric_cm.credmgr.external_apis.http_session import create_http_session
+
+CORE_API_CACHE = CoreApiCache(max_size=CONFIG_OBJ.get_core_api_cache_size(),
+                              identity_ttl=CONFIG_OBJ.get_core_api_identity_cache_ttl(),
+                              roles_ttl=CONFIG_OBJ.get_core_api_roles_cache_ttl(),
+                              projects_ttl=CONFIG_OBJ.get_core_api_projects_cache_ttl())
+
+CORE_API_SESSION = create_http_session(pool_size=CONFIG_OBJ.get_core_api_pool_size())
+CORE_API_EXECUTOR = ThreadPoolExecutor(max_workers=CONFIG_OBJ.get_core_api_workers(), thread_name_prefix='core-api')
+
+# Identical concurrent reads from each upstream service are sent once
+CORE_API_FLIGHTS = SingleFlight(name='core-api')
+LITELLM_FLIGHTS = SingleFlight(name='litellm')
+LDAP_FLIGHTS = SingleFlight(name='ldap')
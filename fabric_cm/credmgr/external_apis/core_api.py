@@ -28,6 +28,8 @@ from typing import Tuple, List
 import requests
 
 from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.credmgr.external_apis import CORE_API_CACHE, CORE_API_SESSION, CORE_API_EXECUTOR, CORE_API_FLIGHTS
+from fabric_cm.credmgr.external_apis.core_api_cache import CoreApiCache
 from fabric_cm.credmgr.logging import LOG
 
 
@@ -36,6 +38,8 @@ class CoreApi:
     Class implements functionality to interface with Project Registry
     """
     VOUCH_COOKIE_CHUNK_SIZE = 4000
+    # Maximum number of /projects pages of one listing fetched at the same time
+    PAGE_FETCH_PARALLELISM = 4
 
     @staticmethod
     def _extract_error_message(response) -> str:
@@ -61,7 +65,7 @@ class CoreApi:
 
     def _set_chunked_cookie(self, cookie_value: str):
         """
-        Set a cookie on the session, chunking it the same way vouch-proxy does.
+        Set a cookie sent with every request of this instance, chunking it the same way vouch-proxy does.
         Vouch splits cookies > 4000 bytes into <name>, <name>_1, <name>_2, etc.
         """
         for i in range(0, len(cookie_value), self.VOUCH_COOKIE_CHUNK_SIZE):
@@ -69,7 +73,7 @@ class CoreApi:
             chunk_index = i // self.VOUCH_COOKIE_CHUNK_SIZE
             name = self.cookie_name if chunk_index == 0 else f"{self.cookie_name}_{chunk_index}"
             cookie_obj = requests.cookies.create_cookie(name=name, value=chunk)
-            self.session.cookies.set_cookie(cookie_obj)
+            self.cookies.set_cookie(cookie_obj)
 
     def __init__(self, api_server: str, cookie: str, cookie_name: str, cookie_domain: str, token: str = None):
         self.api_server = api_server
@@ -84,31 +88,47 @@ class CoreApi:
         if self.cookie is None and self.token is None:
             raise CoreApiError(f"Either cookie or token must be specified!")
 
-        # Set the headers
-        headers = {
-            'Accept': 'application/json',
-            'Content-Type': "application/json"
-        }
-
-        # Create Session
-        self.session = requests.Session()
+        # Connections are shared by all instances; credentials are sent per request
+        self.session = CORE_API_SESSION
+        self.headers = {}
+        self.cookies = requests.cookies.RequestsCookieJar()
+        # uuid and email of the user, looked up once per instance
+        self.identity = None
 
         if cookie is not None:
             # Chunk cookie the same way vouch-proxy does (splits at 4000 bytes)
             self._set_chunked_cookie(cookie)
-            LOG.debug(f"Using vouch cookie: {self.session.cookies}")
+            LOG.debug(f"Using vouch cookie: {self.cookies}")
         else:
-            headers['authorization'] = f"Bearer {token}"
+            self.headers['authorization'] = f"Bearer {token}"
 
-        self.session.headers.update(headers)
+    def _get(self, url: str) -> requests.Response:
+        return self.session.get(url, headers=self.headers, cookies=self.cookies,
+                                verify=CONFIG_OBJ.is_core_api_ssl_verify())
 
     def get_user_id_and_email(self) -> Tuple[str, str]:
         """
         Return User's uuid by querying via /whoami Core API
         @return User's uuid
         """
+        if self.identity is not None:
+            return self.identity
+
+        key = CoreApiCache.get_credential_key(cookie=self.cookie, token=self.token)
+        cached = CORE_API_CACHE.get(kind=CoreApiCache.IDENTITY, key=key)
+        if cached is not None:
+            self.identity = cached
+            return cached
+
+        # Concurrent requests with the same credential share one /whoami call
+        uuid, email = CORE_API_FLIGHTS.do(('whoami', key), self.__get_user_id_and_email)
+        CORE_API_CACHE.set(kind=CoreApiCache.IDENTITY, key=key, value=(uuid, email))
+        self.identity = uuid, email
+        return uuid, email
+
+    def __get_user_id_and_email(self) -> Tuple[str, str]:
         url = f'{self.api_server}/whoami'
-        response = self.session.get(url, verify=CONFIG_OBJ.is_core_api_ssl_verify())
+        response = self._get(url)
         if response.status_code != 200:
             raise CoreApiError(f"Core API error occurred url: {url} status_code: {response.status_code} "
                                f"message: {self._extract_error_message(response)}")
@@ -126,8 +146,17 @@ class CoreApi:
         """
         # Get User by UUID to get roles (Facility Operator is not Project Specific,
         # so need the roles from people end point)
+        cached = CORE_API_CACHE.get(kind=CoreApiCache.ROLES, key=uuid)
+        if cached is not None:
+            return cached
+
+        roles = CORE_API_FLIGHTS.do(('people', uuid), self.__get_user_roles, uuid=uuid)
+        CORE_API_CACHE.set(kind=CoreApiCache.ROLES, key=uuid, value=roles)
+        return roles
+
+    def __get_user_roles(self, *, uuid: str):
         url = f"{self.api_server}/people/{uuid}?as_self=true"
-        response = self.session.get(url, verify=CONFIG_OBJ.is_core_api_ssl_verify())
+        response = self._get(url)
 
         if response.status_code != 200:
             raise CoreApiError(f"Core API error occurred url: {url} status_code: {response.status_code} "
@@ -143,7 +172,7 @@ class CoreApi:
 
     def __get_user_project_by_id(self, *, project_id: str):
         url = f"{self.api_server}/projects/{project_id}"
-        response = self.session.get(url, verify=CONFIG_OBJ.is_core_api_ssl_verify())
+        response = self._get(url)
 
         if response.status_code != 200:
             raise CoreApiError(f"Core API error occurred url: {url} status_code: {response.status_code} "
@@ -153,45 +182,70 @@ class CoreApi:
 
         return response.json().get("results")
 
-    def __get_user_projects(self, *, project_name: str = None):
-        offset = 0
-        limit = 200
-        uuid, email = self.get_user_id_and_email()
-        result = []
-        total_fetched = 0
-
-        while True:
-            if project_name is not None:
-                url = f"{self.api_server}/projects?search={project_name}&offset={offset}&limit={limit}" \
-                      f"&person_uuid={uuid}&sort_by=name&order_by=asc"
-            else:
-                url = f"{self.api_server}/projects?offset={offset}&limit={limit}&person_uuid={uuid}" \
-                      f"&sort_by=name&order_by=asc"
-
-            response = self.session.get(url, verify=CONFIG_OBJ.is_core_api_ssl_verify())
-
-            if response.status_code != 200:
-                raise CoreApiError(f"Core API error occurred url: {url} status_code: {response.status_code} "
-                                   f"message: {self._extract_error_message(response)}")
+    def __get_projects_page(self, *, uuid: str, project_name: str, offset: int, limit: int) -> dict:
+        if project_name is not None:
+            url = f"{self.api_server}/projects?search={project_name}&offset={offset}&limit={limit}" \
+                  f"&person_uuid={uuid}&sort_by=name&order_by=asc"
+        else:
+            url = f"{self.api_server}/projects?offset={offset}&limit={limit}&person_uuid={uuid}" \
+                  f"&sort_by=name&order_by=asc"
 
-            LOG.debug(f"GET Project Response : {response.json()}")
+        response = self._get(url)
 
-            size = response.json().get("size")
-            total = response.json().get("total")
-            projects = response.json().get("results")
+        if response.status_code != 200:
+            raise CoreApiError(f"Core API error occurred url: {url} status_code: {response.status_code} "
+                               f"message: {self._extract_error_message(response)}")
 
-            total_fetched += size
+        LOG.debug(f"GET Project Response : {response.json()}")
+        return response.json()
 
-            for x in projects:
-                result.append(x)
+    def __get_user_projects(self, *, project_name: str = None):
+        limit = 200
+        uuid, email = self.get_user_id_and_email()
 
-            if total_fetched == total:
-                break
-            offset += size
+        page = self.__get_projects_page(uuid=uuid, project_name=project_name, offset=0, limit=limit)
+        size = page.get("size")
+        total = page.get("total")
+        result = list(page.get("results"))
+        if not size or not total:
+            return result
+
+        # The total is known after the first page; fetch the remaining pages concurrently, a few at a time
+        offsets = list(range(size, total, size))
+        for i in range(0, len(offsets), self.PAGE_FETCH_PARALLELISM):
+            futures = [CORE_API_EXECUTOR.submit(self.__get_projects_page, uuid=uuid, project_name=project_name,
+                                                offset=offset, limit=limit)
+                       for offset in offsets[i:i + self.PAGE_FETCH_PARALLELISM]]
+            try:
+                for future in futures:
+                    result.extend(future.result().get("results"))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
 
         return result
 
     def get_user_projects(self, project_name: str = None, project_id: str = None) -> List[dict]:
+        # Project answers describe the caller's memberships, so they are cached per user
+        key = None
+        if CORE_API_CACHE.is_enabled(kind=CoreApiCache.PROJECTS):
+            uuid, email = self.get_user_id_and_email()
+            key = (uuid, project_id, project_name)
+            cached = CORE_API_CACHE.get(kind=CoreApiCache.PROJECTS, key=key)
+            if cached is not None:
+                return cached
+
+        flight_key = ('projects', CoreApiCache.get_credential_key(cookie=self.cookie, token=self.token),
+                      project_id, project_name)
+        projects = CORE_API_FLIGHTS.do(flight_key, self.__fetch_user_projects, project_name=project_name,
+                                       project_id=project_id)
+
+        if key is not None:
+            CORE_API_CACHE.set(kind=CoreApiCache.PROJECTS, key=key, value=projects)
+        return projects
+
+    def __fetch_user_projects(self, *, project_name: str, project_id: str) -> List[dict]:
         if project_id is not None and project_id != "all":
             return self.__get_user_project_by_id(project_id=project_id)
         elif project_name is not None and project_name != "all":
@@ -209,6 +263,20 @@ class CoreApi:
         """
         uuid, email = self.get_user_id_and_email()
 
+        # Roles and projects are independent of each other; look up the roles in the background
+        roles_future = CORE_API_EXECUTOR.submit(self.get_user_roles, uuid=uuid)
+        try:
+            projects = self.__get_active_projects(project_id=project_id)
+        except CoreApiError:
+            roles_future.cancel()
+            # Do not keep rejecting the user based on cached memberships
+            CORE_API_CACHE.invalidate(uuid=uuid)
+            raise
+
+        roles = roles_future.result()
+        return email, uuid, roles, projects
+
+    def __get_active_projects(self, *, project_id: str) -> List[dict]:
         projects_res = self.get_user_projects(project_id=project_id)
 
         projects = []
@@ -242,9 +310,7 @@ class CoreApi:
 
         if len(projects) == 0:
             raise CoreApiError(f"User is not a member of Project: {project_id}")
-
-        roles = self.get_user_roles(uuid=uuid)
-        return email, uuid, roles, projects
+        return projects
 
 
 class CoreApiError(Exception):
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import copy
+import hashlib
+import time
+from typing import Any, Hashable, Optional
+
+import prometheus_client
+
+from fabric_cm.credmgr.common.ttl_cache import TTLCache
+
+hits_counter = prometheus_client.Counter('Core_Api_Cache_Hits', 'Core API lookups answered from the cache', ['kind'])
+misses_counter = prometheus_client.Counter('Core_Api_Cache_Misses', 'Core API lookups sent to the Core API', ['kind'])
+
+
+class CoreApiCache:
+    """
+    Caches the answers of the Core API so that minting, refreshing and revoking tokens does not query
+    /whoami, /people and /projects on every request.
+    User identities are keyed by a SHA-256 digest of the cookie or token they were looked up with,
+    roles by user uuid and project memberships by user uuid and the project queried.
+    Every kind of entry has its own time to live; a ttl of 0 disables caching that kind.
+    """
+    IDENTITY = 'identity'
+    ROLES = 'roles'
+    PROJECTS = 'projects'
+
+    def __init__(self, *, max_size: int, identity_ttl: int, roles_ttl: int, projects_ttl: int):
+        self.ttls = {self.IDENTITY: identity_ttl, self.ROLES: roles_ttl, self.PROJECTS: projects_ttl}
+        self.caches = {kind: TTLCache(max_size=max_size if ttl > 0 else 0) for kind, ttl in self.ttls.items()}
+
+    def is_enabled(self, *, kind: str) -> bool:
+        return self.caches[kind].is_enabled()
+
+    @staticmethod
+    def get_credential_key(*, cookie: str = None, token: str = None) -> str:
+        """
+        Return the key identities are cached under
+        @param cookie vouch cookie
+        @param token bearer token
+        @return SHA-256 digest of the cookie or token
+        """
+        credential = cookie if cookie is not None else token
+        return hashlib.sha256(credential.encode('utf-8')).hexdigest()
+
+    def get(self, *, kind: str, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached Core API answer
+        @param kind identity, roles or projects
+        @param key cache key
+        @return a copy of the cached value; None on a cache miss
+        """
+        if not self.is_enabled(kind=kind):
+            return None
+        value = self.caches[kind].get(key)
+        if value is None:
+            misses_counter.labels(kind).inc()
+            return None
+        hits_counter.labels(kind).inc()
+        # Callers build token claims from the answer, keep the cached copy untouched
+        return copy.deepcopy(value)
+
+    def set(self, *, kind: str, key: Hashable, value: Any):
+        """
+        Cache a Core API answer for the ttl configured for its kind
+        @param kind identity, roles or projects
+        @param key cache key
+        @param value value
+        """
+        if not self.is_enabled(kind=kind) or value is None:
+            return
+        self.caches[kind].set(key, copy.deepcopy(value), expires_at=time.time() + self.ttls[kind])
+
+    def invalidate(self, *, uuid: str = None, cookie: str = None, token: str = None):
+        """
+        Drop the cached roles and project memberships of a user and/or the identity cached for a credential
+        @param uuid user's uuid
+        @param cookie vouch cookie
+        @param token bearer token
+        """
+        if cookie is not None or token is not None:
+            self.caches[self.IDENTITY].pop(self.get_credential_key(cookie=cookie, token=token))
+        if uuid is not None:
+            self.caches[self.ROLES].pop(uuid)
+            for key in self.caches[self.PROJECTS].keys():
+                if key[0] == uuid:
+                    self.caches[self.PROJECTS].pop(key)
+
+    def clear(self):
+        for cache in self.caches.values():
+            cache.clear()
@@ -29,6 +29,7 @@ from ldap3 import Connection, Server, ALL
 from ldap3.utils.conv import escape_filter_chars
 
 from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.credmgr.external_apis import LDAP_FLIGHTS
 from fabric_cm.credmgr.logging import LOG
 
 """
@@ -68,24 +69,10 @@ class CmLdapMgr:
         LOG.debug("ldap_user:%s", self.ldap_user)
         LOG.debug("ldap_search_base:%s", self.ldap_search_base)
         LOG.debug("ldap_search_filter:%s", ldap_search_filter)
-        try:
-            self.lock.acquire()
-            conn = Connection(self.server, self.ldap_user, self.ldap_password, auto_bind=True)
-            profile_found = conn.search(self.ldap_search_base,
-                                        ldap_search_filter,
-                                        attributes=[
-                                            'isMemberOf', 'uid', 'mail'
-                                        ])
-            if profile_found:
-                attributes = conn.entries[0]['isMemberOf']
-                attributes = [attr for attr in attributes if 'active' in attr]
-                if email is None:
-                    email = str(conn.entries[0]['mail'])
-            else:
-                attributes = None
-            conn.unbind()
-        finally:
-            self.lock.release()
+        # Concurrent searches for the same user share one search
+        attributes, mail = LDAP_FLIGHTS.do(ldap_search_filter, self.__search, ldap_search_filter=ldap_search_filter)
+        if email is None:
+            email = mail
         LOG.debug(attributes)
         # CoMange doesn't have project tags; so always return empty list
         project_tags = []
@@ -109,6 +96,32 @@ class CmLdapMgr:
         LOG.debug("Project Tags: %s, Roles: %s", project_tags, roles)
         return email, roles, project_tags
 
+    def __search(self, *, ldap_search_filter: str) -> (list, str):
+        """
+        Search the profile matching the filter
+        @param ldap_search_filter search filter
+        @return tuple of the user's active memberships and email; None for both if no profile was found
+        """
+        try:
+            self.lock.acquire()
+            conn = Connection(self.server, self.ldap_user, self.ldap_password, auto_bind=True)
+            profile_found = conn.search(self.ldap_search_base,
+                                        ldap_search_filter,
+                                        attributes=[
+                                            'isMemberOf', 'uid', 'mail'
+                                        ])
+            attributes = None
+            mail = None
+            if profile_found:
+                attributes = conn.entries[0]['isMemberOf']
+                attributes = [attr for attr in attributes if 'active' in attr]
+                if 'mail' in conn.entries[0]:
+                    mail = str(conn.entries[0]['mail'])
+            conn.unbind()
+        finally:
+            self.lock.release()
+        return attributes, mail
+
 
 class CmLdapMgrSingleton:
     """
@@ -24,6 +24,7 @@
 # Author Komal Thareja (kthare10@renci.org)
 import requests
 
+from fabric_cm.credmgr.external_apis import LITELLM_FLIGHTS
 from fabric_cm.credmgr.logging import LOG
 
 
@@ -85,6 +86,10 @@ class LiteLLMApi:
         @param user_id User identifier
         @return dict with user info
         """
+        # Concurrent lookups of the same user share one call
+        return LITELLM_FLIGHTS.do(('user/info', user_id), self.__get_user_info, user_id=user_id)
+
+    def __get_user_info(self, *, user_id: str) -> dict:
         url = f'{self.api_server}/user/info'
 
         LOG.debug(f"LiteLLM get_user_info request: {url}")
@@ -219,6 +224,9 @@ class LiteLLMApi:
         List all available models from LiteLLM via OpenAI-compatible /models endpoint.
         @return list of model dicts
         """
+        return LITELLM_FLIGHTS.do(('models',), self.__list_models)
+
+    def __list_models(self) -> list:
         url = f'{self.api_server}/models'
 
         LOG.debug(f"LiteLLM list_models request: {url}")
@@ -238,6 +246,9 @@ class LiteLLMApi:
         @param key_id Key identifier (token field from LiteLLM)
         @return response dict with key info
         """
+        return LITELLM_FLIGHTS.do(('key/info', key_id), self.__get_key_info, key_id=key_id)
+
+    def __get_key_info(self, *, key_id: str) -> dict:
         url = f'{self.api_server}/key/info'
 
         LOG.debug(f"LiteLLM get_key_info request: {url}")
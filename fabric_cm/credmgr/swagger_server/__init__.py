@@ -1,11 +1,13 @@
 from datetime import timedelta
 
-from fss_utils.jwt_manager import JWTManager, ValidateCode
 from fss_utils.jwt_validate import JWTValidator
 import prometheus_client
 
+from fabric_cm.credmgr.common.crypto_executor import CryptoExecutor
 from fabric_cm.credmgr.config import CONFIG_OBJ
 from fabric_cm.credmgr.logging import LOG
+from fabric_cm.credmgr.token.key_ring import KeyRing
+from fabric_cm.credmgr.token.token_signer import TokenSigner
 
 received_counter = prometheus_client.Counter('Requests_Received', 'HTTP Requests', ['method', 'endpoint'])
 success_counter = prometheus_client.Counter('Requests_Success', 'HTTP Success', ['method', 'endpoint'])
@@ -22,11 +24,12 @@ jwt_validator = JWTValidator(url=CILOGON_CERTS,
                                                       seconds=CILOGON_KEY_REFRESH.second),
                              audience=CONFIG_OBJ.get_oauth_client_id())
 
-kid = CONFIG_OBJ.get_jwt_public_key_kid()
-public_key = CONFIG_OBJ.get_jwt_public_key()
-code, jwk_public_key_rsa = JWTManager.encode_jwk(key_file_name=public_key, kid=kid, alg="RS256")
-if code != ValidateCode.VALID:
-    LOG.error("Failed to encode JWK")
-    raise jwk_public_key_rsa
+KEY_RING = KeyRing(kid=CONFIG_OBJ.get_jwt_public_key_kid(), public_key_file=CONFIG_OBJ.get_jwt_public_key(),
+                   key_dir=CONFIG_OBJ.get_jwt_public_keys_dir(), refresh_period=CONFIG_OBJ.get_jwt_keys_refresh(),
+                   logger=LOG)
 
-fabric_jwks = {"keys": [jwk_public_key_rsa]}
+CRYPTO_EXECUTOR = CryptoExecutor(workers=CONFIG_OBJ.get_crypto_workers(), logger=LOG)
+
+TOKEN_SIGNER = TokenSigner(private_key_file=CONFIG_OBJ.get_jwt_private_key(), kid=CONFIG_OBJ.get_jwt_public_key_kid(),
+                           pass_phrase=CONFIG_OBJ.get_jwt_private_key_pass_phrase(), logger=LOG,
+                           executor=CRYPTO_EXECUTOR)
@@ -30,6 +30,7 @@ import prometheus_client
 
 from fabric_cm.credmgr.swagger_server.app import create_app
 from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.credmgr.core import POOL_HEALTH_CHECKER, TOKEN_REAPER, TOKEN_STATE_INDEX, WRITE_BATCHER
 from fabric_cm.credmgr.logging import LOG
 
 
@@ -46,6 +47,20 @@ def main():
         prometheus_port = CONFIG_OBJ.get_prometheus_port()
         prometheus_client.start_http_server(prometheus_port)
 
+        # Keep token states in memory, updated from database notifications
+        TOKEN_STATE_INDEX.start()
+
+        # Remove expired tokens in the background
+        TOKEN_REAPER.start()
+
+        # Commit inserts of concurrent requests together
+        if WRITE_BATCHER is not None:
+            WRITE_BATCHER.start()
+
+        # Check idle database connections in the background instead of on every checkout, if configured
+        if POOL_HEALTH_CHECKER is not None:
+            POOL_HEALTH_CHECKER.start()
+
         # Start up the server
         uvicorn.run(app, host="0.0.0.0", port=port)
 
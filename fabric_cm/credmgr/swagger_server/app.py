@@ -1,15 +1,28 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from fabric_cm import __version__
 from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.credmgr.core import ASYNC_DB_OBJ
 from fabric_cm.credmgr.swagger_server.routes import router
+from fabric_cm.db.instrumentation import count_queries, queries_per_request
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # The asyncpg connections belong to the event loop of the server; close them before it stops
+    if ASYNC_DB_OBJ is not None:
+        await ASYNC_DB_OBJ.dispose()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Fabric Credential Manager API",
         version=__version__,
+        lifespan=lifespan,
     )
 
     allowed_origins = CONFIG_OBJ.get_cors_allowed_origins()
@@ -26,5 +39,14 @@ def create_app() -> FastAPI:
         expose_headers=["Content-Length", "Content-Range"],
     )
 
+    @app.middleware("http")
+    async def count_database_queries(request: Request, call_next):
+        with count_queries() as counter:
+            response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            queries_per_request.labels(route.path).observe(counter.count)
+        return response
+
     app.include_router(router, prefix="/credmgr")
     return app
@@ -16,7 +16,7 @@ class Tokens(Model):
 
     Do not edit the class manually.
     """
-    def __init__(self, limit: int=None, offset: int=None, size: int=None, status: int=200, type: str=None, data: List[Token]=None):  # noqa: E501
+    def __init__(self, limit: int=None, offset: int=None, size: int=None, status: int=200, type: str=None, data: List[Token]=None, next: str=None):  # noqa: E501
         """Tokens - a model defined in Swagger
 
         :param limit: The limit of this Tokens.  # noqa: E501
@@ -31,6 +31,8 @@ class Tokens(Model):
         :type type: str
         :param data: The data of this Tokens.  # noqa: E501
         :type data: List[Token]
+        :param next: The next of this Tokens.  # noqa: E501
+        :type next: str
         """
         self.swagger_types = {
             'limit': int,
@@ -38,7 +40,8 @@ class Tokens(Model):
             'size': int,
             'status': int,
             'type': str,
-            'data': List[Token]
+            'data': List[Token],
+            'next': str
         }
 
         self.attribute_map = {
@@ -47,7 +50,8 @@ class Tokens(Model):
             'size': 'size',
             'status': 'status',
             'type': 'type',
-            'data': 'data'
+            'data': 'data',
+            'next': 'next'
         }
         self._limit = limit
         self._offset = offset
@@ -55,6 +59,7 @@ class Tokens(Model):
         self._status = status
         self._type = type
         self._data = data
+        self._next = next
 
     @classmethod
     def from_dict(cls, dikt) -> 'Tokens':
@@ -192,3 +197,26 @@ class Tokens(Model):
         """
 
         self._data = data
+
+    @property
+    def next(self) -> str:
+        """Gets the next of this Tokens.
+
+        Cursor to pass to get the next page; absent on the last page  # noqa: E501
+
+        :return: The next of this Tokens.
+        :rtype: str
+        """
+        return self._next
+
+    @next.setter
+    def next(self, next: str):
+        """Sets the next of this Tokens.
+
+        Cursor to pass to get the next page; absent on the last page  # noqa: E501
+
+        :param next: The next of this Tokens.
+        :type next: str
+        """
+
+        self._next = next
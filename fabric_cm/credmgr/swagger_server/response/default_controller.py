@@ -27,7 +27,7 @@ Module for handling version APIs
 """
 
 from fabric_cm.credmgr.swagger_server.models.jwks import Jwks
-from fabric_cm.credmgr.swagger_server import received_counter, success_counter, failure_counter, fabric_jwks
+from fabric_cm.credmgr.swagger_server import received_counter, success_counter, failure_counter, KEY_RING
 from fabric_cm.credmgr.swagger_server.response.constants import HTTP_METHOD_GET, CERTS_URL
 from fabric_cm.credmgr.logging import LOG
 from fabric_cm.credmgr.swagger_server.response.cors_response import cors_200, cors_500
@@ -43,7 +43,7 @@ def certs_get():  # noqa: E501
     """
     received_counter.labels(HTTP_METHOD_GET, CERTS_URL).inc()
     try:
-        response = Jwks.from_dict(fabric_jwks)
+        response = Jwks.from_dict(KEY_RING.get_jwks())
         LOG.debug(response)
         success_counter.labels(HTTP_METHOD_GET, CERTS_URL).inc()
         return cors_200(response_body=response)
@@ -292,8 +292,48 @@ def tokens_revokes_post(request: Request, body: TokenPost, claims: dict = None):
         return cors_500(details="An internal error occurred. Please try again or contact support.")
 
 
+def _parse_tokens_query(*, token_hash: str, expires: str, limit: int, offset: int, cursor: str):
+    """
+    Validate the query parameters of a token listing
+    @return tuple of an error response (None if the parameters are valid), the expiry time and the decoded cursor
+    """
+    if token_hash and not _TOKEN_HASH_PATTERN.match(token_hash):
+        return cors_400(details="Invalid token hash format. Expected 64-character hex string."), None, None
+
+    if expires is not None:
+        try:
+            expires = datetime.strptime(expires, OAuthCredMgr.TIME_FORMAT)
+        except Exception:
+            return cors_400(f"Expiry time is not in format {OAuthCredMgr.TIME_FORMAT}"), None, None
+
+    if limit is not None and (limit < 1 or limit > _MAX_LIMIT):
+        return cors_400(details=f"limit must be between 1 and {_MAX_LIMIT}."), None, None
+    if offset is not None and (offset < 0 or offset > _MAX_OFFSET):
+        return cors_400(details=f"offset must be between 0 and {_MAX_OFFSET}."), None, None
+    if cursor is not None:
+        try:
+            cursor = OAuthCredMgr.decode_cursor(cursor)
+        except ValueError:
+            return cors_400(details="Invalid cursor."), None, None
+    return None, expires, cursor
+
+
+def _tokens_response(*, credmgr: OAuthCredMgr, token_list: list, limit: int):
+    success_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+    response = Tokens()
+    response.data = []
+    for t in token_list:
+        token = Token().from_dict(t)
+        response.data.append(token)
+    response.size = len(response.data)
+    response.next = credmgr.get_next_cursor(tokens=token_list, limit=limit)
+    response.type = "token"
+    LOG.debug(response)
+    return cors_200(response_body=response)
+
+
 def tokens_get(token_hash=None, project_id=None, expires=None, states=None, limit=None, offset=None,
-               claims: dict = None):  # noqa: E501
+               cursor=None, claims: dict = None):  # noqa: E501
     """Get tokens
 
     :param token_hash: Token identified by SHA256 hash
@@ -308,47 +348,62 @@ def tokens_get(token_hash=None, project_id=None, expires=None, states=None, limi
     :type limit: int
     :param offset: number of items to skip before starting to collect the result set
     :type offset: int
+    :param cursor: next cursor returned with the previous page; takes precedence over offset
+    :type cursor: str
     :param claims
     :type claims: dict
 
     :rtype: Tokens
     """
     received_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+    error, expires, cursor = _parse_tokens_query(token_hash=token_hash, expires=expires, limit=limit, offset=offset,
+                                                 cursor=cursor)
+    if error is not None:
+        return error
 
-    if token_hash and not _TOKEN_HASH_PATTERN.match(token_hash):
-        return cors_400(details="Invalid token hash format. Expected 64-character hex string.")
+    try:
+        credmgr = OAuthCredMgr()
+        token_list = credmgr.get_tokens(token_hash=token_hash, project_id=project_id,
+                                        user_email=claims.get(OAuthCredMgr.EMAIL), expires=expires, states=states,
+                                        limit=limit, offset=offset, cursor=cursor)
+        return _tokens_response(credmgr=credmgr, token_list=token_list, limit=limit)
+    except Exception as ex:
+        LOG.exception(ex)
+        failure_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+        return cors_500(details="An internal error occurred. Please try again or contact support.")
 
-    if expires is not None:
-        try:
-            expires = datetime.strptime(expires, OAuthCredMgr.TIME_FORMAT)
-        except Exception:
-            return cors_400(f"Expiry time is not in format {OAuthCredMgr.TIME_FORMAT}")
 
-    if limit is not None and (limit < 1 or limit > _MAX_LIMIT):
-        return cors_400(details=f"limit must be between 1 and {_MAX_LIMIT}.")
-    if offset is not None and (offset < 0 or offset > _MAX_OFFSET):
-        return cors_400(details=f"offset must be between 0 and {_MAX_OFFSET}.")
+async def tokens_get_async(token_hash=None, project_id=None, expires=None, states=None, limit=None, offset=None,
+                           cursor=None, claims: dict = None):  # noqa: E501
+    """Get tokens awaiting the database; only used with the asyncpg driver, see tokens_get
+    """
+    received_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+    error, expires, cursor = _parse_tokens_query(token_hash=token_hash, expires=expires, limit=limit, offset=offset,
+                                                 cursor=cursor)
+    if error is not None:
+        return error
 
     try:
         credmgr = OAuthCredMgr()
-        token_list = credmgr.get_tokens(token_hash=token_hash, project_id=project_id, user_email=claims.get(OAuthCredMgr.EMAIL),
-                                        expires=expires, states=states, limit=limit, offset=offset)
-        success_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
-        response = Tokens()
-        response.data = []
-        for t in token_list:
-            token = Token().from_dict(t)
-            response.data.append(token)
-        response.size = len(response.data)
-        response.type = "token"
-        LOG.debug(response)
-        return cors_200(response_body=response)
+        token_list = await credmgr.get_tokens_async(token_hash=token_hash, project_id=project_id,
+                                                    user_email=claims.get(OAuthCredMgr.EMAIL), expires=expires,
+                                                    states=states, limit=limit, offset=offset, cursor=cursor)
+        return _tokens_response(credmgr=credmgr, token_list=token_list, limit=limit)
     except Exception as ex:
         LOG.exception(ex)
         failure_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
         return cors_500(details="An internal error occurred. Please try again or contact support.")
 
 
+def _revoke_list_response(*, token_list: list):
+    success_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+    response = RevokeList()
+    response.data = token_list
+    response.size = len(response.data)
+    response.type = "revoked token hashes"
+    return cors_200(response_body=response)
+
+
 def tokens_revoke_list_get(project_id: str):  # noqa: E501
     """Get token revoke list i.e. list of revoked identity token hashes
 
@@ -363,18 +418,40 @@ def tokens_revoke_list_get(project_id: str):  # noqa: E501
     try:
         credmgr = OAuthCredMgr()
         token_list = credmgr.get_token_revoke_list(project_id=project_id)
-        success_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
-        response = RevokeList()
-        response.data = token_list
-        response.size = len(response.data)
-        response.type = "revoked token hashes"
-        return cors_200(response_body=response)
+        return _revoke_list_response(token_list=token_list)
+    except Exception as ex:
+        LOG.exception(ex)
+        failure_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+        return cors_500(details="An internal error occurred. Please try again or contact support.")
+
+
+async def tokens_revoke_list_get_async(project_id: str):  # noqa: E501
+    """Get token revoke list awaiting the database; only used with the asyncpg driver, see tokens_revoke_list_get
+    """
+    received_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
+    try:
+        credmgr = OAuthCredMgr()
+        token_list = await credmgr.get_token_revoke_list_async(project_id=project_id)
+        return _revoke_list_response(token_list=token_list)
     except Exception as ex:
         LOG.exception(ex)
         failure_counter.labels(HTTP_METHOD_GET, TOKENS_REVOKE_LIST_URL).inc()
         return cors_500(details="An internal error occurred. Please try again or contact support.")
 
 
+def _validate_response(*, state: str, claims: dict):
+    success_counter.labels(HTTP_METHOD_POST, TOKENS_VALIDATE_URL).inc()
+    response_data = Status200OkNoContentData()
+    response_data.details = f"Token is {state}!"
+    response = DecodedToken()
+    response.data = [response_data]
+    response.size = len(response.data)
+    response.status = 200
+    response.type = 'no_content'
+    response.token = claims
+    return cors_200(response_body=response)
+
+
 def tokens_validate_post(body: TokenPost):  # noqa: E501
     """Validate an identity token issued by Credential Manager
 
@@ -392,17 +469,24 @@ def tokens_validate_post(body: TokenPost):  # noqa: E501
             state, claims = credmgr.validate_token(token=body.token)
         else:
             raise Exception(f"Invalid token type: {body.type}")
+        return _validate_response(state=state, claims=claims)
+    except Exception as ex:
+        LOG.exception(ex)
+        failure_counter.labels(HTTP_METHOD_POST, TOKENS_VALIDATE_URL).inc()
+        return cors_500(details="An internal error occurred. Please try again or contact support.")
 
-        success_counter.labels(HTTP_METHOD_POST, TOKENS_VALIDATE_URL).inc()
-        response_data = Status200OkNoContentData()
-        response_data.details = f"Token is {state}!"
-        response = DecodedToken()
-        response.data = [response_data]
-        response.size = len(response.data)
-        response.status = 200
-        response.type = 'no_content'
-        response.token = claims
-        return cors_200(response_body=response)
+
+async def tokens_validate_post_async(body: TokenPost):  # noqa: E501
+    """Validate an identity token awaiting the database; only used with the asyncpg driver, see tokens_validate_post
+    """
+    received_counter.labels(HTTP_METHOD_POST, TOKENS_VALIDATE_URL).inc()
+    try:
+        if body.type == "identity":
+            credmgr = OAuthCredMgr()
+            state, claims = await credmgr.validate_token_async(token=body.token)
+        else:
+            raise Exception(f"Invalid token type: {body.type}")
+        return _validate_response(state=state, claims=claims)
     except Exception as ex:
         LOG.exception(ex)
         failure_counter.labels(HTTP_METHOD_POST, TOKENS_VALIDATE_URL).inc()
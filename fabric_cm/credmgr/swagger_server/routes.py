@@ -3,6 +3,7 @@ from typing import List, Optional
 from fastapi import APIRouter, Request, Depends, Query, Body
 from pydantic import BaseModel
 
+from fabric_cm.credmgr.core import ASYNC_DB_OBJ
 from fabric_cm.credmgr.swagger_server.response import tokens_controller, default_controller, version_controller
 from fabric_cm.credmgr.swagger_server.dependencies import get_login_claims, get_login_or_token_claims
 from fabric_cm.credmgr.swagger_server.models.request import Request as RequestModel
@@ -84,28 +85,52 @@ def tokens_revokes_post(request: Request,
         request=request, body=model, claims=claims)
 
 
-@router.get("/tokens")
-def tokens_get(token_hash: Optional[str] = Query(None),
-               project_id: Optional[str] = Query(None),
-               expires: Optional[str] = Query(None),
-               states: Optional[List[str]] = Query(None),
-               limit: Optional[int] = Query(None),
-               offset: Optional[int] = Query(None),
-               claims: dict = Depends(get_login_or_token_claims)):
-    return tokens_controller.tokens_get(
-        token_hash=token_hash, project_id=project_id, expires=expires,
-        states=states, limit=limit, offset=offset, claims=claims)
-
-
-@router.get("/tokens/revoke_list")
-def tokens_revoke_list_get(project_id: Optional[str] = Query(None)):
-    return tokens_controller.tokens_revoke_list_get(project_id=project_id)
-
-
-@router.post("/tokens/validate")
-def tokens_validate_post(body: TokenPostBody):
-    model = TokenPost(type=body.type, token=body.token)
-    return tokens_controller.tokens_validate_post(body=model)
+if ASYNC_DB_OBJ is None:
+    # Token reads hold a worker thread of the threadpool while they wait for psycopg2
+    @router.get("/tokens")
+    def tokens_get(token_hash: Optional[str] = Query(None),
+                   project_id: Optional[str] = Query(None),
+                   expires: Optional[str] = Query(None),
+                   states: Optional[List[str]] = Query(None),
+                   limit: Optional[int] = Query(None),
+                   offset: Optional[int] = Query(None),
+                   cursor: Optional[str] = Query(None),
+                   claims: dict = Depends(get_login_or_token_claims)):
+        return tokens_controller.tokens_get(
+            token_hash=token_hash, project_id=project_id, expires=expires,
+            states=states, limit=limit, offset=offset, cursor=cursor, claims=claims)
+
+    @router.get("/tokens/revoke_list")
+    def tokens_revoke_list_get(project_id: Optional[str] = Query(None)):
+        return tokens_controller.tokens_revoke_list_get(project_id=project_id)
+
+    @router.post("/tokens/validate")
+    def tokens_validate_post(body: TokenPostBody):
+        model = TokenPost(type=body.type, token=body.token)
+        return tokens_controller.tokens_validate_post(body=model)
+else:
+    # With asyncpg the token reads await the database on the event loop
+    @router.get("/tokens")
+    async def tokens_get(token_hash: Optional[str] = Query(None),
+                         project_id: Optional[str] = Query(None),
+                         expires: Optional[str] = Query(None),
+                         states: Optional[List[str]] = Query(None),
+                         limit: Optional[int] = Query(None),
+                         offset: Optional[int] = Query(None),
+                         cursor: Optional[str] = Query(None),
+                         claims: dict = Depends(get_login_or_token_claims)):
+        return await tokens_controller.tokens_get_async(
+            token_hash=token_hash, project_id=project_id, expires=expires,
+            states=states, limit=limit, offset=offset, cursor=cursor, claims=claims)
+
+    @router.get("/tokens/revoke_list")
+    async def tokens_revoke_list_get(project_id: Optional[str] = Query(None)):
+        return await tokens_controller.tokens_revoke_list_get_async(project_id=project_id)
+
+    @router.post("/tokens/validate")
+    async def tokens_validate_post(body: TokenPostBody):
+        model = TokenPost(type=body.type, token=body.token)
+        return await tokens_controller.tokens_validate_post_async(body=model)
 
 
 @router.get("/tokens/create_cli")
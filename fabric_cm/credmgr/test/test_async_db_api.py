@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import asyncio
+import contextvars
+import logging
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import OperationalError
+
+from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.db.async_db_api import AsyncDbApi
+from fabric_cm.db.db_api import DbApi
+
+
+class TestAsyncDbApi(unittest.TestCase):
+    """
+    Test the asyncpg reads return what DbApi returns; needs the Postgres database of the configuration
+    """
+    def setUp(self):
+        kwargs = dict(user=CONFIG_OBJ.get_database_user(), password=CONFIG_OBJ.get_database_password(),
+                      database=CONFIG_OBJ.get_database_name(), db_host=CONFIG_OBJ.get_database_host(),
+                      logger=logging.getLogger("test"))
+        self.db = DbApi(**kwargs)
+        try:
+            self.db.create_db()
+        except OperationalError as e:
+            self.db.db_engine.dispose()
+            self.skipTest(f"Database not available: {e}")
+        self.async_db = AsyncDbApi(**kwargs)
+        self.email = f"{uuid.uuid4()}@example.org"
+        # Writes pin the reads of their context to the primary; keep that from leaking into other tests
+        contextvars.copy_context().run(self.add_tokens)
+
+    def add_tokens(self):
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        for i in range(3):
+            self.db.add_token(user_id="u", user_email=self.email, project_id="p", created_from="127.0.0.1",
+                              state=2 + i, token_hash=uuid.uuid4().hex, hash_version=2, created_at=now,
+                              expires_at=now + timedelta(days=i + 1), comment=f"c{i}")
+
+    def tearDown(self):
+        contextvars.copy_context().run(self.db.remove_tokens, user_email=self.email)
+        self.db.db_engine.dispose()
+
+    def run_async(self, coroutine):
+        async def run():
+            try:
+                return await coroutine
+            finally:
+                # Connections belong to the loop that opened them
+                await self.async_db.dispose()
+        return asyncio.run(run())
+
+    def test_get_tokens(self):
+        for kwargs in [dict(), dict(states=[2, 3]), dict(offset=1, limit=1),
+                       dict(columns=['token_hash', 'state', 'expires_at'])]:
+            expected = self.db.get_tokens(user_email=self.email, **kwargs)
+            self.assertEqual(expected, self.run_async(self.async_db.get_tokens(user_email=self.email, **kwargs)))
+
+        expected = self.db.get_tokens(user_email=self.email, limit=None, offset=None)
+        self.assertEqual(3, len(expected))
+        cursor = (expected[0]['expires_at'], expected[0]['token_id'])
+        self.assertEqual(self.db.get_tokens(user_email=self.email, cursor=cursor),
+                         self.run_async(self.async_db.get_tokens(user_email=self.email, cursor=cursor)))
+
+    def test_get_token_state(self):
+        token_hash = self.db.get_tokens(user_email=self.email)[0]['token_hash']
+        self.assertEqual(self.db.get_token_state(token_hash=token_hash),
+                         self.run_async(self.async_db.get_token_state(token_hash=token_hash)))
+        self.assertIsNone(self.run_async(self.async_db.get_token_state(token_hash="missing")))
+
+    def test_read_from_primary(self):
+        self.assertFalse(self.async_db.has_replicas())
+        with self.async_db.read_from_primary():
+            self.assertEqual(3, len(self.run_async(self.async_db.get_tokens(user_email=self.email))))
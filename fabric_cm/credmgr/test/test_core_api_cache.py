@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from fabric_cm.credmgr.external_apis import CORE_API_CACHE
+from fabric_cm.credmgr.external_apis.core_api import CoreApi, CoreApiError
+from fabric_cm.credmgr.external_apis.core_api_cache import CoreApiCache
+
+
+class Response:
+    def __init__(self, results, total: int = None):
+        self.status_code = 200
+        self.results = results
+        self.total = total if total is not None else len(results)
+
+    def json(self):
+        return {"results": self.results, "size": len(self.results), "total": self.total}
+
+
+class Session:
+    """
+    Stands in for requests.Session and answers the Core API end points
+    """
+    def __init__(self, active: bool = True):
+        self.active = active
+        self.urls = []
+        self.threads = {}
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        self.threads[url] = threading.current_thread().name
+        if url.endswith("/whoami"):
+            return Response([{"uuid": "u1", "email": "u1@x.org"}])
+        if "/people/" in url:
+            return Response([{"roles": [{"name": "facility-operators", "description": "d"}]}])
+        return Response([{"uuid": "p1", "name": "p1", "active": self.active, "tags": ["t"],
+                          "memberships": {"is_member": True, "is_creator": False, "is_owner": False}}])
+
+
+class PagedSession(Session):
+    """
+    Serves a listing of 450 projects in pages of at most 200
+    """
+    def get(self, url, **kwargs):
+        if "/projects?" not in url:
+            return super().get(url, **kwargs)
+        self.urls.append(url)
+        offset = int(parse_qs(urlparse(url).query)["offset"][0])
+        results = [{"uuid": f"p{i}"} for i in range(offset, min(offset + 200, 450))]
+        return Response(results, total=450)
+
+
+class TestCoreApiCache(unittest.TestCase):
+    """
+    Test Core API Cache
+    """
+    def setUp(self):
+        CORE_API_CACHE.clear()
+
+    def test_kinds_and_invalidate(self):
+        cache = CoreApiCache(max_size=10, identity_ttl=60, roles_ttl=60, projects_ttl=0)
+        cache.set(kind=CoreApiCache.IDENTITY, key=CoreApiCache.get_credential_key(token="t"), value=("u1", "e"))
+        cache.set(kind=CoreApiCache.ROLES, key="u1", value=[{"name": "r"}])
+        cache.set(kind=CoreApiCache.PROJECTS, key=("u1", "p1", None), value=[])
+        self.assertFalse(cache.is_enabled(kind=CoreApiCache.PROJECTS))
+        self.assertIsNone(cache.get(kind=CoreApiCache.PROJECTS, key=("u1", "p1", None)))
+
+        # Callers get copies
+        cache.get(kind=CoreApiCache.ROLES, key="u1").append({"name": "x"})
+        self.assertEqual([{"name": "r"}], cache.get(kind=CoreApiCache.ROLES, key="u1"))
+
+        cache.invalidate(uuid="u1")
+        self.assertIsNone(cache.get(kind=CoreApiCache.ROLES, key="u1"))
+        key = CoreApiCache.get_credential_key(token="t")
+        self.assertEqual(("u1", "e"), cache.get(kind=CoreApiCache.IDENTITY, key=key))
+        cache.invalidate(token="t")
+        self.assertIsNone(cache.get(kind=CoreApiCache.IDENTITY, key=key))
+
+    def test_core_api_served_from_cache(self):
+        session = Session()
+        for _ in range(2):
+            core_api = CoreApi(api_server="https://core", cookie=None, cookie_name=None, cookie_domain=None,
+                               token="token")
+            core_api.session = session
+            email, uuid, roles, projects = core_api.get_user_and_project_info(project_id="p1")
+            self.assertEqual("u1", uuid)
+            self.assertEqual([{"name": "facility-operators"}], roles)
+            self.assertEqual(["t"], projects[0]["tags"])
+        # /whoami, /projects/p1 and /people/u1 were queried once
+        self.assertEqual(3, len(session.urls))
+
+    def test_rejection_invalidates_user(self):
+        session = Session(active=False)
+        core_api = CoreApi(api_server="https://core", cookie=None, cookie_name=None, cookie_domain=None,
+                           token="token")
+        core_api.session = session
+        with self.assertRaises(CoreApiError):
+            core_api.get_user_and_project_info(project_id="p1")
+        session.active = True
+        core_api.get_user_and_project_info(project_id="p1")
+        self.assertEqual(2, len([url for url in session.urls if url.endswith("/projects/p1")]))
+
+    def test_roles_looked_up_concurrently(self):
+        session = Session()
+        core_api = CoreApi(api_server="https://core", cookie=None, cookie_name=None, cookie_domain=None,
+                           token="token")
+        core_api.session = session
+        core_api.get_user_and_project_info(project_id="p1")
+        self.assertTrue(session.threads["https://core/people/u1?as_self=true"].startswith("core-api"))
+        self.assertEqual(threading.current_thread().name, session.threads["https://core/projects/p1"])
+
+        # The identity is looked up once per instance even without the cache
+        CORE_API_CACHE.clear()
+        core_api.get_user_projects(project_name="p1")
+        self.assertEqual(1, len([url for url in session.urls if url.endswith("/whoami")]))
+
+    def test_project_pages_assembled_in_order(self):
+        session = PagedSession()
+        core_api = CoreApi(api_server="https://core", cookie=None, cookie_name=None, cookie_domain=None,
+                           token="token")
+        core_api.session = session
+        projects = core_api.get_user_projects()
+        self.assertEqual([f"p{i}" for i in range(450)], [p["uuid"] for p in projects])
+        self.assertEqual(3, len([url for url in session.urls if "/projects?" in url]))
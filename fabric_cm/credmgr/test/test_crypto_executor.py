@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import unittest
+
+from fabric_cm.credmgr.common.crypto_executor import CryptoExecutor
+
+
+class TestCryptoExecutor(unittest.TestCase):
+    """
+    Test Crypto Executor
+    """
+    def test_inline(self):
+        executor = CryptoExecutor(workers=0)
+        self.assertFalse(executor.is_enabled())
+        self.assertEqual(8, executor.run(pow, 2, 3))
+
+    def test_worker_pool(self):
+        executor = CryptoExecutor(workers=1)
+        try:
+            self.assertEqual(8, executor.run(pow, 2, 3))
+            with self.assertRaises(ZeroDivisionError):
+                executor.run(divmod, 1, 0)
+            # Errors raised by the function do not break the pool
+            self.assertEqual(9, executor.run(pow, 3, 2))
+        finally:
+            executor.shutdown()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import unittest
+from datetime import datetime, timezone
+
+from fabric_cm.db.db_api import DbApi
+
+
+class TestCursor(unittest.TestCase):
+    """
+    Test keyset pagination cursors
+    """
+    def test_round_trip(self):
+        expires_at = datetime(2025, 1, 31, 10, 15, 30, 123456, tzinfo=timezone.utc)
+        cursor = DbApi.encode_cursor(sort_key=expires_at, row_id=42)
+        self.assertEqual((expires_at, 42), DbApi.decode_cursor(cursor=cursor))
+
+    def test_null_sort_key(self):
+        cursor = DbApi.encode_cursor(sort_key=None, row_id=7)
+        self.assertEqual((None, 7), DbApi.decode_cursor(cursor=cursor))
+
+    def test_invalid_cursor(self):
+        for cursor in ["garbage", "", DbApi.encode_cursor(sort_key=datetime.now(timezone.utc), row_id=1)[:-4]]:
+            with self.assertRaises(ValueError):
+                DbApi.decode_cursor(cursor=cursor)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import asyncio
+import logging
+import unittest
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from fabric_cm.db.instrumentation import InstrumentedQueuePool, count_queries, instrument_engine, observe_latency
+
+
+class Operations:
+    @observe_latency
+    def read(self):
+        return 1
+
+    @observe_latency
+    async def read_async(self):
+        return 2
+
+
+class TestDbInstrumentation(unittest.TestCase):
+    """
+    Test database instrumentation
+    """
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=InstrumentedQueuePool, pool_logging_name="test")
+        self.logger = logging.getLogger("test_db_instrumentation")
+        instrument_engine(engine=self.engine, name="test", slow_query_threshold=0.000001, logger=self.logger)
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    @staticmethod
+    def sample(name: str, **labels) -> float:
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_count_queries(self):
+        with count_queries() as counter:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT 3"))
+        self.assertEqual(2, counter.count)
+
+    def test_pool_metrics_and_slow_queries(self):
+        checkouts = self.sample('DB_Pool_Checkouts_total', pool="test")
+        waits = self.sample('DB_Pool_Checkout_Wait_count', pool="test")
+        with self.assertLogs(self.logger, level="WARNING") as logs:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                self.assertEqual(1, self.sample('DB_Pool_Checked_Out', pool="test"))
+        self.assertIn("SELECT 1", logs.output[0])
+        self.assertEqual(checkouts + 1, self.sample('DB_Pool_Checkouts_total', pool="test"))
+        self.assertEqual(waits + 1, self.sample('DB_Pool_Checkout_Wait_count', pool="test"))
+        self.assertEqual(0, self.sample('DB_Pool_Checked_Out', pool="test"))
+
+    def test_observe_latency(self):
+        operations = Operations()
+        self.assertEqual(1, operations.read())
+        self.assertEqual(2, asyncio.run(operations.read_async()))
+        self.assertEqual(1, self.sample('DB_Operation_Latency_count', operation="Operations.read"))
+        self.assertEqual(1, self.sample('DB_Operation_Latency_count', operation="Operations.read_async"))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import contextvars
+import logging
+import unittest
+
+from fabric_cm.db import queries
+from fabric_cm.db.db_api import DbApi
+
+
+class TestDbReplicas(unittest.TestCase):
+    """
+    Test routing of read only queries to the read replicas; engines connect lazily so no database is needed
+    """
+    def setUp(self):
+        self.db = DbApi(user="fabric", password="fabric", database="credmgr", db_host="primary:5432",
+                        logger=logging.getLogger("test"), replica_hosts=["replica-1:5432", "replica-2:5432"])
+
+    def get_read_engine(self):
+        return self.db._DbApi__get_read_session_factory().session_factory.kw['bind']
+
+    def test_round_robin(self):
+        hosts = [self.get_read_engine().url.host for _ in range(4)]
+        self.assertEqual(["replica-1", "replica-2", "replica-1", "replica-2"], hosts)
+
+    def test_no_replicas(self):
+        db = DbApi(user="fabric", password="fabric", database="credmgr", db_host="primary:5432",
+                   logger=logging.getLogger("test"))
+        self.assertFalse(db.has_replicas())
+        self.assertIs(db.Session, db._DbApi__get_read_session_factory())
+
+    def test_read_from_primary(self):
+        with DbApi.read_from_primary():
+            self.assertIs(self.db.db_engine, self.get_read_engine())
+        self.assertIsNot(self.db.db_engine, self.get_read_engine())
+
+    def test_read_your_writes_scoped_to_context(self):
+        def write():
+            queries.pin_reads_to_primary()
+            return self.get_read_engine()
+
+        self.assertIs(self.db.db_engine, contextvars.copy_context().run(write))
+        self.assertIsNot(self.db.db_engine, self.get_read_engine())
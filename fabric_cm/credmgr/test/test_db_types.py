@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import hashlib
+import unittest
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, inspect, select
+
+from fabric_cm.db.types import CompactInteger, HexDigest, enable_compact_schema
+
+
+class TestDbTypes(unittest.TestCase):
+    """
+    Test the column types of the compact schema option
+    """
+    def setUp(self):
+        self.metadata = MetaData()
+        self.table = Table('digests', self.metadata, Column('id', Integer, primary_key=True),
+                           Column('digest', HexDigest), Column('state', CompactInteger))
+        self.digest = hashlib.sha256(b'token').hexdigest()
+
+    def round_trip(self, *, compact: bool) -> list:
+        engine = create_engine("sqlite://")
+        if compact:
+            enable_compact_schema(engine=engine)
+        self.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(self.table), [{'digest': self.digest, 'state': 2}])
+            stored = conn.exec_driver_sql("SELECT digest FROM digests").scalar()
+            found = conn.execute(select(self.table.c.digest, self.table.c.state).
+                                 where(self.table.c.digest == self.digest)).all()
+            missing = conn.execute(select(self.table.c.id).where(self.table.c.digest == "not-hex")).all()
+        types = {c['name']: str(c['type']) for c in inspect(engine).get_columns('digests')}
+        engine.dispose()
+        return [stored, found, missing, types]
+
+    def test_text_schema(self):
+        stored, found, missing, types = self.round_trip(compact=False)
+        self.assertEqual(self.digest, stored)
+        self.assertEqual([(self.digest, 2)], found)
+        self.assertEqual('INTEGER', types['state'])
+
+    def test_compact_schema(self):
+        stored, found, missing, types = self.round_trip(compact=True)
+        self.assertEqual(bytes.fromhex(self.digest), stored)
+        self.assertEqual([(self.digest, 2)], found)
+        self.assertEqual([], missing)
+        self.assertEqual('SMALLINT', types['state'])
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import io
+import unittest
+from email.message import Message
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from fabric_cm.credmgr.external_apis import CORE_API_CACHE
+from fabric_cm.credmgr.external_apis.core_api import CoreApi
+from fabric_cm.credmgr.external_apis.http_session import create_http_session
+
+
+class OriginalResponse:
+    """
+    Stands in for the http.client response from which requests reads the Set-Cookie headers
+    """
+    def __init__(self, msg: Message):
+        self.msg = msg
+
+    def isclosed(self) -> bool:
+        return True
+
+
+class RecordingAdapter(HTTPAdapter):
+    """
+    Answers every request with a /whoami response that sets a cookie, recording the requests sent
+    """
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        headers = Message()
+        headers['Content-Type'] = 'application/json'
+        headers['Set-Cookie'] = f'session=user{len(self.requests)}; Path=/'
+        raw = HTTPResponse(body=io.BytesIO(b'{"results": [{"uuid": "u1", "email": "u1@x.org"}]}'),
+                           headers=dict(headers.items()), status=200, preload_content=False,
+                           original_response=OriginalResponse(msg=headers))
+        return self.build_response(request, raw)
+
+
+class TestHttpSession(unittest.TestCase):
+    """
+    Test the session shared by all Core API calls
+    """
+    def setUp(self):
+        CORE_API_CACHE.clear()
+        self.session = create_http_session(pool_size=2)
+        self.adapter = RecordingAdapter()
+        self.session.mount('https://', self.adapter)
+
+    def create_core_api(self, *, cookie: str = None, token: str = None) -> CoreApi:
+        core_api = CoreApi(api_server="https://core.example.org", cookie=cookie, cookie_name="fabric-service",
+                           cookie_domain="example.org", token=token)
+        core_api.session = self.session
+        return core_api
+
+    def test_credentials_sent_per_request(self):
+        cookie = "a" * (CoreApi.VOUCH_COOKIE_CHUNK_SIZE + 10)
+        self.create_core_api(cookie=cookie).get_user_id_and_email()
+        self.create_core_api(token="token").get_user_id_and_email()
+
+        first, second = self.adapter.requests
+        self.assertEqual(f"fabric-service={'a' * CoreApi.VOUCH_COOKIE_CHUNK_SIZE}; fabric-service_1={'a' * 10}",
+                         first.headers['Cookie'])
+        self.assertNotIn('Authorization', first.headers)
+        self.assertEqual("Bearer token", second.headers['Authorization'])
+        # The cookie set by the response to the first user is neither stored nor sent for the second one
+        self.assertNotIn('Cookie', second.headers)
+        self.assertEqual(0, len(self.session.cookies))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import os
+import shutil
+import tempfile
+import unittest
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from fabric_cm.credmgr.token.key_ring import KeyRing, KeyRingError
+
+
+class TestKeyRing(unittest.TestCase):
+    """
+    Test Key Ring
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.key_dir = os.path.join(self.tmp_dir, "keys")
+        os.makedirs(self.key_dir)
+        self.public_key_file = self.write_public_key(os.path.join(self.tmp_dir, "public.pem"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @staticmethod
+    def write_public_key(file_name: str) -> str:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private_key.public_key().public_bytes(encoding=serialization.Encoding.PEM,
+                                                    format=serialization.PublicFormat.SubjectPublicKeyInfo)
+        with open(file_name, "wb") as f:
+            f.write(pem)
+        return file_name
+
+    def test_signing_key(self):
+        key_ring = KeyRing(kid="active", public_key_file=self.public_key_file, key_dir=self.key_dir)
+        self.assertIsNotNone(key_ring.get_key(kid="active"))
+        self.assertIsNone(key_ring.get_key(kid="unknown"))
+        jwks = key_ring.get_jwks()
+        self.assertEqual(["active"], [k["kid"] for k in jwks["keys"]])
+        self.assertEqual("RS256", jwks["keys"][0]["alg"])
+
+    def test_missing_signing_key(self):
+        with self.assertRaises(KeyRingError):
+            KeyRing(kid="active", public_key_file=os.path.join(self.tmp_dir, "missing.pem"))
+
+    def test_hot_reload(self):
+        key_ring = KeyRing(kid="active", public_key_file=self.public_key_file, key_dir=self.key_dir,
+                           refresh_period=0)
+        self.write_public_key(os.path.join(self.key_dir, "next.pem"))
+        self.write_public_key(os.path.join(self.key_dir, "retiring.pem"))
+        self.assertIsNotNone(key_ring.get_key(kid="next"))
+        self.assertEqual(["active", "next", "retiring"], [k["kid"] for k in key_ring.get_jwks()["keys"]])
+
+        os.remove(os.path.join(self.key_dir, "retiring.pem"))
+        self.assertIsNone(key_ring.get_key(kid="retiring"))
+
+    def test_refresh_period(self):
+        key_ring = KeyRing(kid="active", public_key_file=self.public_key_file, key_dir=self.key_dir,
+                           refresh_period=3600)
+        self.write_public_key(os.path.join(self.key_dir, "next.pem"))
+        self.assertIsNone(key_ring.get_key(kid="next"))
+        key_ring.refresh(force=True)
+        self.assertIsNotNone(key_ring.get_key(kid="next"))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from fabric_cm.db.instrumentation import InstrumentedQueuePool, instrument_engine
+from fabric_cm.db.pool_health import PoolHealthChecker
+
+
+class TestPoolHealthChecker(unittest.TestCase):
+    """
+    Test Pool Health Checker
+    """
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.engine = create_engine(f"sqlite:///{self.path}", poolclass=QueuePool, pool_logging_name="health")
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def test_check_pings_idle_connections(self):
+        connections = [self.engine.connect() for _ in range(3)]
+        for c in connections:
+            c.execute(text("SELECT 1"))
+            c.close()
+        pings = REGISTRY.get_sample_value('DB_Pool_Pings_total', {'pool': "health", 'result': "ok"}) or 0
+        checker = PoolHealthChecker(engines=[self.engine], interval=60)
+        self.assertEqual(0, checker.check(engine=self.engine))
+        self.assertEqual(pings + 3, REGISTRY.get_sample_value('DB_Pool_Pings_total',
+                                                              {'pool': "health", 'result': "ok"}))
+        self.assertEqual(3, self.engine.pool.checkedin())
+
+    def test_check_does_not_starve_requests(self):
+        engine = create_engine(f"sqlite:///{self.path}", poolclass=InstrumentedQueuePool, pool_size=3,
+                               max_overflow=0, pool_timeout=1, pool_logging_name="health-busy")
+        instrument_engine(engine=engine, name="health-busy")
+        self.addCleanup(engine.dispose)
+        connections = [engine.connect() for _ in range(3)]
+        for c in connections:
+            c.close()
+        checkouts = REGISTRY.get_sample_value('DB_Pool_Checkouts_total', {'pool': "health-busy"})
+        do_ping = engine.dialect.do_ping
+        during_ping = []
+
+        def slow_ping(dbapi_connection):
+            # A request checking a connection out meanwhile gets an idle one without waiting
+            def request():
+                with engine.connect() as conn:
+                    during_ping.append((engine.pool.checkedout(), conn.execute(text("SELECT 1")).scalar()))
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+            return do_ping(dbapi_connection)
+
+        checker = PoolHealthChecker(engines=[engine], interval=60)
+        with mock.patch.object(engine.dialect, 'do_ping', side_effect=slow_ping):
+            self.assertEqual(0, checker.check(engine=engine))
+        # One connection held by the checker and one by the request at a time; the connection the first request
+        # used went back behind the idle ones and is not pinged again
+        self.assertEqual([(2, 1)] * 2, during_ping)
+        self.assertEqual(3, engine.pool.checkedin())
+        # Only the requests' checkouts are counted
+        self.assertEqual(checkouts + len(during_ping),
+                         REGISTRY.get_sample_value('DB_Pool_Checkouts_total', {'pool': "health-busy"}))
+
+    def test_disabled_checker_does_not_start(self):
+        checker = PoolHealthChecker(engines=[self.engine], interval=0)
+        checker.start()
+        self.assertIsNone(checker.thread)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import unittest
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects import postgresql
+
+from fabric_cm.db import queries
+
+
+class TestQueries(unittest.TestCase):
+    """
+    Test the statements shared by DbApi and AsyncDbApi
+    """
+    @staticmethod
+    def compile(stmt) -> str:
+        return str(stmt.compile(dialect=postgresql.dialect()))
+
+    def test_select_token_columns(self):
+        sql = self.compile(queries.select_tokens(project_id="p", columns=["token_hash"]))
+        self.assertTrue(sql.startswith('SELECT "Tokens".token_hash \nFROM "Tokens"'))
+        self.assertIn('"Tokens".project_id = ', sql)
+        with self.assertRaises(KeyError):
+            queries.select_tokens(project_id="p", columns=["unknown"])
+
+    def test_select_tokens_cursor_ignores_offset(self):
+        cursor = (datetime.now(timezone.utc), 10)
+        sql = self.compile(queries.select_tokens(user_email="e", offset=20, limit=5, cursor=cursor))
+        self.assertIn('("Tokens".expires_at, "Tokens".token_id) < (', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_bulk_clauses_require_filter(self):
+        with self.assertRaises(Exception):
+            queries.create_token_clauses(user_id=None, user_email=None, project_id=None, token_hashes=None,
+                                         states=[1])
+        clauses = queries.create_token_clauses(user_id=None, user_email="e", project_id=None, token_hashes=None,
+                                               states=[1])
+        self.assertEqual(2, len(clauses))
+
+    def test_generate_dict_from_row(self):
+        self.assertEqual({'state': 1}, queries.generate_dict_from_row(row={'state': 1, 'comment': None}))
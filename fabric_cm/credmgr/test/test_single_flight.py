@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+import unittest
+
+from fabric_cm.credmgr.common.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Test Single Flight
+    """
+    def setUp(self):
+        self.flights = SingleFlight(name='test')
+        self.release = threading.Event()
+        self.calls = 0
+
+    def lookup(self, fail: bool = False):
+        self.calls += 1
+        self.release.wait(5)
+        if fail:
+            raise ValueError("lookup failed")
+        return {"roles": ["r"]}
+
+    def run_concurrently(self, count: int, **kwargs) -> list:
+        outcomes = [None] * count
+
+        def run(i):
+            try:
+                outcomes[i] = self.flights.do("key", self.lookup, **kwargs)
+            except Exception as e:
+                outcomes[i] = e
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for t in threads:
+            t.start()
+        # Let every caller join the call in flight before it completes
+        while len(self.flights.calls) == 0 or self.flights.calls["key"].waiters < count - 1:
+            pass
+        self.release.set()
+        for t in threads:
+            t.join()
+        return outcomes
+
+    def test_concurrent_calls_coalesced(self):
+        outcomes = self.run_concurrently(5)
+        self.assertEqual(1, self.calls)
+        self.assertTrue(all(o == {"roles": ["r"]} for o in outcomes))
+        # Every caller gets its own copy
+        outcomes[0]["roles"].append("x")
+        self.assertEqual(["r"], outcomes[1]["roles"])
+
+        # Once the call completed, the next one goes upstream again
+        self.flights.do("key", self.lookup)
+        self.assertEqual(2, self.calls)
+
+    def test_error_shared(self):
+        outcomes = self.run_concurrently(3, fail=True)
+        self.assertEqual(1, self.calls)
+        self.assertTrue(all(isinstance(o, ValueError) for o in outcomes))
+        self.assertEqual({}, self.flights.calls)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import time
+import unittest
+
+from fabric_cm.credmgr.common.ttl_cache import TTLCache
+from fabric_cm.credmgr.core.token_cache import TokenValidationCache
+
+
+class TestTokenValidationCache(unittest.TestCase):
+    """
+    Test Token Validation Cache
+    """
+    def test_ttl_cache_eviction_and_expiry(self):
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1, expires_at=time.time() + 60)
+        cache.set("b", 2, expires_at=time.time() + 60)
+        self.assertEqual(1, cache.get("a"))
+        cache.set("c", 3, expires_at=time.time() + 60)
+        # "b" is the least recently used entry
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(2, len(cache))
+
+        cache.set("d", 4, expires_at=time.time() - 1)
+        self.assertIsNone(cache.get("d"))
+
+    def test_cache_hit_and_invalidate(self):
+        cache = TokenValidationCache(max_size=10)
+        claims = {"email": "user@example.org", "exp": int(time.time()) + 60}
+        cache.put(token="token", token_hash="hash", state="Valid", claims=claims,
+                  generation=cache.get_generation())
+        state, cached_claims = cache.get(token="token")
+        self.assertEqual("Valid", state)
+        self.assertEqual(claims, cached_claims)
+
+        # Callers may modify the returned claims without affecting the cache
+        cached_claims["id_token"] = "token"
+        self.assertNotIn("id_token", cache.get(token="token")[1])
+
+        cache.invalidate(token_hash="hash")
+        self.assertIsNone(cache.get(token="token"))
+
+    def test_concurrent_revoke_is_not_cached(self):
+        cache = TokenValidationCache(max_size=10)
+        generation = cache.get_generation()
+        cache.invalidate(token_hash="hash")
+        cache.put(token="token", token_hash="hash", state="Valid",
+                  claims={"exp": int(time.time()) + 60}, generation=generation)
+        self.assertIsNone(cache.get(token="token"))
+
+    def test_other_token_change_does_not_drop_put(self):
+        cache = TokenValidationCache(max_size=10)
+        generation = cache.get_generation()
+        # e.g. a token minted on another replica
+        cache.invalidate(token_hash="other")
+        cache.put(token="token", token_hash="hash", state="Valid",
+                  claims={"exp": int(time.time()) + 60}, generation=generation)
+        self.assertEqual("Valid", cache.get(token="token")[0])
+
+        generation = cache.get_generation()
+        cache.clear()
+        cache.put(token="token", token_hash="hash", state="Valid",
+                  claims={"exp": int(time.time()) + 60}, generation=generation)
+        self.assertIsNone(cache.get(token="token"))
+
+    def test_max_age(self):
+        cache = TokenValidationCache(max_size=10)
+        # A long-lived token is cached until it expires, weeks from now
+        cache.put(token="token", token_hash="hash", state="Valid",
+                  claims={"exp": int(time.time()) + 30 * 24 * 3600}, generation=cache.get_generation())
+        self.assertEqual("Valid", cache.get(token="token", max_age=60)[0])
+        time.sleep(0.02)
+        # Without a current token state index only recently cached results are used
+        self.assertIsNone(cache.get(token="token", max_age=0.01))
+        self.assertEqual("Valid", cache.get(token="token")[0])
+
+    def test_disabled_cache(self):
+        cache = TokenValidationCache(max_size=0)
+        cache.put(token="token", token_hash="hash", state="Valid",
+                  claims={"exp": int(time.time()) + 60}, generation=cache.get_generation())
+        self.assertIsNone(cache.get(token="token"))
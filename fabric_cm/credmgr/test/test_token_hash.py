@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import hashlib
+import unittest
+
+from fabric_cm.credmgr.token.token_hash import TokenHasher, TokenHashScheme
+
+
+class TestTokenHasher(unittest.TestCase):
+    """
+    Test Token Hasher
+    """
+    def test_pbkdf2_matches_legacy_hash(self):
+        hasher = TokenHasher(secret="secret", scheme=TokenHashScheme.Pbkdf2Sha256)
+        expected = hashlib.pbkdf2_hmac('sha256', b"token", b"secret", iterations=100_000).hex()
+        self.assertEqual(expected, hasher.hash(token="token"))
+
+    def test_schemes_are_deterministic_and_distinct(self):
+        hasher = TokenHasher(secret="secret")
+        self.assertEqual(TokenHashScheme.HmacSha256, hasher.get_scheme())
+        self.assertEqual([TokenHashScheme.Pbkdf2Sha256], hasher.get_legacy_schemes())
+
+        fingerprint = hasher.hash(token="token")
+        self.assertEqual(64, len(fingerprint))
+        self.assertEqual(fingerprint, hasher.hash(token="token"))
+        self.assertNotEqual(fingerprint, hasher.hash(token="token", scheme=TokenHashScheme.Pbkdf2Sha256))
+        self.assertNotEqual(fingerprint, TokenHasher(secret="other").hash(token="token"))
+
+    def test_scheme_from_config(self):
+        self.assertEqual(TokenHashScheme.HmacSha256, TokenHashScheme.from_config("HMAC-SHA256"))
+        self.assertEqual(TokenHashScheme.Pbkdf2Sha256, TokenHashScheme.from_config(" pbkdf2-sha256"))
+        with self.assertRaises(ValueError):
+            TokenHashScheme.from_config("md5")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import contextvars
+import logging
+import unittest
+import uuid
+from datetime import date, datetime, timezone, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.db import Tokens
+from fabric_cm.db.db_api import DbApi
+from fabric_cm.db.partitions import TokenPartitions
+
+
+class TestTokenPartitions(unittest.TestCase):
+    """
+    Test Tokens partition naming
+    """
+    def test_month_arithmetic(self):
+        self.assertEqual(date(2025, 1, 1), TokenPartitions.next_month(date(2024, 12, 1)))
+        self.assertEqual(date(2024, 3, 1), TokenPartitions.next_month(date(2024, 2, 1)))
+        # Partitions are bounded in UTC
+        expires_at = datetime(2025, 3, 1, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(date(2025, 2, 1), TokenPartitions.month_of(expires_at))
+
+    def test_partition_names(self):
+        name = TokenPartitions.partition_name(date(2025, 7, 1))
+        self.assertEqual("Tokens_2025_07", name)
+        self.assertEqual(date(2025, 7, 1), TokenPartitions.partition_month(name))
+        self.assertIsNone(TokenPartitions.partition_month("Tokens_archive_2025_07"))
+
+    def test_invalid_archive_mode(self):
+        with self.assertRaises(ValueError):
+            TokenPartitions(db=None, archive="truncate")
+
+
+class TestPartitionedTokens(unittest.TestCase):
+    """
+    Test a partitioned Tokens table; needs the Postgres server of the configuration and the right to create a
+    scratch database on it
+    """
+    def setUp(self):
+        kwargs = dict(user=CONFIG_OBJ.get_database_user(), password=CONFIG_OBJ.get_database_password(),
+                      db_host=CONFIG_OBJ.get_database_host())
+        self.database = f"credmgr_test_{uuid.uuid4().hex[:8]}"
+        url = DbApi.create_url(drivername="postgresql+psycopg2", database=CONFIG_OBJ.get_database_name(), **kwargs)
+        self.admin = create_engine(url, isolation_level="AUTOCOMMIT")
+        try:
+            with self.admin.connect() as conn:
+                conn.execute(text(f'CREATE DATABASE "{self.database}"'))
+        except (OperationalError, ProgrammingError) as e:
+            self.admin.dispose()
+            self.skipTest(f"Database not available: {e}")
+        self.db = DbApi(database=self.database, logger=logging.getLogger("test"), **kwargs)
+        self.db.set_token_partitions(TokenPartitions(db=self.db))
+        self.db.create_db()
+
+    def tearDown(self):
+        self.db.db_engine.dispose()
+        with self.admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE "{self.database}"'))
+        self.admin.dispose()
+
+    @staticmethod
+    def token(*, token_hash: str, days: int) -> dict:
+        now = datetime.now(timezone.utc)
+        return dict(user_id="u", user_email="user@example.org", project_id="p", created_from="127.0.0.1", state=2,
+                    token_hash=token_hash, hash_version=2, created_at=now, expires_at=now + timedelta(days=days),
+                    comment="test")
+
+    def test_duplicate_token_hash_rejected(self):
+        with self.db.db_engine.connect() as conn:
+            self.assertTrue(TokenPartitions.is_partitioned(conn=conn))
+        # Writes pin the reads of their context to the primary; keep that from leaking into other tests
+        context = contextvars.copy_context()
+        context.run(self.db.add_token, **self.token(token_hash="hash", days=1))
+        # The copy lands in another partition, where no index would catch it
+        with self.assertRaises(Exception):
+            context.run(self.db.add_token, **self.token(token_hash="hash", days=60))
+        with self.assertRaises(Exception):
+            context.run(self.db.add_rows, rows=[(Tokens, self.token(token_hash="twice", days=1)),
+                                                (Tokens, self.token(token_hash="twice", days=2))])
+        self.assertEqual(1, len(self.db.get_tokens(token_hash="hash")))
+        self.assertEqual([], self.db.get_tokens(token_hash="twice"))
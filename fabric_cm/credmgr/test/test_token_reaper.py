@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import unittest
+
+from fabric_cm.credmgr.core.token_reaper import TokenReaper
+
+
+class ExpiredTokens:
+    """
+    Stands in for DbApi.remove_expired_tokens
+    """
+    def __init__(self, count: int):
+        self.tokens = [{'token_hash': f"hash-{i}", 'user_id': 'uuid', 'user_email': 'user@example.org',
+                        'project_id': 'project'} for i in range(count)]
+        self.calls = 0
+
+    def remove_expired_tokens(self, *, expires, limit: int):
+        self.calls += 1
+        batch, self.tokens = self.tokens[:limit], self.tokens[limit:]
+        return batch
+
+
+class TestTokenReaper(unittest.TestCase):
+    """
+    Test Token Reaper
+    """
+    def test_reap_in_batches(self):
+        db = ExpiredTokens(count=25)
+        reaper = TokenReaper(db=db, interval=60, batch_size=10)
+        self.assertEqual(25, reaper.reap())
+        self.assertEqual(3, db.calls)
+        self.assertEqual(0, reaper.reap())
+
+    def test_disabled_reaper_does_not_start(self):
+        reaper = TokenReaper(db=ExpiredTokens(count=0), interval=0, batch_size=10)
+        reaper.start()
+        self.assertIsNone(reaper.thread)
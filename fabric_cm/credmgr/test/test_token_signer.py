@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import os
+import shutil
+import tempfile
+import unittest
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from fabric_cm.credmgr.common.crypto_executor import CryptoExecutor
+from fabric_cm.credmgr.token.token_signer import TokenSigner, TokenSignerError
+
+
+class TestTokenSigner(unittest.TestCase):
+    """
+    Test Token Signer
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.private_key_file = os.path.join(self.tmp_dir, "private.pem")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_private_key(self, pass_phrase: bytes = None):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        encryption = serialization.BestAvailableEncryption(pass_phrase) if pass_phrase else \
+            serialization.NoEncryption()
+        pem = private_key.private_bytes(encoding=serialization.Encoding.PEM,
+                                        format=serialization.PrivateFormat.PKCS8,
+                                        encryption_algorithm=encryption)
+        with open(self.private_key_file, "wb") as f:
+            f.write(pem)
+        return private_key.public_key()
+
+    def test_sign(self):
+        public_key = self.write_private_key(pass_phrase=b"secret")
+        signer = TokenSigner(private_key_file=self.private_key_file, kid="kid", pass_phrase="secret")
+        claims = {"email": "user@example.org"}
+        token = signer.sign(claims=claims, validity=60)
+
+        self.assertEqual("kid", jwt.get_unverified_header(token)["kid"])
+        decoded = jwt.decode(token, key=public_key, algorithms=["RS256"])
+        self.assertEqual("user@example.org", decoded["email"])
+        self.assertEqual(60, decoded["exp"] - decoded["iat"])
+        self.assertEqual(claims["exp"], decoded["exp"])
+
+    def test_key_not_reloaded(self):
+        public_key = self.write_private_key()
+        signer = TokenSigner(private_key_file=self.private_key_file, kid="kid")
+        # A key written in place must not be used under the kid of the loaded key
+        self.write_private_key()
+        token = signer.sign(claims={}, validity=60)
+        jwt.decode(token, key=public_key, algorithms=["RS256"])
+
+        # Worker processes sign with the key loaded by the parent as well
+        executor = CryptoExecutor(workers=1)
+        try:
+            signer.executor = executor
+            token = signer.sign(claims={}, validity=60)
+            jwt.decode(token, key=public_key, algorithms=["RS256"])
+        finally:
+            executor.shutdown()
+
+    def test_missing_key(self):
+        with self.assertRaises(TokenSignerError):
+            TokenSigner(private_key_file=self.private_key_file, kid="kid")
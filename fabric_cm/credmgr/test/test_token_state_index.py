@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import json
+import time
+import unittest
+
+from fabric_cm.credmgr.core.token_state_index import TokenStateIndex
+
+
+class TestTokenStateIndex(unittest.TestCase):
+    """
+    Test Token State Index
+    """
+    def setUp(self):
+        self.changes = []
+        self.index = TokenStateIndex(db=None, max_staleness=30, on_change=self.changes.append)
+
+    def test_load_and_apply(self):
+        self.index.load(states=[("a", 2), ("b", 4)], synced_at=time.monotonic())
+        self.assertEqual(2, self.index.get_state(token_hash="a"))
+        self.assertEqual(4, self.index.get_state(token_hash="b"))
+        self.assertIsNone(self.index.get_state(token_hash="c"))
+
+        self.assertTrue(self.index.apply(payload=json.dumps({"token_hash": "a", "state": 4})))
+        self.assertTrue(self.index.apply(payload=json.dumps({"token_hash": "b", "state": None})))
+        self.assertTrue(self.index.apply(payload=json.dumps({"token_hash": "c", "state": 2})))
+        self.assertEqual(4, self.index.get_state(token_hash="a"))
+        self.assertIsNone(self.index.get_state(token_hash="b"))
+        self.assertEqual(2, self.index.get_state(token_hash="c"))
+        self.assertEqual([None, "a", "b", "c"], self.changes)
+
+        # All tokens removed; the index has to be reloaded
+        self.assertFalse(self.index.apply(payload=json.dumps({"token_hash": None, "state": None})))
+
+    def test_stale_index_is_not_used(self):
+        self.index.load(states=[("a", 2)])
+        self.assertIsNone(self.index.get_state(token_hash="a"))
+
+        self.index.mark_synced(synced_at=time.monotonic() - 31)
+        self.assertFalse(self.index.is_fresh())
+        self.assertIsNone(self.index.get_state(token_hash="a"))
+
+        self.index.mark_synced(synced_at=time.monotonic())
+        self.assertEqual(2, self.index.get_state(token_hash="a"))
+
+    def test_disabled_index_does_not_start(self):
+        index = TokenStateIndex(db=None, max_staleness=0)
+        index.start()
+        self.assertFalse(index.is_running())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import unittest
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fabric_cm.db.memory_token_store import MemoryTokenStore
+from fabric_cm.db.sqlite_token_store import SqliteTokenStore
+from fabric_cm.db.token_store import TokenStore
+
+
+class TokenStoreTests:
+    """
+    Behavior shared by every TokenStore; mixed into a TestCase per store
+    """
+    def create_store(self) -> TokenStore:
+        raise NotImplementedError
+
+    def setUp(self):
+        self.store = self.create_store()
+        self.store.create_db()
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def add(self, *, token_hash: str, days: Optional[int], user_email: str = "user@example.org",
+            project_id: str = "p1", state: int = 2):
+        self.store.add_token(user_id="uuid", user_email=user_email, project_id=project_id, created_from="127.0.0.1",
+                             state=state, token_hash=token_hash, hash_version=2, created_at=self.now,
+                             expires_at=None if days is None else self.now + timedelta(days=days), comment="test")
+
+    def test_add_and_get_tokens(self):
+        for i in range(5):
+            self.add(token_hash=f"hash{i}", days=i)
+        tokens = self.store.get_tokens(user_email="user@example.org", limit=2)
+        self.assertEqual(["hash4", "hash3"], [t['token_hash'] for t in tokens])
+        self.assertEqual(self.now + timedelta(days=4), tokens[0]['expires_at'])
+        cursor = (tokens[-1]['expires_at'], tokens[-1]['token_id'])
+        tokens = self.store.get_tokens(user_email="user@example.org", limit=10, cursor=cursor,
+                                       columns=['token_hash'])
+        self.assertEqual([{'token_hash': "hash2"}, {'token_hash': "hash1"}, {'token_hash': "hash0"}], tokens)
+        self.assertEqual([], self.store.get_tokens(user_email="other@example.org"))
+        with self.assertRaises(KeyError):
+            self.store.get_tokens(columns=['unknown'])
+        with self.assertRaises(Exception):
+            self.add(token_hash="hash0", days=1)
+
+    def test_cursor_over_tokens_without_expiry(self):
+        self.add(token_hash="expiring", days=1)
+        self.add(token_hash="never1", days=None)
+        self.add(token_hash="never2", days=None)
+        tokens = self.store.get_tokens(limit=1)
+        self.assertEqual(["never2"], [t['token_hash'] for t in tokens])
+        self.assertNotIn('expires_at', tokens[0])
+        seen = []
+        while tokens:
+            seen += [t['token_hash'] for t in tokens]
+            cursor = TokenStore.encode_cursor(sort_key=tokens[-1].get('expires_at'), row_id=tokens[-1]['token_id'])
+            tokens = self.store.get_tokens(limit=1, cursor=TokenStore.decode_cursor(cursor=cursor))
+        self.assertEqual(["never2", "never1", "expiring"], seen)
+
+    def test_token_state(self):
+        self.add(token_hash="hash", days=1)
+        self.assertEqual((2, self.now + timedelta(days=1)), self.store.get_token_state(token_hash="hash"))
+        self.store.update_token(token_hash="hash", state=4)
+        self.assertEqual(4, self.store.get_token_state(token_hash="hash")[0])
+        self.assertEqual([("hash", 4)], self.store.get_token_states())
+        self.assertIsNone(self.store.get_token_state(token_hash="missing"))
+        with self.assertRaises(Exception):
+            self.store.update_token(token_hash="missing", state=2)
+
+    def test_bulk_updates(self):
+        self.add(token_hash="a", days=1, project_id="p1")
+        self.add(token_hash="b", days=1, project_id="p1", state=4)
+        self.add(token_hash="c", days=1, project_id="p2")
+        self.add(token_hash="expired", days=-1, project_id="p2")
+        revoked = self.store.update_tokens_state(state=4, project_id="p1", states=[2])
+        self.assertEqual([{'token_hash': "a", 'user_id': "uuid", 'user_email': "user@example.org",
+                           'project_id': "p1", 'state': 4}], revoked)
+        with self.assertRaises(Exception):
+            self.store.remove_tokens()
+        self.assertEqual(["expired"], [t['token_hash'] for t in
+                                       self.store.remove_expired_tokens(expires=self.now, limit=10)])
+        self.assertEqual(["c"], [t['token_hash'] for t in self.store.remove_tokens(project_id="p2")])
+        self.store.remove_token(token_hash="b")
+        self.assertEqual(["a"], [t['token_hash'] for t in self.store.get_tokens(offset=None, limit=None)])
+
+    def test_llm_keys(self):
+        for i in range(3):
+            self.store.add_llm_key(user_id="uuid", user_email="user@example.org", llm_key_id=f"key{i}",
+                                   llm_key_name=None, api_key_hash=f"hash{i}", hash_version=2,
+                                   created_at=self.now + timedelta(minutes=i))
+        keys = self.store.get_llm_keys(user_email="user@example.org", limit=2)
+        self.assertEqual(["key2", "key1"], [k['llm_key_id'] for k in keys])
+        self.assertNotIn('llm_key_name', keys[0])
+        self.store.remove_llm_key(llm_key_id="key2")
+        self.assertEqual(["key1", "key0"], [k['llm_key_id'] for k in self.store.get_llm_keys()])
+
+
+class TestMemoryTokenStore(TokenStoreTests, unittest.TestCase):
+    def create_store(self) -> TokenStore:
+        return MemoryTokenStore()
+
+
+class TestSqliteTokenStore(TokenStoreTests, unittest.TestCase):
+    def create_store(self) -> TokenStore:
+        return SqliteTokenStore(path=":memory:")
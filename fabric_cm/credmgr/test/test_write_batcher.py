@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+import unittest
+
+from fabric_cm.db.write_batcher import WriteBatcher
+
+
+class Rows:
+    """
+    Stands in for DbApi.add_rows; rows with a duplicate key fail their whole transaction
+    """
+    def __init__(self):
+        self.rows = []
+        self.transactions = 0
+
+    def add_rows(self, *, rows):
+        self.transactions += 1
+        keys = [values['key'] for table, values in rows]
+        if len(set(keys)) != len(keys) or any(key in self.rows for key in keys):
+            raise ValueError("duplicate key")
+        self.rows.extend(keys)
+
+
+class TestWriteBatcher(unittest.TestCase):
+    """
+    Test Write Batcher
+    """
+    def add_concurrently(self, batcher: WriteBatcher, keys: list) -> list:
+        errors = []
+
+        def add(key):
+            try:
+                batcher.add(table='Tokens', values={'key': key})
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=add, args=(key,)) for key in keys]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return errors
+
+    def test_concurrent_rows_share_transactions(self):
+        db = Rows()
+        batcher = WriteBatcher(db=db, max_delay=0.5, max_batch_size=10)
+        batcher.start()
+        try:
+            self.assertEqual([], self.add_concurrently(batcher=batcher, keys=list(range(20))))
+        finally:
+            batcher.stop()
+        self.assertEqual(list(range(20)), sorted(db.rows))
+        self.assertLess(db.transactions, 20)
+
+    def test_failed_row_does_not_fail_batch(self):
+        db = Rows()
+        batcher = WriteBatcher(db=db, max_delay=0.5, max_batch_size=10)
+        batcher.start()
+        try:
+            errors = self.add_concurrently(batcher=batcher, keys=[1, 2, 3, 1])
+        finally:
+            batcher.stop()
+        self.assertEqual(1, len(errors))
+        self.assertEqual([1, 2, 3], sorted(db.rows))
+
+    def test_disabled_batcher_writes_directly(self):
+        db = Rows()
+        batcher = WriteBatcher(db=db, max_delay=0)
+        batcher.start()
+        self.assertIsNone(batcher.thread)
+        batcher.add(table='Tokens', values={'key': 1})
+        self.assertEqual([1], db.rows)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import os
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from fss_utils.jwt_manager import JWTManager, ValidateCode
+from jwt.algorithms import RSAAlgorithm
+
+
+class KeyRing:
+    """
+    Holds the public keys used to verify Fabric Identity Tokens, indexed by kid.
+
+    The key ring always contains the configured signing key. Additional keys (e.g. the next signing key
+    during a rotation or a retiring key whose tokens have not expired yet) are loaded from a directory
+    containing one PEM file per key, named <kid>.pem. The directory is re-scanned periodically so keys can
+    be added or removed without a restart. Each key is parsed once and kept as a ready-to-use key object.
+    """
+    ALG = "RS256"
+    KEY_FILE_SUFFIX = ".pem"
+
+    def __init__(self, *, kid: str, public_key_file: str, key_dir: str = None, refresh_period: int = 60,
+                 logger=None):
+        """
+        Constructor
+        @param kid kid of the signing key
+        @param public_key_file public key of the signing key
+        @param key_dir directory with additional public keys named <kid>.pem
+        @param refresh_period minimum interval in seconds between re-scans of the key files
+        @param logger logger
+        """
+        self.kid = kid
+        self.public_key_file = public_key_file
+        self.key_dir = key_dir
+        self.refresh_period = refresh_period
+        self.logger = logger
+        self.lock = threading.Lock()
+        self.last_refresh = 0
+        # kid -> (file, file signature, jwk, key)
+        self.keys = {}
+        self.refresh(force=True)
+        if self.kid not in self.keys:
+            raise KeyRingError(f"Unable to load signing key {self.kid} from {self.public_key_file}")
+
+    @staticmethod
+    def __get_file_signature(file_name: str) -> Tuple[float, int]:
+        stat = os.stat(file_name)
+        return stat.st_mtime, stat.st_size
+
+    def __get_key_files(self) -> Dict[str, str]:
+        key_files = {}
+        if self.key_dir is not None and os.path.isdir(self.key_dir):
+            for file_name in sorted(os.listdir(self.key_dir)):
+                if not file_name.endswith(self.KEY_FILE_SUFFIX):
+                    continue
+                key_files[file_name[:-len(self.KEY_FILE_SUFFIX)]] = os.path.join(self.key_dir, file_name)
+        # The configured signing key takes precedence over a file with the same kid in the directory
+        key_files[self.kid] = self.public_key_file
+        return key_files
+
+    def __load_key(self, *, kid: str, file_name: str) -> Tuple[dict, Any]:
+        code, jwk_or_exception = JWTManager.encode_jwk(key_file_name=file_name, kid=kid, alg=self.ALG)
+        if code != ValidateCode.VALID:
+            raise KeyRingError(f"Unable to load public key {kid} from {file_name}: {jwk_or_exception}")
+        return jwk_or_exception, RSAAlgorithm.from_jwk(jwk_or_exception)
+
+    def refresh(self, force: bool = False):
+        """
+        Reload key files that were added, modified or removed since the last refresh
+        @param force refresh even if the refresh period has not elapsed
+        """
+        now = time.monotonic()
+        if not force and now - self.last_refresh < self.refresh_period:
+            return
+
+        with self.lock:
+            if not force and now - self.last_refresh < self.refresh_period:
+                return
+            self.last_refresh = now
+
+            keys = {}
+            for kid, file_name in self.__get_key_files().items():
+                try:
+                    signature = self.__get_file_signature(file_name)
+                    current = self.keys.get(kid)
+                    if current is not None and current[0] == file_name and current[1] == signature:
+                        keys[kid] = current
+                        continue
+                    jwk, key = self.__load_key(kid=kid, file_name=file_name)
+                    keys[kid] = (file_name, signature, jwk, key)
+                    if self.logger is not None:
+                        self.logger.info(f"Loaded public key {kid} from {file_name}")
+                except Exception as e:
+                    # Keep serving a previously loaded version of the key if the file is being replaced
+                    if kid in self.keys:
+                        keys[kid] = self.keys[kid]
+                    if self.logger is not None:
+                        self.logger.error(f"Failed to load public key {kid} from {file_name}: {e}")
+
+            if self.logger is not None:
+                for kid in self.keys.keys() - keys.keys():
+                    self.logger.info(f"Removed public key {kid}")
+            self.keys = keys
+
+    def get_key(self, *, kid: str) -> Any:
+        """
+        Return the parsed public key for a kid
+        @param kid kid
+        @return public key or None if the kid is unknown
+        """
+        self.refresh()
+        entry = self.keys.get(kid)
+        return entry[3] if entry is not None else None
+
+    def get_kids(self) -> List[str]:
+        self.refresh()
+        return list(self.keys.keys())
+
+    def get_jwks(self) -> dict:
+        """
+        Return all public keys as a JWKS, signing key first
+        """
+        self.refresh()
+        keys = self.keys
+        jwks = [keys[self.kid][2]] if self.kid in keys else []
+        jwks.extend(entry[2] for kid, entry in keys.items() if kid != self.kid)
+        return {"keys": jwks}
+
+
+class KeyRingError(Exception):
+    """
+    Key Ring Exception
+    """
+    pass
@@ -25,7 +25,6 @@
 import re
 from datetime import datetime
 from dateutil import tz
-from fss_utils.jwt_manager import JWTManager, ValidateCode
 
 from fabric_cm.credmgr.common.utils import Utils
 from fabric_cm.credmgr.config import CONFIG_OBJ
@@ -33,6 +32,7 @@ from fabric_cm.credmgr.external_apis.ldap import CmLdapMgrSingleton
 from fabric_cm.credmgr.logging import LOG
 from fabric_cm.credmgr.common.exceptions import TokenError
 from fabric_cm.credmgr.external_apis.core_api import CoreApi
+from fabric_cm.credmgr.token.token_signer import TokenSigner
 
 
 class TokenEncoder:
@@ -75,13 +75,11 @@ class TokenEncoder:
         self.token = None
         self.unset = True
 
-    def encode(self, private_key: str, validity_in_seconds: int, kid: str, pass_phrase: str = None) -> str:
+    def encode(self, signer: TokenSigner, validity_in_seconds: int) -> str:
         """
         Generate Fabric Token by adding additional claims and signing with Fabric Cert
-        :param private_key Private Key to sign the fabric_cm token
+        :param signer Signer holding the Fabric private key
         :param validity_in_seconds Validity of the Token in seconds
-        :param kid Public Key Id
-        :param pass_phrase Pass Phrase for Private Key
         :return JWT String containing encoded Fabric Token
         """
         if self.encoded:
@@ -93,16 +91,12 @@ class TokenEncoder:
                 not self._validate_lifetime(validity=validity_in_seconds, project=self.claims[self.PROJECTS][0]):
             raise TokenError(f"User {self.claims[self.EMAIL]} is not authorized to create long lived tokens!")
 
-        code, token_or_exception = JWTManager.encode_and_sign_with_private_key(validity=validity_in_seconds,
-                                                                               claims=self.claims,
-                                                                               private_key_file_name=private_key,
-                                                                               pass_phrase=pass_phrase, kid=kid,
-                                                                               algorithm='RS256')
-        if code != ValidateCode.VALID:
-            LOG.error(f"Failed to encode the Fabric Token: {token_or_exception}")
-            raise token_or_exception
+        try:
+            self.token = signer.sign(claims=self.claims, validity=validity_in_seconds)
+        except Exception as e:
+            LOG.error(f"Failed to encode the Fabric Token: {e}")
+            raise e
 
-        self.token = token_or_exception
         self.encoded = True
         return self.token
 
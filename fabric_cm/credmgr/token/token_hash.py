@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import enum
+import hashlib
+import hmac
+from enum import Enum
+from typing import List
+
+
+class TokenHashScheme(Enum):
+    """
+    Fingerprint schemes used to derive the token hash stored in the database.
+    The value is persisted alongside each hash as its version tag.
+    """
+    Pbkdf2Sha256 = enum.auto()
+    HmacSha256 = enum.auto()
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def from_config(value: str) -> 'TokenHashScheme':
+        schemes = {'pbkdf2-sha256': TokenHashScheme.Pbkdf2Sha256,
+                   'hmac-sha256': TokenHashScheme.HmacSha256}
+        scheme = schemes.get(value.strip().lower())
+        if scheme is None:
+            raise ValueError(f"Unsupported token hash scheme: {value}; allowed values: {', '.join(schemes)}")
+        return scheme
+
+
+class TokenHasher:
+    """
+    Computes deterministic fingerprints for high-entropy tokens (Fabric Identity Tokens, LLM API keys).
+
+    Tokens are random and signed, so a keyed HMAC-SHA256 with the server secret is sufficient to make offline
+    guessing impractical if the database leaks. PBKDF2-HMAC-SHA256 with 100k iterations is retained only to
+    look up rows written before the scheme was versioned.
+    """
+    PBKDF2_ITERATIONS = 100_000
+
+    def __init__(self, *, secret: str, scheme: TokenHashScheme = TokenHashScheme.HmacSha256):
+        if not secret:
+            raise ValueError("Token hash secret must be specified")
+        self.secret = secret.encode('utf-8')
+        self.scheme = scheme
+
+    def get_scheme(self) -> TokenHashScheme:
+        return self.scheme
+
+    def get_legacy_schemes(self) -> List[TokenHashScheme]:
+        """
+        Schemes that may still be present in the database, cheapest first
+        """
+        return [s for s in reversed(TokenHashScheme) if s != self.scheme]
+
+    def hash(self, *, token: str, scheme: TokenHashScheme = None) -> str:
+        """
+        Generate the fingerprint for a token
+        @param token token string
+        @param scheme scheme to use; defaults to the configured scheme
+        @return 64 character hex digest
+        """
+        if scheme is None:
+            scheme = self.scheme
+        if scheme == TokenHashScheme.HmacSha256:
+            return hmac.new(self.secret, token.encode('utf-8'), hashlib.sha256).hexdigest()
+        if scheme == TokenHashScheme.Pbkdf2Sha256:
+            return hashlib.pbkdf2_hmac('sha256', token.encode('utf-8'), self.secret,
+                                       iterations=self.PBKDF2_ITERATIONS).hex()
+        raise ValueError(f"Unsupported token hash scheme: {scheme}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import time
+from typing import Any, Dict, Tuple
+
+import jwt
+import prometheus_client
+from cryptography.hazmat.primitives import serialization
+
+signing_latency = prometheus_client.Histogram('Token_Signing_Latency', 'Fabric Token signing latency in seconds',
+                                              buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1))
+
+# Private keys loaded in a crypto worker process, keyed by kid and PEM data
+_worker_keys: Dict[Tuple[str, bytes], Any] = {}
+
+
+def _sign_in_worker(*, kid: str, pem_data: bytes, pass_phrase: bytes, claims: dict,
+                    validity: int) -> Tuple[str, dict]:
+    """
+    Sign claims in a crypto worker process; each worker decrypts the private key once and keeps it.
+    The PEM data is the one the parent loaded, so workers started later never pick up a different key file
+    @return encoded JWT and the claims with iat and exp set
+    """
+    private_key = _worker_keys.get((kid, pem_data))
+    if private_key is None:
+        private_key = serialization.load_pem_private_key(data=pem_data, password=pass_phrase)
+        _worker_keys[(kid, pem_data)] = private_key
+    token = TokenSigner.encode(private_key=private_key, kid=kid, claims=claims, validity=validity)
+    return token, claims
+
+
+class TokenSigner:
+    """
+    Signs Fabric Identity Tokens with the Fabric private key.
+    The private key is read and decrypted once and kept in memory. It is not reloaded when the key file
+    changes: the key and its kid are rotated together by restarting, see Signing Key Rotation in the README.
+    """
+    ALG = "RS256"
+
+    def __init__(self, *, private_key_file: str, kid: str, pass_phrase: str = None, logger=None, executor=None):
+        """
+        Constructor
+        @param private_key_file private key file
+        @param kid kid of the corresponding public key
+        @param pass_phrase pass phrase for the private key
+        @param logger logger
+        @param executor optional CryptoExecutor; when enabled, signing runs in its worker processes
+        """
+        self.private_key_file = private_key_file
+        self.kid = kid
+        self.pass_phrase = pass_phrase.encode('utf-8') if pass_phrase else None
+        self.logger = logger
+        self.executor = executor
+        self.pem_data = None
+        self.private_key = self.__load_key()
+        if self.logger is not None:
+            self.logger.info(f"Loaded private key {self.kid} from {self.private_key_file}")
+
+    def __load_key(self) -> Any:
+        try:
+            with open(self.private_key_file, 'rb') as private_key_fh:
+                self.pem_data = private_key_fh.read()
+            return serialization.load_pem_private_key(data=self.pem_data, password=self.pass_phrase)
+        except Exception as e:
+            raise TokenSignerError(f"Unable to load private key from {self.private_key_file}: {e}")
+
+    def sign(self, *, claims: dict, validity: int) -> str:
+        """
+        Set the iat and exp claims and sign the claims
+        @param claims claims; updated in place with iat and exp
+        @param validity validity in seconds
+        @return encoded JWT
+        """
+        if self.executor is not None and self.executor.is_enabled():
+            with signing_latency.time():
+                token, signed_claims = self.executor.run(_sign_in_worker, kid=self.kid, pem_data=self.pem_data,
+                                                         pass_phrase=self.pass_phrase, claims=claims,
+                                                         validity=validity)
+            claims.update(signed_claims)
+            return token
+
+        with signing_latency.time():
+            return self.encode(private_key=self.private_key, kid=self.kid, claims=claims, validity=validity)
+
+    @staticmethod
+    def encode(*, private_key: Any, kid: str, claims: dict, validity: int) -> str:
+        now = int(time.time())
+        claims['iat'] = now
+        claims['exp'] = now + int(validity)
+        return jwt.encode(claims, private_key, algorithm=TokenSigner.ALG, headers={'kid': kid})
+
+
+class TokenSignerError(Exception):
+    """
+    Token Signer Exception
+    """
+    pass
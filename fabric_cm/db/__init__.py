@@ -26,7 +26,9 @@
 
 from sqlalchemy import TIMESTAMP
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, String, Integer, Sequence
+from sqlalchemy import Column, String, Integer, Sequence, Index
+
+from fabric_cm.db.types import CompactInteger, HexDigest
 
 Base = declarative_base()
 
@@ -38,16 +40,25 @@ class Tokens(Base):
     __tablename__ = 'Tokens'
     token_id = Column(Integer, Sequence('token_id', start=1, increment=1), autoincrement=True, primary_key=True)
     user_id = Column(String, nullable=False, index=True)
-    user_email = Column(String, nullable=False, index=True)
-    project_id = Column(String, nullable=False, index=True)
+    user_email = Column(String, nullable=False)
+    project_id = Column(String, nullable=False)
     comment = Column(String, nullable=False)
-    state = Column(Integer, nullable=False, index=True)
-    token_hash = Column(String, nullable=False, index=True)
+    state = Column(CompactInteger, nullable=False, index=True)
+    token_hash = Column(HexDigest, nullable=False)
+    hash_version = Column(Integer, nullable=False, server_default='1')
     created_from = Column(String, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=True)
     expires_at = Column(TIMESTAMP(timezone=True), nullable=True)
 
 
+# Indexes added after the table was first created must also be added by a migration in fabric_cm.db.migrations
+Index('ux_Tokens_token_hash', Tokens.token_hash, unique=True)
+# Token listings of a user, latest expiry first, paged by (expires_at, token_id)
+Index('ix_Tokens_user_email_expires_at', Tokens.user_email, Tokens.expires_at.desc(), Tokens.token_id.desc())
+# Revoke list of a project, answered from the index alone
+Index('ix_Tokens_project_id_state', Tokens.project_id, Tokens.state, postgresql_include=['token_hash'])
+
+
 class LlmKeys(Base):
     """
     Represents LLM API Keys Database Table
@@ -58,7 +69,8 @@ class LlmKeys(Base):
     user_email = Column(String, nullable=False, index=True)
     llm_key_id = Column(String, nullable=False, unique=True, index=True)
     llm_key_name = Column(String, nullable=True)
-    api_key_hash = Column(String, nullable=False, index=True)
+    api_key_hash = Column(HexDigest, nullable=False, index=True)
+    hash_version = Column(Integer, nullable=False, server_default='1')
     created_at = Column(TIMESTAMP(timezone=True), nullable=True)
     expires_at = Column(TIMESTAMP(timezone=True), nullable=True)
     comment = Column(String, nullable=True)
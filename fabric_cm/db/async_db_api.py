@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+#
+import itertools
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fabric_cm.db import queries
+from fabric_cm.db.db_api import DbApi
+from fabric_cm.db.instrumentation import InstrumentedAsyncQueuePool, instrument_engine, observe_latency
+from fabric_cm.db.types import enable_compact_schema
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+
+class AsyncDbApi:
+    """
+    Runs the token reads of the hot async routes (listing, revocation list and validation) over SQLAlchemy's
+    asyncio extension and asyncpg, so that those handlers await the database instead of holding a worker thread
+    each. It is not a TokenStore: writes, schema management, notification listeners and the token reaper stay
+    on DbApi, and both build their statements with the same queries module.
+    """
+    def __init__(self, *, user: str, password: str, database: str, db_host: str, logger,
+                 replica_hosts: List[str] = None, pool_size: int = 20, max_overflow: int = 10,
+                 pool_timeout: int = 30, slow_query_threshold: float = 0,
+                 compact_schema: bool = False):
+        """
+        Coroutines waiting for a connection are cheap, unlike threads, so concurrency is bounded by the pool rather
+        than by a thread pool: size it for what the database accepts from one process and let requests queue for up
+        to pool_timeout seconds
+        @param pool_size connections kept open per engine
+        @param max_overflow connections opened on top of pool_size under load
+        @param pool_timeout seconds to wait for a connection
+        @param slow_query_threshold seconds after which a query is logged; 0 disables the slow query log
+        @param compact_schema the schema was converted by DbApi with compact_schema
+        """
+        engine_args = dict(user=user, password=password, database=database, pool_size=pool_size,
+                           max_overflow=max_overflow, pool_timeout=pool_timeout,
+                           slow_query_threshold=slow_query_threshold, logger=logger, compact_schema=compact_schema)
+        self.db_engine = self.__create_engine(db_host=db_host, name="async-primary", **engine_args)
+        self.logger = logger
+        self.Session = async_sessionmaker(bind=self.db_engine, expire_on_commit=False)
+        # Read only queries are spread round robin over the replicas, if any
+        self.replica_engines = [self.__create_engine(db_host=h, name=f"async-replica{i}", **engine_args)
+                                for i, h in enumerate(replica_hosts or [])]
+        self.ReplicaSessions = [async_sessionmaker(bind=e, expire_on_commit=False) for e in self.replica_engines]
+        self.replica_counter = itertools.count()
+
+    @staticmethod
+    def __create_engine(*, user: str, password: str, database: str, db_host: str, name: str, pool_size: int,
+                        max_overflow: int, pool_timeout: int, slow_query_threshold: float, logger,
+                        compact_schema: bool):
+        db_url = DbApi.create_url(drivername="postgresql+asyncpg", user=user, password=password, database=database,
+                                  db_host=db_host)
+        engine = create_async_engine(
+            db_url,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            poolclass=InstrumentedAsyncQueuePool,
+            pool_logging_name=name,
+        )
+        instrument_engine(engine=engine.sync_engine, name=name, slow_query_threshold=slow_query_threshold,
+                          logger=logger)
+        if compact_schema:
+            enable_compact_schema(engine=engine.sync_engine)
+        return engine
+
+    def has_replicas(self) -> bool:
+        """
+        @return True if read only queries may be served by read replicas
+        """
+        return len(self.ReplicaSessions) > 0
+
+    def __get_read_session_factory(self) -> async_sessionmaker:
+        """
+        Pick the session factory for a read only query; see DbApi
+        """
+        if len(self.ReplicaSessions) == 0 or queries.is_read_from_primary():
+            return self.Session
+        return self.ReplicaSessions[next(self.replica_counter) % len(self.ReplicaSessions)]
+
+    @staticmethod
+    def read_from_primary():
+        """
+        Read from the primary within the block, e.g. when replica lag is not acceptable
+        @return context manager
+        """
+        return queries.read_from_primary()
+
+    async def dispose(self):
+        """
+        Close the pooled connections
+        """
+        for engine in [self.db_engine] + self.replica_engines:
+            await engine.dispose()
+
+    @observe_latency
+    async def get_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                         token_hash: str = None, expires: datetime = None, states: List[int] = None,
+                         offset: int = 0, limit: int = 5, cursor: Tuple[datetime, int] = None,
+                         columns: List[str] = None) -> List[dict]:
+        """
+        Get tokens ordered by expiry time, latest first; see DbApi.get_tokens
+        """
+        stmt = queries.select_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                     token_hash=token_hash, expires=expires, states=states, offset=offset,
+                                     limit=limit, cursor=cursor, columns=columns)
+        try:
+            async with self.__get_read_session_factory()() as session:
+                rows = await session.execute(stmt)
+                return [queries.generate_dict_from_row(row=row) for row in rows.mappings()]
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
+
+    @observe_latency
+    async def get_token_state(self, *, token_hash: str) -> Optional[Tuple[int, datetime]]:
+        """
+        Look up whether a token exists, selecting only what token validation needs
+        @param token_hash Token hash
+        @return tuple of state and expiry time; None if the token does not exist
+        """
+        try:
+            async with self.__get_read_session_factory()() as session:
+                row = (await session.execute(queries.select_token_state(token_hash=token_hash))).first()
+                return None if row is None else (row.state, row.expires_at)
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
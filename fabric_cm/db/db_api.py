@@ -23,42 +23,116 @@
 #
 #
 # Author: Komal Thareja (kthare10@renci.org)
-from datetime import datetime
-from typing import List
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Tuple
 
-from fabric_cm.db import Base, Tokens, LlmKeys
-from sqlalchemy import create_engine, desc
+from fabric_cm.db import Base, Tokens, LlmKeys, queries
+from fabric_cm.db.instrumentation import InstrumentedQueuePool, instrument_engine, observe_latency
+from fabric_cm.db.migrations import MIGRATIONS, Migration
+from fabric_cm.db.token_store import TokenStore
+from fabric_cm.db.types import enable_compact_schema, is_compact_schema
+from sqlalchemy import create_engine, delete, insert, select, text, update
 from sqlalchemy.engine import URL
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import scoped_session, sessionmaker
 
+# Session of the unit of work the current context runs in, if any
+_unit_of_work = ContextVar('unit_of_work', default=None)
 
-class DbApi:
+class DbApi(TokenStore):
     """
     Implements interface to Postgres database
     """
+    # Notification channel on which every change to the Tokens table is published
+    TOKENS_CHANNEL = 'credmgr_tokens'
+    # Advisory lock held while applying migrations
+    MIGRATION_LOCK_ID = 7237100
+    # Advisory lock namespace serializing inserts of the same token hash into a partitioned Tokens table
+    TOKEN_HASH_LOCK_ID = 7237101
+    # SQLSTATE raised when no partition accepts a row (check_violation)
+    NO_PARTITION_ERROR = '23514'
+    # Columns changed by the compact schema option: compact type and conversion, text type and conversion
+    COMPACT_COLUMNS = {
+        'Tokens': {
+            'token_hash': ('bytea', "decode(token_hash, 'hex')", 'varchar', "encode(token_hash, 'hex')"),
+            'state': ('smallint', 'state::smallint', 'integer', 'state::integer'),
+        },
+        'LlmKeys': {
+            'api_key_hash': ('bytea', "decode(api_key_hash, 'hex')", 'varchar', "encode(api_key_hash, 'hex')"),
+        },
+    }
 
-    def __init__(self, *, user: str, password: str, database: str, db_host: str, logger):
-        # Connecting to PostgreSQL server using psycopg2 DBAPI
+    def __init__(self, *, user: str, password: str, database: str, db_host: str, logger,
+                 replica_hosts: List[str] = None, pool_size: int = 10, max_overflow: int = 20,
+                 slow_query_threshold: float = 0, compact_schema: bool = False, pre_ping: bool = True):
+        """
+        @param pool_size connections kept open per engine
+        @param max_overflow connections opened on top of pool_size under load
+        @param slow_query_threshold seconds after which a query is logged; 0 disables the slow query log
+        @param compact_schema store token and API key hashes as bytea and token states as smallint
+        @param pre_ping test connections on checkout; disable when a PoolHealthChecker tests them in the background
+        """
+        engine_args = dict(user=user, password=password, database=database, pool_size=pool_size,
+                           max_overflow=max_overflow, slow_query_threshold=slow_query_threshold, logger=logger,
+                           compact_schema=compact_schema, pre_ping=pre_ping)
+        self.db_engine = self.__create_engine(db_host=db_host, name="primary", **engine_args)
+        self.logger = logger
+        self.session_factory = sessionmaker(bind=self.db_engine)
+        self.Session = scoped_session(self.session_factory)
+        # Read only queries are spread round robin over the replicas, if any
+        self.replica_engines = [self.__create_engine(db_host=h, name=f"replica{i}", **engine_args)
+                                for i, h in enumerate(replica_hosts or [])]
+        self.ReplicaSessions = [scoped_session(sessionmaker(bind=e)) for e in self.replica_engines]
+        self.replica_counter = itertools.count()
+        self.partitions = None
+        self.write_batcher = None
+
+    @staticmethod
+    def create_url(*, drivername: str, user: str, password: str, database: str, db_host: str) -> URL:
+        """
+        Build the URL of a database
+        @param drivername SQLAlchemy dialect and driver, e.g. postgresql+psycopg2
+        @param user user
+        @param password password
+        @param database database name
+        @param db_host host[:port]; port defaults to 5432
+        @return URL
+        """
         # Use URL.create() to safely handle special characters in credentials
         db_host_name = db_host.split(":")[0] if ":" in db_host else db_host
         db_port = int(db_host.split(":")[1]) if ":" in db_host else 5432
-        db_url = URL.create(
-            drivername="postgresql+psycopg2",
+        return URL.create(
+            drivername=drivername,
             username=user,
             password=password,
             host=db_host_name,
             port=db_port,
             database=database,
         )
-        self.db_engine = create_engine(
+
+    @staticmethod
+    def __create_engine(*, user: str, password: str, database: str, db_host: str, name: str, pool_size: int,
+                        max_overflow: int, slow_query_threshold: float, logger, compact_schema: bool,
+                        pre_ping: bool):
+        # Connecting to PostgreSQL server using psycopg2 DBAPI
+        db_url = DbApi.create_url(drivername="postgresql+psycopg2", user=user, password=password, database=database,
+                                  db_host=db_host)
+        engine = create_engine(
             db_url,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_pre_ping=pre_ping,
             pool_recycle=3600,
+            poolclass=InstrumentedQueuePool,
+            pool_logging_name=name,
         )
-        self.logger = logger
-        self.Session = scoped_session(sessionmaker(bind=self.db_engine))
+        instrument_engine(engine=engine, name=name, slow_query_threshold=slow_query_threshold, logger=logger)
+        if compact_schema:
+            enable_compact_schema(engine=engine)
+        return engine
 
     def get_session(self):
         return self.Session()
@@ -66,11 +140,223 @@ class DbApi:
     def remove_session(self):
         self.Session.remove()
 
+    def has_replicas(self) -> bool:
+        """
+        @return True if read only queries may be served by read replicas
+        """
+        return len(self.ReplicaSessions) > 0
+
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Run all DbApi calls within the block in one session and transaction on the primary, committed once when
+        the block exits and rolled back if it raises, e.g. for the several steps of minting a token.
+        Reads within the block see its uncommitted writes. A nested unit of work joins the outer one.
+        """
+        if _unit_of_work.get() is not None:
+            yield
+            return
+        session = self.session_factory()
+        reset_token = _unit_of_work.set(session)
+        try:
+            yield
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            _unit_of_work.reset(reset_token)
+            session.close()
+        queries.pin_reads_to_primary()
+
+    @contextmanager
+    def __write_session(self, *, savepoint: bool = False):
+        """
+        Session for a write: the session of the current unit of work, committed with the unit, or the thread's
+        session, committed when the block exits and rolled back if it raises
+        @param savepoint within a unit of work, roll back only the block's statements if it raises
+        """
+        session = _unit_of_work.get()
+        if session is not None:
+            if savepoint:
+                with session.begin_nested():
+                    yield session
+            else:
+                yield session
+            return
+
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self.remove_session()
+        queries.pin_reads_to_primary()
+
+    @contextmanager
+    def __read_session(self, *, primary: bool = False):
+        """
+        Session for a read only query: the session of the current unit of work, else a replica session; see
+        __get_read_session_factory
+        @param primary read from the primary even if replicas are configured
+        """
+        session = _unit_of_work.get()
+        if session is not None:
+            yield session
+            return
+
+        session_factory = self.Session if primary else self.__get_read_session_factory()
+        try:
+            yield session_factory()
+        finally:
+            session_factory.remove()
+
+    def __get_read_session_factory(self) -> scoped_session:
+        """
+        Pick the session factory for a read only query: a replica, unless none is configured or the current
+        context wrote to the primary and must see its own writes
+        """
+        if len(self.ReplicaSessions) == 0 or queries.is_read_from_primary():
+            return self.Session
+        return self.ReplicaSessions[next(self.replica_counter) % len(self.ReplicaSessions)]
+
+    @staticmethod
+    def read_from_primary():
+        """
+        Read from the primary within the block, e.g. when replica lag is not acceptable
+        @return context manager
+        """
+        return queries.read_from_primary()
+
     def create_db(self):
         """
-        Create the database
+        Create the database and apply pending migrations
         """
         Base.metadata.create_all(self.db_engine)
+        self.migrate()
+        self.__setup_compact_schema()
+        if self.partitions is not None:
+            self.partitions.setup()
+
+    def __setup_compact_schema(self):
+        """
+        Convert the hash and state columns to the storage selected by the compact schema option, in either direction.
+        The tables are rewritten while locked, so on a large table run this at deploy time, see fabric_cm.db.migrate.
+        """
+        compact = is_compact_schema(self.db_engine.dialect)
+        with self.db_engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': self.MIGRATION_LOCK_ID})
+            for table, columns in self.COMPACT_COLUMNS.items():
+                changes = []
+                for column, (compact_type, compact_using, plain_type, plain_using) in columns.items():
+                    data_type = conn.execute(text("SELECT data_type FROM information_schema.columns "
+                                                  "WHERE table_schema = current_schema() AND table_name = :table "
+                                                  "AND column_name = :column"),
+                                             {'table': table, 'column': column}).scalar()
+                    if compact and data_type != compact_type:
+                        changes.append(f'ALTER COLUMN {column} TYPE {compact_type} USING {compact_using}')
+                    elif not compact and data_type == compact_type:
+                        changes.append(f'ALTER COLUMN {column} TYPE {plain_type} USING {plain_using}')
+                if len(changes) > 0:
+                    # One statement so that the table is rewritten once
+                    self.logger.info(f"Converting {table} to the {'compact' if compact else 'text'} schema")
+                    conn.execute(text(f'ALTER TABLE "{table}" {", ".join(changes)}'))
+
+    def set_token_partitions(self, partitions):
+        """
+        Enable monthly partitioning of the Tokens table
+        @param partitions TokenPartitions
+        """
+        self.partitions = partitions
+
+    def set_write_batcher(self, write_batcher):
+        """
+        Group the inserts of concurrent requests into shared transactions
+        @param write_batcher WriteBatcher
+        """
+        self.write_batcher = write_batcher
+
+    def migrate(self) -> List[int]:
+        """
+        Apply pending schema migrations in version order. An advisory lock serializes instances started together.
+        @return versions applied
+        """
+        applied = []
+        with self.db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:lock_id)"), {'lock_id': self.MIGRATION_LOCK_ID})
+            try:
+                lock_conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, "
+                                       "description VARCHAR NOT NULL, applied_at TIMESTAMPTZ NOT NULL DEFAULT now())"))
+                versions = set(lock_conn.execute(text("SELECT version FROM schema_version")).scalars())
+
+                for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                    if migration.version in versions:
+                        continue
+                    self.logger.info(f"Applying migration {migration.version}: {migration.description}")
+                    if migration.transactional:
+                        with self.db_engine.begin() as conn:
+                            migration.upgrade(conn=conn)
+                            self.__record_migration(conn=conn, migration=migration)
+                    else:
+                        with self.db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                            migration.upgrade(conn=conn)
+                            self.__record_migration(conn=conn, migration=migration)
+                    applied.append(migration.version)
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:lock_id)"), {'lock_id': self.MIGRATION_LOCK_ID})
+        return applied
+
+    def get_schema_version(self) -> int:
+        """
+        @return highest applied migration version; 0 if none
+        """
+        with self.db_engine.connect() as conn:
+            return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+    @staticmethod
+    def __record_migration(*, conn, migration: Migration):
+        conn.execute(text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                     {'version': migration.version, 'description': migration.description})
+
+    def __notify_token_change(self, *, session, token_hash: str, state: int = None):
+        """
+        Publish a token change on TOKENS_CHANNEL; Postgres delivers it to the listeners when the transaction commits
+        @param session session in which the token was changed
+        @param token_hash token hash; None if all tokens were removed
+        @param state new token state; None if the token was removed
+        """
+        self.__notify_token_changes(session=session, changes=[(token_hash, state)])
+
+    def __notify_token_changes(self, *, session, changes: List[Tuple[str, int]]):
+        """
+        Publish several token changes on TOKENS_CHANNEL with a single statement
+        @param session session in which the tokens were changed
+        @param changes list of token hash and new state tuples; state is None for removed tokens
+        """
+        if len(changes) == 0:
+            return
+        session.execute(queries.notify_token_changes(channel=self.TOKENS_CHANNEL, changes=changes))
+
+    def listen(self, *, channel: str):
+        """
+        Open a dedicated connection, outside the pool, listening on a notification channel
+        @param channel notification channel
+        @return psycopg2 connection in autocommit mode; the caller is responsible for closing it
+        """
+        conn = self.db_engine.raw_connection()
+        dbapi_conn = conn.driver_connection
+        conn.detach()
+        try:
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{channel}"')
+        except Exception:
+            dbapi_conn.close()
+            raise
+        return dbapi_conn
 
     def set_logger(self, logger):
         """
@@ -82,19 +368,17 @@ class DbApi:
         """
         Reset the database
         """
-        session = self.get_session()
         try:
-            session.query(Tokens).delete()
-            session.commit()
+            with self.__write_session() as session:
+                session.query(Tokens).delete()
+                self.__notify_token_change(session=session, token_hash=None)
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
 
+    @observe_latency
     def add_token(self, *, user_id: str, user_email: str, project_id: str, created_from: str, state: int,
-                  token_hash: str, created_at: datetime, expires_at: datetime, comment: str):
+                  token_hash: str, hash_version: int, created_at: datetime, expires_at: datetime, comment: str):
         """
         Add a token
         @param user_id User ID
@@ -103,130 +387,257 @@ class DbApi:
         @param created_from Remote IP Address
         @param state Token State
         @param token_hash Token hash
+        @param hash_version Scheme used to compute the token hash
         @param created_at creation time of the token
         @param expires_at expiration time of the token
         @param comment comment describing when token was created
         """
-        session = self.get_session()
+        values = dict(user_id=user_id, user_email=user_email, project_id=project_id, created_from=created_from,
+                      state=state, token_hash=token_hash, hash_version=hash_version, created_at=created_at,
+                      expires_at=expires_at, comment=comment)
+        self.__add_row(table=Tokens, values=values)
+
+    def __add_row(self, *, table, values: dict):
+        """
+        Insert a row, through the write batcher if enabled, unless in a unit of work, which commits on its own
+        """
+        if self.write_batcher is not None and _unit_of_work.get() is None:
+            self.write_batcher.add(table=table, values=values)
+        else:
+            self.add_rows(rows=[(table, values)])
+
+    @observe_latency
+    def add_rows(self, *, rows: List[Tuple[Any, dict]]):
+        """
+        Insert rows into several tables in one transaction, with a single multi-row INSERT per table
+        @param rows list of mapped class and column values tuples, e.g. (Tokens, {'token_hash': ...})
+        """
         try:
-            # Save the token in the database
-            token_obj = Tokens(user_id=user_id, user_email=user_email, project_id=project_id,
-                               created_from=created_from, state=state, token_hash=token_hash,
-                               expires_at=expires_at, created_at=created_at, comment=comment)
-            session.add(token_obj)
-            session.commit()
+            try:
+                self.__insert_rows(rows=rows)
+            except IntegrityError as e:
+                # No partition yet for a token expiring beyond the months created ahead
+                if self.partitions is None or getattr(e.orig, 'pgcode', None) != self.NO_PARTITION_ERROR:
+                    raise e
+                # Within a unit of work, create it in the unit's transaction, which already locks the table
+                unit_of_work = _unit_of_work.get()
+                for expires_at in {values['expires_at'] for table, values in rows if table is Tokens}:
+                    self.partitions.ensure_partition(expires_at=expires_at,
+                                                     conn=unit_of_work.connection() if unit_of_work is not None
+                                                     else None)
+                self.__insert_rows(rows=rows)
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
 
+    def __insert_rows(self, *, rows: List[Tuple[Any, dict]]):
+        tables = {}
+        for table, values in rows:
+            tables.setdefault(table, []).append(values)
+        # Within a unit of work, a savepoint keeps a missing partition from aborting the unit's transaction
+        with self.__write_session(savepoint=self.partitions is not None) as session:
+            if self.partitions is not None and Tokens in tables:
+                self.__check_unique_token_hashes(session=session,
+                                                 token_hashes=[values['token_hash'] for values in tables[Tokens]])
+            for table, values in tables.items():
+                session.execute(insert(table), values)
+            self.__notify_token_changes(session=session, changes=[(values['token_hash'], values['state'])
+                                                                  for values in tables.get(Tokens, [])])
+
+    def __check_unique_token_hashes(self, *, session, token_hashes: List[str]):
+        """
+        A partitioned Tokens table cannot have a unique index on token_hash, so uniqueness is enforced here. The
+        advisory lock taken per hash, held until the transaction ends, keeps concurrent inserts of the same hash
+        from both passing the check.
+        @param session session of the insert
+        @param token_hashes hashes of the tokens about to be inserted
+        @raises Exception if a token hash is repeated or already stored
+        """
+        unique_hashes = sorted(set(token_hashes))
+        if len(unique_hashes) < len(token_hashes):
+            raise Exception(f"Token hashes repeated in one insert: {token_hashes}")
+        # Locks are taken in a stable order so that concurrent inserts cannot deadlock
+        for token_hash in unique_hashes:
+            session.execute(text("SELECT pg_advisory_xact_lock(:lock_id, hashtext(:token_hash))"),
+                            {'lock_id': self.TOKEN_HASH_LOCK_ID, 'token_hash': token_hash})
+        existing = session.execute(select(Tokens.token_hash).where(Tokens.token_hash.in_(unique_hashes))
+                                   .limit(1)).scalar()
+        if existing is not None:
+            raise Exception(f"Token #{existing} already exists!")
+
+    @observe_latency
     def update_token(self, *, token_hash: str, state: int):
         """
         Update token
         @param token_hash token_hash
         @param state Token State
         """
-        session = self.get_session()
         try:
-            token = session.query(Tokens).filter_by(token_hash=token_hash).one_or_none()
-            if token is not None:
-                token.state = state
-            else:
-                raise Exception(f"Token #{token_hash} not found!")
-            session.commit()
+            with self.__write_session() as session:
+                rows = session.execute(update(Tokens).where(Tokens.token_hash == token_hash).values(state=state).
+                                       returning(Tokens.token_id), execution_options={'synchronize_session': False})
+                if len(rows.all()) == 0:
+                    raise Exception(f"Token #{token_hash} not found!")
+                self.__notify_token_change(session=session, token_hash=token_hash, state=state)
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
 
+    @observe_latency
     def remove_token(self, *, token_hash: str):
         """
         Remove a token
         @param token_hash token hash
         """
-        session = self.get_session()
         try:
-            # Delete the actor in the database
-            session.query(Tokens).filter_by(token_hash=token_hash).delete()
-            session.commit()
+            with self.__write_session() as session:
+                # Delete the actor in the database
+                session.query(Tokens).filter_by(token_hash=token_hash).delete()
+                self.__notify_token_change(session=session, token_hash=token_hash)
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
 
+    @observe_latency
+    def update_tokens_state(self, *, state: int, user_id: str = None, user_email: str = None,
+                            project_id: str = None, token_hashes: List[str] = None,
+                            states: List[int] = None) -> List[dict]:
+        """
+        Update the state of all tokens matching the filters with a single UPDATE ... RETURNING,
+        e.g. to revoke all tokens of a user or a project
+        @param state new Token State
+        @param user_id User Id
+        @param user_email User's email
+        @param project_id Project Id
+        @param token_hashes list of token hashes
+        @param states only update tokens currently in one of these states
+        @return list of updated tokens with their token hash, user id, user email, project id and state
+        """
+        clauses = queries.create_token_clauses(user_id=user_id, user_email=user_email, project_id=project_id,
+                                               token_hashes=token_hashes, states=states)
+        try:
+            with self.__write_session() as session:
+                rows = session.execute(queries.update_tokens_state(state=state, clauses=clauses),
+                                       execution_options={'synchronize_session': False}).all()
+                result = [row._asdict() for row in rows]
+                self.__notify_token_changes(session=session, changes=[(t['token_hash'], state) for t in result])
+                return result
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
+
+    @observe_latency
+    def remove_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                      token_hashes: List[str] = None) -> List[dict]:
+        """
+        Remove all tokens matching the filters with a single DELETE ... RETURNING
+        @param user_id User Id
+        @param user_email User's email
+        @param project_id Project Id
+        @param token_hashes list of token hashes
+        @return list of removed tokens with their token hash, user id, user email, project id and state
+        """
+        clauses = queries.create_token_clauses(user_id=user_id, user_email=user_email, project_id=project_id,
+                                               token_hashes=token_hashes)
+        try:
+            with self.__write_session() as session:
+                rows = session.execute(queries.delete_tokens(clauses=clauses),
+                                       execution_options={'synchronize_session': False}).all()
+                result = [row._asdict() for row in rows]
+                self.__notify_token_changes(session=session, changes=[(t['token_hash'], None) for t in result])
+                return result
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
+
+    @observe_latency
+    def remove_expired_tokens(self, *, expires: datetime, limit: int) -> List[dict]:
+        """
+        Remove a batch of tokens that expired before the given time with a single DELETE ... RETURNING.
+        Rows locked by other transactions are skipped, so several replicas can reap concurrently.
+        @param expires expiration time
+        @param limit maximum number of tokens to remove
+        @return list of removed tokens with their token hash, user id, user email and project id
+        """
+        try:
+            with self.__write_session() as session:
+                expired = select(Tokens.token_id).where(Tokens.expires_at < expires).limit(limit).\
+                    with_for_update(skip_locked=True)
+                rows = session.execute(delete(Tokens).where(Tokens.token_id.in_(expired)).returning(
+                    Tokens.token_hash, Tokens.user_id, Tokens.user_email, Tokens.project_id),
+                    execution_options={'synchronize_session': False}).all()
+                result = [row._asdict() for row in rows]
+                self.__notify_token_changes(session=session, changes=[(t['token_hash'], None) for t in result])
+                return result
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
+
+    @observe_latency
     def get_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
                    token_hash: str = None, expires: datetime = None, states: List[int] = None,
-                   offset: int = 0, limit: int = 5) -> list:
+                   offset: int = 0, limit: int = 5, cursor: Tuple[datetime, int] = None,
+                   columns: List[str] = None) -> List[dict]:
         """
-        Get tokens
+        Get tokens ordered by expiry time, latest first
         @param user_id      User Id
         @param user_email   User's email
         @param project_id   Project Id
         @param token_hash   Token hash
         @param expires      Expiration Time
         @param states       list of states
-        @param offset       offset
+        @param offset       offset; ignored when a cursor is specified
         @param limit        limit
-        @return list of tokens
+        @param cursor       (expires_at, token_id) of the last token of the previous page
+        @param columns      names of the columns to select; all columns if not specified
+        @return list of tokens; NULL columns are left out
         """
         result = []
-        session = self.get_session()
         try:
-            filter_dict = self.__create_token_filter(user_id=user_id, project_id=project_id, user_email=user_email,
-                                                     token_hash=token_hash)
-
-            rows = session.query(Tokens).filter_by(**filter_dict)
-
-            if expires is not None:
-                rows = rows.filter(Tokens.expires_at < expires)
-
-            if states is not None:
-                rows = rows.filter(Tokens.state.in_(states))
-
-            rows = rows.order_by(desc(Tokens.expires_at))
-
-            if offset is not None and limit is not None:
-                rows = rows.offset(offset).limit(limit)
-
-            for row in rows.all():
-                result.append(self.__generate_dict_from_row(row=row))
+            with self.__read_session() as session:
+                stmt = queries.select_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                             token_hash=token_hash, expires=expires, states=states, offset=offset,
+                                             limit=limit, cursor=cursor, columns=columns)
+                for row in session.execute(stmt).mappings():
+                    result.append(queries.generate_dict_from_row(row=row))
         except Exception as e:
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
         return result
 
-    @staticmethod
-    def __create_token_filter(*, user_id: str, user_email: str, project_id: str, token_hash: str) -> dict:
-
-        filter_dict = {}
-        if user_id is not None:
-            filter_dict['user_id'] = user_id
-        if user_email is not None:
-            filter_dict['user_email'] = str(user_email)
-        if project_id is not None:
-            filter_dict['project_id'] = str(project_id)
-        if token_hash is not None:
-            filter_dict['token_hash'] = token_hash
-        return filter_dict
+    @observe_latency
+    def get_token_state(self, *, token_hash: str) -> Optional[Tuple[int, datetime]]:
+        """
+        Look up whether a token exists, selecting only what token validation needs
+        @param token_hash Token hash
+        @return tuple of state and expiry time; None if the token does not exist
+        """
+        try:
+            with self.__read_session() as session:
+                row = session.execute(queries.select_token_state(token_hash=token_hash)).first()
+                return None if row is None else (row.state, row.expires_at)
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
 
-    @staticmethod
-    def __generate_dict_from_row(row):
-        d = row.__dict__.copy()
-        for k in row.__dict__:
-            if d[k] is None:
-                d.pop(k)
-        return d
+    @observe_latency
+    def get_token_states(self) -> List[Tuple[str, int]]:
+        """
+        Get the state of every token that has not expired; always read from the primary so that the snapshot is
+        not older than the notifications that follow it
+        @return list of token hash and state tuples
+        """
+        try:
+            with self.__read_session(primary=True) as session:
+                rows = session.execute(queries.select_token_states(now=datetime.now(timezone.utc)))
+                return [(row.token_hash, row.state) for row in rows.all()]
+        except Exception as e:
+            self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
 
+    @observe_latency
     def add_llm_key(self, *, user_id: str, user_email: str, llm_key_id: str,
-                    llm_key_name: str, api_key_hash: str,
+                    llm_key_name: str, api_key_hash: str, hash_version: int,
                     created_at: datetime, expires_at: datetime = None, comment: str = None):
         """
         Add an LLM key record
@@ -234,71 +645,52 @@ class DbApi:
         @param user_email User Email
         @param llm_key_id Key identifier from LLM proxy
         @param llm_key_name Human-readable key alias
-        @param api_key_hash SHA256 hash of the API key
+        @param api_key_hash Hash of the API key
+        @param hash_version Scheme used to compute the API key hash
         @param created_at Creation time
         @param expires_at Expiration time
         @param comment Comment
         """
-        session = self.get_session()
-        try:
-            key_obj = LlmKeys(user_id=user_id, user_email=user_email, llm_key_id=llm_key_id,
-                               llm_key_name=llm_key_name, api_key_hash=api_key_hash,
-                               created_at=created_at, expires_at=expires_at, comment=comment)
-            session.add(key_obj)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            self.logger.error(f"Exception occurred: {e}", stack_info=True)
-            raise e
-        finally:
-            self.remove_session()
+        self.__add_row(table=LlmKeys, values=dict(user_id=user_id, user_email=user_email, llm_key_id=llm_key_id,
+                                                  llm_key_name=llm_key_name, api_key_hash=api_key_hash,
+                                                  hash_version=hash_version, created_at=created_at,
+                                                  expires_at=expires_at, comment=comment))
 
+    @observe_latency
     def get_llm_keys(self, *, user_email: str = None, llm_key_id: str = None,
-                     offset: int = 0, limit: int = 200) -> list:
+                     offset: int = 0, limit: int = 200, cursor: Tuple[datetime, int] = None,
+                     columns: List[str] = None) -> List[dict]:
         """
         Get LLM keys
         @param user_email User's email
         @param llm_key_id LLM key identifier
-        @param offset offset
+        @param offset offset; ignored when a cursor is specified
         @param limit limit
-        @return list of LLM key records
+        @param cursor (created_at, id) of the last key of the previous page
+        @param columns names of the columns to select; all columns if not specified
+        @return list of LLM key records; NULL columns are left out
         """
         result = []
-        session = self.get_session()
         try:
-            filter_dict = {}
-            if user_email is not None:
-                filter_dict['user_email'] = user_email
-            if llm_key_id is not None:
-                filter_dict['llm_key_id'] = llm_key_id
-
-            rows = session.query(LlmKeys).filter_by(**filter_dict)
-            rows = rows.order_by(desc(LlmKeys.created_at))
-
-            if offset is not None and limit is not None:
-                rows = rows.offset(offset).limit(limit)
-
-            for row in rows.all():
-                result.append(self.__generate_dict_from_row(row=row))
+            with self.__read_session() as session:
+                stmt = queries.select_llm_keys(user_email=user_email, llm_key_id=llm_key_id, offset=offset, limit=limit,
+                                               cursor=cursor, columns=columns)
+                for row in session.execute(stmt).mappings():
+                    result.append(queries.generate_dict_from_row(row=row))
         except Exception as e:
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
         return result
 
+    @observe_latency
     def remove_llm_key(self, *, llm_key_id: str):
         """
         Remove an LLM key record
         @param llm_key_id LLM key identifier
         """
-        session = self.get_session()
         try:
-            session.query(LlmKeys).filter_by(llm_key_id=llm_key_id).delete()
-            session.commit()
+            with self.__write_session() as session:
+                session.query(LlmKeys).filter_by(llm_key_id=llm_key_id).delete()
         except Exception as e:
-            session.rollback()
             self.logger.error(f"Exception occurred: {e}", stack_info=True)
             raise e
-        finally:
-            self.remove_session()
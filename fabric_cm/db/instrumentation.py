@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import prometheus_client
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+pool_checkouts = prometheus_client.Counter('DB_Pool_Checkouts', 'Connections checked out of the pool', ['pool'])
+pool_checkout_wait = prometheus_client.Histogram('DB_Pool_Checkout_Wait',
+                                                 'Seconds taken to obtain a connection from the pool', ['pool'],
+                                                 buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1, 5, 30))
+pool_checked_out = prometheus_client.Gauge('DB_Pool_Checked_Out', 'Connections currently checked out of the pool',
+                                           ['pool'])
+pool_overflow = prometheus_client.Gauge('DB_Pool_Overflow', 'Connections currently open beyond pool_size', ['pool'])
+pool_invalidations = prometheus_client.Counter('DB_Pool_Invalidations',
+                                               'Pooled connections invalidated, e.g. after a disconnect', ['pool'])
+pool_disconnects = prometheus_client.Counter('DB_Pool_Disconnects',
+                                             'Queries failed by a lost connection; each invalidates the whole pool',
+                                             ['pool'])
+operation_latency = prometheus_client.Histogram('DB_Operation_Latency', 'Latency of database operations in seconds',
+                                                ['operation'],
+                                                buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 5))
+# Token inserts queued to the WriteBatcher run later on its thread and are not counted for the request
+queries_per_request = prometheus_client.Histogram('DB_Queries_Per_Request', 'Database queries run by a request',
+                                                  ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+
+# Number of queries run so far by the current request, if counted
+_query_counter = ContextVar('query_counter', default=None)
+# Set while the pool is used for housekeeping, e.g. background pings, that must not skew the checkout metrics
+_housekeeping = ContextVar('housekeeping', default=False)
+
+
+class QueryCounter:
+    """
+    Queries run by a request; shared by the copies of the request's context
+    """
+    def __init__(self):
+        self.count = 0
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the queries run within the block, including by the request handler it awaits
+    @return QueryCounter
+    """
+    counter = QueryCounter()
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+@contextmanager
+def housekeeping():
+    """
+    Leave the connections checked out within the block out of the checkout metrics
+    """
+    token = _housekeeping.set(True)
+    try:
+        yield
+    finally:
+        _housekeeping.reset(token)
+
+
+class _TimedCheckout:
+    """
+    Records the time taken by the public Pool.connect(), through which the engine obtains every connection: the
+    wait for a free connection, opening a new one and the checkout events such as the pre-ping. The pool events
+    only fire once a connection was obtained, so they cannot measure the wait.
+    """
+    def connect(self):
+        if _housekeeping.get():
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            pool_checkout_wait.labels(self.logging_name).observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(*, engine, name: str, slow_query_threshold: float = 0, logger=None):
+    """
+    Publish the pool metrics of an engine, count its queries and log the slow ones. The engine must be created with
+    poolclass InstrumentedQueuePool (or InstrumentedAsyncQueuePool) and pool_logging_name set to name.
+    Queries are counted for the request whose context runs them; the inserts of the WriteBatcher are not
+    @param engine Engine; the sync_engine of an AsyncEngine
+    @param name name of the pool in the metrics
+    @param slow_query_threshold seconds after which a query is logged; 0 disables the slow query log
+    @param logger logger
+    """
+    # Read the pool through the engine, which replaces it when disposed
+    pool_checked_out.labels(name).set_function(lambda: engine.pool.checkedout())
+    pool_overflow.labels(name).set_function(lambda: max(0, engine.pool.overflow()))
+
+    @event.listens_for(engine.pool, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        if not _housekeeping.get():
+            pool_checkouts.labels(name).inc()
+
+    @event.listens_for(engine.pool, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_invalidations.labels(name).inc()
+
+    @event.listens_for(engine, 'handle_error')
+    def on_error(context):
+        if context.is_disconnect:
+            pool_disconnects.labels(name).inc()
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter = _query_counter.get()
+        if counter is not None:
+            counter.count += 1
+        if context is not None:
+            context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if slow_query_threshold <= 0 or logger is None or not hasattr(context, 'query_start'):
+            return
+        elapsed = time.perf_counter() - context.query_start
+        if elapsed >= slow_query_threshold:
+            # Parameters are left out, they include token hashes
+            logger.warning(f"Slow query on {name} ({elapsed * 1000:.0f} ms): {' '.join(statement.split())}")
+
+
+def observe_latency(func):
+    """
+    Record the latency of a database operation, labelled with the class and method name, in DB_Operation_Latency
+    """
+    latency = operation_latency.labels(func.__qualname__)
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def timed_coroutine(*args, **kwargs):
+            with latency.time():
+                return await func(*args, **kwargs)
+        return timed_coroutine
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        with latency.time():
+            return func(*args, **kwargs)
+    return timed
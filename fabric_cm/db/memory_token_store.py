@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import itertools
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from fabric_cm.db import Tokens, LlmKeys
+from fabric_cm.db.token_store import TokenStore
+
+TOKEN_SUMMARY = ['token_hash', 'user_id', 'user_email', 'project_id', 'state']
+# Stands in for NULL sort keys, which come first when ordering latest first as in Postgres
+NULL_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+class MemoryTokenStore(TokenStore):
+    """
+    Keeps tokens and LLM keys in process memory; they are lost on restart.
+    Meant for tests, benchmarks and profiling the layers above the database.
+    """
+    def __init__(self, *, logger=None):
+        self.logger = logger
+        # Guards every call; units of work hold it for their whole block
+        self.lock = threading.RLock()
+        self.tokens = {}
+        self.llm_keys = []
+        self.token_ids = itertools.count(1)
+        self.llm_key_ids = itertools.count(1)
+
+    @contextmanager
+    def unit_of_work(self):
+        with self.lock:
+            yield
+
+    @staticmethod
+    def __project(*, row: dict, table, columns: List[str] = None) -> dict:
+        """
+        Select columns of a row like DbApi does, leaving out NULL ones
+        @raises KeyError for an unknown column name
+        """
+        names = table.__table__.columns.keys() if columns is None else \
+            [table.__table__.columns[c].name for c in columns]
+        return {name: row[name] for name in names if row.get(name) is not None}
+
+    @staticmethod
+    def __page(*, rows: List[dict], sort_key: str, row_id: str, offset: int, limit: int,
+               cursor: Tuple[datetime, int]) -> List[dict]:
+        """
+        Order rows latest first and cut the requested page
+        """
+        rows = sorted(rows, key=lambda r: (r[sort_key] is None, r[sort_key] or NULL_TIME, r[row_id]), reverse=True)
+        if cursor is not None:
+            # Rows with a NULL sort key come first
+            if cursor[0] is None:
+                rows = [r for r in rows if r[sort_key] is not None or r[row_id] < cursor[1]]
+            else:
+                rows = [r for r in rows if r[sort_key] is not None and (r[sort_key], r[row_id]) < tuple(cursor)]
+        elif offset is not None:
+            rows = rows[offset:]
+        return rows if limit is None else rows[:limit]
+
+    def __filter_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                        token_hashes: List[str] = None, states: List[int] = None) -> List[dict]:
+        filters = {'user_id': user_id, 'user_email': user_email, 'project_id': project_id}
+        rows = self.tokens.values() if token_hashes is None else \
+            [self.tokens[h] for h in dict.fromkeys(token_hashes) if h in self.tokens]
+        return [r for r in rows if all(v is None or r[k] == v for k, v in filters.items()) and
+                (states is None or r['state'] in states)]
+
+    @staticmethod
+    def __check_filters(*, user_id: str, user_email: str, project_id: str, token_hashes: List[str]):
+        if user_id is None and user_email is None and project_id is None and token_hashes is None:
+            raise Exception("User Id/Email, Project Id or Token Hashes required")
+
+    def add_token(self, *, user_id: str, user_email: str, project_id: str, created_from: str, state: int,
+                  token_hash: str, hash_version: int, created_at: datetime, expires_at: datetime, comment: str):
+        with self.lock:
+            if token_hash in self.tokens:
+                raise Exception(f"Token #{token_hash} already exists!")
+            self.tokens[token_hash] = dict(token_id=next(self.token_ids), user_id=user_id, user_email=user_email,
+                                           project_id=project_id, comment=comment, state=state,
+                                           token_hash=token_hash, hash_version=hash_version,
+                                           created_from=created_from, created_at=created_at, expires_at=expires_at)
+
+    def update_token(self, *, token_hash: str, state: int):
+        with self.lock:
+            if token_hash not in self.tokens:
+                raise Exception(f"Token #{token_hash} not found!")
+            self.tokens[token_hash]['state'] = state
+
+    def remove_token(self, *, token_hash: str):
+        with self.lock:
+            self.tokens.pop(token_hash, None)
+
+    def update_tokens_state(self, *, state: int, user_id: str = None, user_email: str = None,
+                            project_id: str = None, token_hashes: List[str] = None,
+                            states: List[int] = None) -> List[dict]:
+        self.__check_filters(user_id=user_id, user_email=user_email, project_id=project_id,
+                             token_hashes=token_hashes)
+        with self.lock:
+            result = []
+            for token in self.__filter_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                              token_hashes=token_hashes, states=states):
+                token['state'] = state
+                result.append({k: token[k] for k in TOKEN_SUMMARY})
+            return result
+
+    def remove_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                      token_hashes: List[str] = None) -> List[dict]:
+        self.__check_filters(user_id=user_id, user_email=user_email, project_id=project_id,
+                             token_hashes=token_hashes)
+        with self.lock:
+            tokens = self.__filter_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                          token_hashes=token_hashes)
+            for token in tokens:
+                del self.tokens[token['token_hash']]
+            return [{k: token[k] for k in TOKEN_SUMMARY} for token in tokens]
+
+    def remove_expired_tokens(self, *, expires: datetime, limit: int) -> List[dict]:
+        with self.lock:
+            expired = [t for t in self.tokens.values() if t['expires_at'] is not None and
+                       t['expires_at'] < expires][:limit]
+            for token in expired:
+                del self.tokens[token['token_hash']]
+            return [{k: token[k] for k in TOKEN_SUMMARY[:-1]} for token in expired]
+
+    def get_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                   token_hash: str = None, expires: datetime = None, states: List[int] = None,
+                   offset: int = 0, limit: int = 5, cursor: Tuple[datetime, int] = None,
+                   columns: List[str] = None) -> List[dict]:
+        with self.lock:
+            rows = self.__filter_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                        token_hashes=None if token_hash is None else [token_hash], states=states)
+            if expires is not None:
+                rows = [r for r in rows if r['expires_at'] is not None and r['expires_at'] < expires]
+            rows = self.__page(rows=rows, sort_key='expires_at', row_id='token_id', offset=offset, limit=limit,
+                               cursor=cursor)
+            return [self.__project(row=r, table=Tokens, columns=columns) for r in rows]
+
+    def get_token_state(self, *, token_hash: str) -> Optional[Tuple[int, datetime]]:
+        with self.lock:
+            token = self.tokens.get(token_hash)
+            return None if token is None else (token['state'], token['expires_at'])
+
+    def get_token_states(self) -> List[Tuple[str, int]]:
+        now = datetime.now(timezone.utc)
+        with self.lock:
+            return [(t['token_hash'], t['state']) for t in self.tokens.values()
+                    if t['expires_at'] is None or t['expires_at'] > now]
+
+    def add_llm_key(self, *, user_id: str, user_email: str, llm_key_id: str,
+                    llm_key_name: str, api_key_hash: str, hash_version: int,
+                    created_at: datetime, expires_at: datetime = None, comment: str = None):
+        with self.lock:
+            if any(k['llm_key_id'] == llm_key_id for k in self.llm_keys):
+                raise Exception(f"LLM key #{llm_key_id} already exists!")
+            self.llm_keys.append(dict(id=next(self.llm_key_ids), user_id=user_id, user_email=user_email,
+                                      llm_key_id=llm_key_id, llm_key_name=llm_key_name,
+                                      api_key_hash=api_key_hash, hash_version=hash_version,
+                                      created_at=created_at, expires_at=expires_at, comment=comment))
+
+    def get_llm_keys(self, *, user_email: str = None, llm_key_id: str = None,
+                     offset: int = 0, limit: int = 200, cursor: Tuple[datetime, int] = None,
+                     columns: List[str] = None) -> List[dict]:
+        with self.lock:
+            rows = [k for k in self.llm_keys if (user_email is None or k['user_email'] == user_email) and
+                    (llm_key_id is None or k['llm_key_id'] == llm_key_id)]
+            rows = self.__page(rows=rows, sort_key='created_at', row_id='id', offset=offset, limit=limit,
+                               cursor=cursor)
+            return [self.__project(row=r, table=LlmKeys, columns=columns) for r in rows]
+
+    def remove_llm_key(self, *, llm_key_id: str):
+        with self.lock:
+            self.llm_keys = [k for k in self.llm_keys if k['llm_key_id'] != llm_key_id]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+"""
+Apply pending database migrations, e.g. at deploy time before the new version is started:
+python -m fabric_cm.db.migrate
+"""
+from fabric_cm.credmgr.config import CONFIG_OBJ
+from fabric_cm.credmgr.logging import LOG
+from fabric_cm.db.db_api import DbApi
+from fabric_cm.db.partitions import TokenPartitions
+
+
+def main():
+    db = DbApi(database=CONFIG_OBJ.get_database_name(), user=CONFIG_OBJ.get_database_user(),
+               password=CONFIG_OBJ.get_database_password(), db_host=CONFIG_OBJ.get_database_host(), logger=LOG,
+               compact_schema=CONFIG_OBJ.is_compact_schema_enabled())
+    if CONFIG_OBJ.is_tokens_partitioning_enabled():
+        db.set_token_partitions(TokenPartitions(db=db, months_ahead=CONFIG_OBJ.get_tokens_partition_months_ahead(),
+                                                archive=CONFIG_OBJ.get_tokens_partition_archive(), logger=LOG))
+    db.create_db()
+    print(f"Database is at schema version {db.get_schema_version()}")
+
+
+if __name__ == '__main__':
+    main()
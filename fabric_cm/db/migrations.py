@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+"""
+Versioned schema migrations.
+
+create_all only creates missing tables, so every change to an existing table (columns, indexes) is added here as a
+Migration with the next version number. Applied versions are recorded in the schema_version table; see
+DbApi.migrate. Migrations must be idempotent, since a non-transactional migration interrupted half way is re-run
+from the start.
+"""
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+class Migration:
+    """
+    Base class for a schema migration
+    """
+    version = 0
+    description = ""
+    # Non-transactional migrations run in autocommit mode, as required by CREATE/DROP INDEX CONCURRENTLY
+    transactional = True
+
+    def upgrade(self, *, conn: Connection):
+        raise NotImplementedError
+
+    @staticmethod
+    def create_index(*, conn: Connection, name: str, table: str, definition: str, unique: bool = False):
+        """
+        Build an index without blocking writes to the table
+        @param conn connection in autocommit mode
+        @param name index name
+        @param table table name
+        @param definition column list and options, e.g. '(project_id, state) INCLUDE (token_hash)'
+        @param unique create a unique index
+        """
+        # A concurrent build that failed leaves an invalid index behind, which IF NOT EXISTS would keep
+        invalid = conn.execute(text("SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                                    "WHERE c.relname = :name AND NOT i.indisvalid"), {'name': name}).first()
+        if invalid is not None:
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        unique_clause = "UNIQUE " if unique else ""
+        conn.execute(text(f'CREATE {unique_clause}INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" {definition}'))
+
+    @staticmethod
+    def drop_index(*, conn: Connection, name: str):
+        """
+        Drop an index without blocking access to the table
+        @param conn connection in autocommit mode
+        @param name index name
+        """
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+class AddHashVersion(Migration):
+    version = 1
+    description = "Add hash_version to Tokens and LlmKeys"
+
+    def upgrade(self, *, conn: Connection):
+        for table in ['Tokens', 'LlmKeys']:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS hash_version '
+                              f'INTEGER NOT NULL DEFAULT 1'))
+
+
+class AddTokenIndexes(Migration):
+    version = 2
+    description = "Composite Tokens indexes matching the token listing and revoke list queries; unique token_hash"
+    transactional = False
+
+    def upgrade(self, *, conn: Connection):
+        self.check_unique_token_hash(conn=conn)
+        self.create_index(conn=conn, name='ux_Tokens_token_hash', table='Tokens', definition='(token_hash)',
+                          unique=True)
+        self.create_index(conn=conn, name='ix_Tokens_user_email_expires_at', table='Tokens',
+                          definition='(user_email, expires_at DESC, token_id DESC)')
+        self.create_index(conn=conn, name='ix_Tokens_project_id_state', table='Tokens',
+                          definition='(project_id, state) INCLUDE (token_hash)')
+        # Superseded by the indexes above
+        for name in ['ix_Tokens_token_hash', 'ix_Tokens_user_email', 'ix_Tokens_project_id']:
+            self.drop_index(conn=conn, name=name)
+
+    @staticmethod
+    def format_hash(token_hash) -> str:
+        """
+        @param token_hash token hash as read by a raw query; bytea, returned as memoryview, with the compact schema
+        @return hex digest
+        """
+        if isinstance(token_hash, (bytes, memoryview)):
+            return bytes(token_hash).hex()
+        return token_hash
+
+    @staticmethod
+    def check_unique_token_hash(*, conn: Connection):
+        """
+        Building the unique index fails on duplicate token hashes and would be retried, and fail again, on every
+        start up; report the duplicates instead
+        @param conn connection
+        @raises Exception if some token hashes are not unique
+        """
+        duplicates = conn.execute(text('SELECT token_hash, COUNT(*) AS count FROM "Tokens" GROUP BY token_hash '
+                                       'HAVING COUNT(*) > 1 ORDER BY count DESC LIMIT 10')).all()
+        if len(duplicates) == 0:
+            return
+        total = conn.execute(text('SELECT COUNT(*) FROM (SELECT 1 FROM "Tokens" GROUP BY token_hash '
+                                  'HAVING COUNT(*) > 1) AS d')).scalar()
+        examples = ", ".join(f"{AddTokenIndexes.format_hash(row.token_hash)} ({row.count} rows)"
+                             for row in duplicates)
+        raise Exception(f"Cannot create unique index ux_Tokens_token_hash: {total} token hashes appear more than "
+                        f"once in Tokens, e.g. {examples}. Remove the extra rows, e.g. keep the latest with "
+                        f'DELETE FROM "Tokens" t USING "Tokens" d WHERE t.token_hash = d.token_hash AND '
+                        f"t.token_id < d.token_id, then restart or re-run the migration")
+
+
+MIGRATIONS: List[Migration] = [AddHashVersion(), AddTokenIndexes()]
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import json
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+class TokenPartitions:
+    """
+    Optional monthly range partitioning of the Tokens table on expires_at.
+
+    Tokens expire at a known time, so whole partitions age out together: once every token in a month's partition
+    has expired the partition is detached from Tokens in a single metadata operation and either kept as a cold
+    archive table (Tokens_archive_YYYY_MM) or dropped. This keeps the hot indexes small, bounds vacuum work and
+    makes retention a per-month operation instead of row-by-row deletes.
+
+    Postgres requires unique constraints on a partitioned table to include the partition key, so once partitioned
+    the primary key becomes (token_id, expires_at) and token_hash is indexed but not unique; DbApi enforces unique
+    token hashes on insert instead.
+    """
+    ARCHIVE_DETACH = 'detach'
+    ARCHIVE_DROP = 'drop'
+    TABLE = 'Tokens'
+    NAME_PATTERN = re.compile(r'^Tokens_(\d{4})_(\d{2})$')
+    # Indexes of the partitioned table; created on every partition
+    INDEXES = [
+        'CREATE INDEX "ix_Tokens_user_id" ON "Tokens" (user_id)',
+        'CREATE INDEX "ix_Tokens_state" ON "Tokens" (state)',
+        'CREATE INDEX "ix_Tokens_token_hash" ON "Tokens" (token_hash)',
+        'CREATE INDEX "ix_Tokens_user_email_expires_at" ON "Tokens" (user_email, expires_at DESC, token_id DESC)',
+        'CREATE INDEX "ix_Tokens_project_id_state" ON "Tokens" (project_id, state) INCLUDE (token_hash)',
+    ]
+
+    def __init__(self, *, db, months_ahead: int = 3, archive: str = ARCHIVE_DETACH, logger=None):
+        """
+        @param db DbApi
+        @param months_ahead number of future months for which partitions are kept ready
+        @param archive what to do with a partition once all its tokens expired: detach or drop
+        @param logger logger
+        """
+        if archive not in [self.ARCHIVE_DETACH, self.ARCHIVE_DROP]:
+            raise ValueError(f"Unsupported partition archive mode: {archive}; allowed values: "
+                             f"{self.ARCHIVE_DETACH}, {self.ARCHIVE_DROP}")
+        self.db = db
+        self.months_ahead = months_ahead
+        self.archive = archive
+        self.logger = logger
+
+    @staticmethod
+    def month_of(value: datetime) -> date:
+        value = value.astimezone(timezone.utc)
+        return date(value.year, value.month, 1)
+
+    @staticmethod
+    def next_month(month: date) -> date:
+        return date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        return f'{cls.TABLE}_{month.year:04d}_{month.month:02d}'
+
+    @classmethod
+    def partition_month(cls, name: str) -> Optional[date]:
+        match = cls.NAME_PATTERN.match(name)
+        if match is None:
+            return None
+        return date(int(match.group(1)), int(match.group(2)), 1)
+
+    def __log_info(self, message: str):
+        if self.logger is not None:
+            self.logger.info(message)
+
+    def __log_error(self, message: str):
+        if self.logger is not None:
+            self.logger.error(message)
+
+    @classmethod
+    def is_partitioned(cls, *, conn: Connection) -> bool:
+        return conn.execute(text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                                 "WHERE c.relname = :table"), {'table': cls.TABLE}).first() is not None
+
+    @classmethod
+    def get_partitions(cls, *, conn: Connection) -> List[str]:
+        rows = conn.execute(text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                                 "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = :table ORDER BY 1"),
+                            {'table': cls.TABLE})
+        return [row[0] for row in rows]
+
+    def create_partition(self, *, conn: Connection, month: date):
+        """
+        Create the partition holding the tokens expiring in a month, if it does not exist
+        @param conn connection
+        @param month first day of the month
+        """
+        name = self.partition_name(month)
+        conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{self.TABLE}" '
+                          f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+                          f"TO ('{self.next_month(month).isoformat()} 00:00:00+00')"))
+
+    def ensure_partition(self, *, expires_at: datetime, conn: Connection = None):
+        """
+        Create the partition for an expiry time beyond the partitions created ahead, e.g. for a long-lived token
+        @param expires_at expiry time
+        @param conn connection of a transaction already holding locks on the table; a new transaction if not specified
+        """
+        if conn is not None:
+            self.create_partition(conn=conn, month=self.month_of(expires_at))
+            return
+        with self.db.db_engine.begin() as conn:
+            self.create_partition(conn=conn, month=self.month_of(expires_at))
+
+    def setup(self):
+        """
+        Convert Tokens into a partitioned table if it is not one yet. The table is locked while its rows are
+        copied, so on a large table run this at deploy time, see fabric_cm.db.migrate.
+        @raises Exception if some tokens have no expiry time; they have no partition and the table is left as is
+        """
+        with self.db.db_engine.begin() as conn:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {'lock_id': self.db.MIGRATION_LOCK_ID})
+            if self.is_partitioned(conn=conn):
+                return
+            self.__log_info(f"Partitioning {self.TABLE} by month of expires_at")
+            conn.execute(text(f'LOCK TABLE "{self.TABLE}" IN ACCESS EXCLUSIVE MODE'))
+            without_expiry = conn.execute(text(f'SELECT COUNT(*) FROM "{self.TABLE}" '
+                                               f'WHERE expires_at IS NULL')).scalar()
+            if without_expiry > 0:
+                message = (f"Cannot partition {self.TABLE}: {without_expiry} tokens have no expiry time; set their "
+                           f"expires_at (e.g. UPDATE \"{self.TABLE}\" SET expires_at = created_at + interval "
+                           f"'1 day' WHERE expires_at IS NULL) or delete them, then restart")
+                self.__log_error(message)
+                raise Exception(message)
+            conn.execute(text(f'ALTER TABLE "{self.TABLE}" RENAME TO "{self.TABLE}_unpartitioned"'))
+            conn.execute(text(f'CREATE TABLE "{self.TABLE}" (LIKE "{self.TABLE}_unpartitioned" INCLUDING DEFAULTS) '
+                              f'PARTITION BY RANGE (expires_at)'))
+            conn.execute(text(f'ALTER TABLE "{self.TABLE}" ALTER COLUMN expires_at SET NOT NULL'))
+
+            oldest = conn.execute(text(f'SELECT MIN(expires_at) FROM "{self.TABLE}_unpartitioned"')).scalar()
+            now = datetime.now(timezone.utc)
+            month = self.month_of(min(oldest, now) if oldest is not None else now)
+            last = self.month_of(now)
+            for _ in range(self.months_ahead):
+                last = self.next_month(last)
+            newest = conn.execute(text(f'SELECT MAX(expires_at) FROM "{self.TABLE}_unpartitioned"')).scalar()
+            if newest is not None and self.month_of(newest) > last:
+                last = self.month_of(newest)
+            while month <= last:
+                self.create_partition(conn=conn, month=month)
+                month = self.next_month(month)
+
+            count = conn.execute(text(f'INSERT INTO "{self.TABLE}" SELECT * FROM '
+                                      f'"{self.TABLE}_unpartitioned"')).rowcount
+            conn.execute(text(f'DROP TABLE "{self.TABLE}_unpartitioned"'))
+            conn.execute(text(f'ALTER TABLE "{self.TABLE}" ADD CONSTRAINT "{self.TABLE}_pkey" '
+                              f'PRIMARY KEY (token_id, expires_at)'))
+            for statement in self.INDEXES:
+                conn.execute(text(statement))
+            self.__log_info(f"Partitioned {self.TABLE}; moved {count} tokens")
+
+    def maintain(self, *, now: datetime = None) -> List[str]:
+        """
+        Create the partitions for the coming months and archive the partitions whose tokens have all expired
+        @param now current time
+        @return names of the partitions archived
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        current = self.month_of(now)
+        archived = []
+        with self.db.db_engine.begin() as conn:
+            month = current
+            for _ in range(self.months_ahead + 1):
+                self.create_partition(conn=conn, month=month)
+                month = self.next_month(month)
+
+            for name in self.get_partitions(conn=conn):
+                month = self.partition_month(name)
+                if month is None or self.next_month(month) > current:
+                    continue
+                conn.execute(text(f'ALTER TABLE "{self.TABLE}" DETACH PARTITION "{name}"'))
+                if self.archive == self.ARCHIVE_DROP:
+                    conn.execute(text(f'DROP TABLE "{name}"'))
+                else:
+                    conn.execute(text(f'ALTER TABLE "{name}" RENAME TO '
+                                      f'"{self.TABLE}_archive_{month.year:04d}_{month.month:02d}"'))
+                archived.append(name)
+
+            if len(archived) > 0:
+                # The archived tokens are gone from Tokens; have listeners reload their view of the table
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                             {'channel': self.db.TOKENS_CHANNEL,
+                              'payload': json.dumps({'token_hash': None, 'state': None})})
+        for name in archived:
+            self.__log_info(f"Archived partition {name} ({self.archive})")
+        return archived
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+from typing import List
+
+import prometheus_client
+
+from fabric_cm.db.instrumentation import housekeeping
+
+pings_counter = prometheus_client.Counter('DB_Pool_Pings', 'Idle pooled connections checked in the background',
+                                          ['pool', 'result'])
+
+
+class PoolHealthChecker:
+    """
+    Checks the idle connections of connection pools in the background, replacing pool_pre_ping, which adds a round
+    trip to every checkout. Connections that fail the check are invalidated. A connection that breaks between two
+    checks fails the query using it; SQLAlchemy then invalidates the whole pool, so that the other connections
+    opened before the failure are replaced rather than tried one by one.
+    """
+    def __init__(self, *, engines: List, interval: float, logger=None):
+        """
+        @param engines engines whose pools are checked
+        @param interval seconds between checks; 0 disables the checker
+        @param logger logger
+        """
+        self.engines = engines
+        self.interval = interval
+        self.logger = logger
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the checker thread; a no-op if the checker is disabled or already running
+        """
+        if self.interval <= 0 or self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.__run, name="PoolHealthChecker", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __run(self):
+        while not self.stopped.wait(self.interval):
+            for engine in self.engines:
+                try:
+                    self.check(engine=engine)
+                except Exception as e:
+                    if self.logger is not None:
+                        self.logger.error(f"Failed to check the connections of {engine.pool.logging_name}: {e}")
+
+    def check(self, *, engine) -> int:
+        """
+        Ping the connections idle in the pool of an engine. They are checked out one at a time, each returned
+        before the next is taken, so that requests keep finding idle connections; the pool hands them out first
+        in first out, so each idle connection comes up once; one a request used meanwhile may be skipped, as it was
+        just exercised. The checks are left out of the checkout metrics.
+        @param engine Engine
+        @return number of connections invalidated
+        """
+        name = engine.pool.logging_name
+        pinged = []
+        failed = 0
+        with housekeeping():
+            for _ in range(engine.pool.checkedin()):
+                # Do not open a connection only to ping it when requests took the idle ones meanwhile
+                if engine.pool.checkedin() == 0:
+                    break
+                connection = engine.raw_connection()
+                try:
+                    if any(c is connection.dbapi_connection for c in pinged):
+                        break
+                    pinged.append(connection.dbapi_connection)
+                    try:
+                        engine.dialect.do_ping(connection.dbapi_connection)
+                        pings_counter.labels(name, 'ok').inc()
+                    except Exception as e:
+                        pings_counter.labels(name, 'failed').inc()
+                        connection.invalidate(e)
+                        failed += 1
+                finally:
+                    connection.close()
+        if failed > 0 and self.logger is not None:
+            self.logger.warning(f"Invalidated {failed} broken connections of {name}")
+        return failed
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+#
+"""
+Statements and read routing shared by the synchronous DbApi and the asyncio AsyncDbApi
+"""
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fabric_cm.db import Tokens, LlmKeys
+from sqlalchemy import Delete, Select, TextClause, Update, and_, delete, desc, or_, select, text, tuple_, update
+
+# Set once the current context wrote to the primary so that its subsequent reads do not miss the write on a
+# lagging replica; FastAPI runs every request in a copy of the context, so the flag lasts for one request
+_read_from_primary = ContextVar('read_from_primary', default=False)
+
+# Columns returned by bulk token updates and deletes
+TOKEN_SUMMARY_COLUMNS = [Tokens.token_hash, Tokens.user_id, Tokens.user_email, Tokens.project_id, Tokens.state]
+
+
+def pin_reads_to_primary():
+    """
+    Route the remaining reads of the current context, i.e. of the current request, to the primary
+    """
+    _read_from_primary.set(True)
+
+
+def is_read_from_primary() -> bool:
+    """
+    @return True if reads of the current context must go to the primary
+    """
+    return _read_from_primary.get()
+
+
+@contextmanager
+def read_from_primary():
+    """
+    Read from the primary within the block, e.g. when replica lag is not acceptable
+    """
+    reset_token = _read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_from_primary.reset(reset_token)
+
+
+def notify_token_changes(*, channel: str, changes: List[Tuple[str, int]]) -> TextClause:
+    """
+    Build the statement publishing several token changes on a channel; Postgres delivers them to the listeners
+    when the transaction commits
+    @param channel notification channel
+    @param changes list of token hash and new state tuples; state is None for removed tokens
+    @return statement
+    """
+    payloads = [json.dumps({'token_hash': token_hash, 'state': state}) for token_hash, state in changes]
+    return text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS TEXT[])) AS payload").\
+        bindparams(channel=channel, payloads=payloads)
+
+
+def create_token_filter(*, user_id: str, user_email: str, project_id: str, token_hash: str) -> dict:
+    filter_dict = {}
+    if user_id is not None:
+        filter_dict['user_id'] = user_id
+    if user_email is not None:
+        filter_dict['user_email'] = str(user_email)
+    if project_id is not None:
+        filter_dict['project_id'] = str(project_id)
+    if token_hash is not None:
+        filter_dict['token_hash'] = token_hash
+    return filter_dict
+
+
+def create_token_clauses(*, user_id: str, user_email: str, project_id: str, token_hashes: List[str],
+                         states: List[int] = None) -> list:
+    """
+    Build the WHERE clauses for bulk token statements; at least one filter other than states is required
+    """
+    clauses = [getattr(Tokens, k) == v for k, v in
+               create_token_filter(user_id=user_id, user_email=user_email, project_id=project_id,
+                                   token_hash=None).items()]
+    if token_hashes is not None:
+        clauses.append(Tokens.token_hash.in_(token_hashes))
+    if len(clauses) == 0:
+        raise Exception("User Id/Email, Project Id or Token Hashes required")
+    if states is not None:
+        clauses.append(Tokens.state.in_(states))
+    return clauses
+
+
+def get_columns(*, table, columns: List[str] = None) -> list:
+    """
+    Resolve column names of a table
+    @param table mapped class
+    @param columns column names; all columns if not specified
+    @return list of columns
+    @raises KeyError for an unknown column name
+    """
+    if columns is None:
+        return list(table.__table__.columns)
+    return [table.__table__.columns[c] for c in columns]
+
+
+def generate_dict_from_row(row) -> dict:
+    """
+    @param row row mapping
+    @return dict of the row's non NULL columns
+    """
+    return {k: v for k, v in row.items() if v is not None}
+
+
+def after_cursor(*, sort_column, id_column, cursor: Tuple[Optional[datetime], int]):
+    """
+    Build the keyset pagination clause selecting the rows listed after the cursor, NULL sort keys first
+    @param sort_column column the listing is ordered by, descending
+    @param id_column primary key column breaking ties
+    @param cursor (sort key, id) of the last row of the previous page; the sort key is None if it is NULL
+    """
+    sort_key, row_id = cursor
+    if sort_key is None:
+        return or_(sort_column.is_not(None), and_(sort_column.is_(None), id_column < row_id))
+    # Comparing with NULL is never true, so rows with a NULL sort key are excluded as they come first
+    return tuple_(sort_column, id_column) < tuple_(sort_key, row_id)
+
+
+def select_tokens(*, user_id: str = None, user_email: str = None, project_id: str = None, token_hash: str = None,
+                  expires: datetime = None, states: List[int] = None, offset: int = 0, limit: int = 5,
+                  cursor: Tuple[Optional[datetime], int] = None, columns: List[str] = None) -> Select:
+    """
+    Build the token listing query, ordered by expiry time, latest first; see DbApi.get_tokens
+    """
+    filter_dict = create_token_filter(user_id=user_id, project_id=project_id, user_email=user_email,
+                                      token_hash=token_hash)
+
+    stmt = select(*get_columns(table=Tokens, columns=columns)).filter_by(**filter_dict)
+
+    if expires is not None:
+        stmt = stmt.where(Tokens.expires_at < expires)
+
+    if states is not None:
+        stmt = stmt.where(Tokens.state.in_(states))
+
+    # token_id breaks ties between tokens expiring at the same time so that the order is stable; tokens without
+    # an expiry time come first on every backend
+    stmt = stmt.order_by(desc(Tokens.expires_at).nulls_first(), desc(Tokens.token_id))
+
+    if cursor is not None:
+        stmt = stmt.where(after_cursor(sort_column=Tokens.expires_at, id_column=Tokens.token_id, cursor=cursor))
+    elif offset is not None:
+        stmt = stmt.offset(offset)
+
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def select_token_state(*, token_hash: str) -> Select:
+    """
+    Build the query returning the state and expiry time of a token
+    """
+    return select(Tokens.state, Tokens.expires_at).where(Tokens.token_hash == token_hash).limit(1)
+
+
+def select_token_states(*, now: datetime) -> Select:
+    """
+    Build the query returning the hash and state of every token that has not expired
+    """
+    return select(Tokens.token_hash, Tokens.state).where(or_(Tokens.expires_at.is_(None), Tokens.expires_at > now))
+
+
+def update_tokens_state(*, state: int, clauses: list) -> Update:
+    """
+    Build the bulk token state update returning the summary of the updated tokens
+    """
+    return update(Tokens).where(*clauses).values(state=state).returning(*TOKEN_SUMMARY_COLUMNS)
+
+
+def delete_tokens(*, clauses: list) -> Delete:
+    """
+    Build the bulk token delete returning the summary of the removed tokens
+    """
+    return delete(Tokens).where(*clauses).returning(*TOKEN_SUMMARY_COLUMNS)
+
+
+def select_llm_keys(*, user_email: str = None, llm_key_id: str = None, offset: int = 0, limit: int = 200,
+                    cursor: Tuple[datetime, int] = None, columns: List[str] = None) -> Select:
+    """
+    Build the LLM key listing query, latest first; see DbApi.get_llm_keys
+    """
+    filter_dict = {}
+    if user_email is not None:
+        filter_dict['user_email'] = user_email
+    if llm_key_id is not None:
+        filter_dict['llm_key_id'] = llm_key_id
+
+    stmt = select(*get_columns(table=LlmKeys, columns=columns)).filter_by(**filter_dict)
+    stmt = stmt.order_by(desc(LlmKeys.created_at), desc(LlmKeys.id))
+
+    if cursor is not None:
+        stmt = stmt.where(tuple_(LlmKeys.created_at, LlmKeys.id) < tuple_(*cursor))
+    elif offset is not None:
+        stmt = stmt.offset(offset)
+
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from fabric_cm.db import Base, Tokens, LlmKeys, queries
+from fabric_cm.db.token_store import TokenStore
+from sqlalchemy import create_engine, delete, event, insert, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    SQLite keeps no time zone: times are stored in UTC and returned as UTC aware datetimes
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class SqliteTokenStore(TokenStore):
+    """
+    Keeps tokens and LLM keys in a SQLite database file, for single node deployments without a database server.
+    Writes are serialized, within the process by a lock that units of work hold for their whole block.
+    """
+    def __init__(self, *, path: str, logger=None):
+        """
+        @param path database file; :memory: keeps the database in memory
+        @param logger logger
+        """
+        self.logger = logger
+        if path == ':memory:':
+            # A single connection, each connection to :memory: opens a database of its own
+            self.engine = create_engine("sqlite://", poolclass=StaticPool,
+                                        connect_args={'check_same_thread': False})
+        else:
+            self.engine = create_engine(f"sqlite:///{path}", connect_args={'check_same_thread': False,
+                                                                           'timeout': 30})
+            event.listen(self.engine, 'connect', self.__enable_wal)
+        self.Session = sessionmaker(bind=self.engine)
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def __enable_wal(dbapi_connection, connection_record):
+        # Readers do not wait for the writer
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    def create_db(self):
+        Base.metadata.create_all(self.engine)
+
+    @contextmanager
+    def unit_of_work(self):
+        with self.lock:
+            yield
+
+    @contextmanager
+    def __session(self, *, write: bool = False):
+        """
+        Session committed at the end of the block
+        """
+        try:
+            with self.lock if write else nullcontext():
+                with self.Session.begin() as session:
+                    yield session
+        except Exception as e:
+            if self.logger is not None:
+                self.logger.error(f"Exception occurred: {e}", stack_info=True)
+            raise e
+
+    @staticmethod
+    def __to_dict(row) -> dict:
+        return {k: to_utc(v) if isinstance(v, datetime) else v
+                for k, v in queries.generate_dict_from_row(row=row).items()}
+
+    def add_token(self, *, user_id: str, user_email: str, project_id: str, created_from: str, state: int,
+                  token_hash: str, hash_version: int, created_at: datetime, expires_at: datetime, comment: str):
+        with self.__session(write=True) as session:
+            session.execute(insert(Tokens), [dict(user_id=user_id, user_email=user_email, project_id=project_id,
+                                                  created_from=created_from, state=state, token_hash=token_hash,
+                                                  hash_version=hash_version, created_at=to_utc(created_at),
+                                                  expires_at=to_utc(expires_at), comment=comment)])
+
+    def update_token(self, *, token_hash: str, state: int):
+        with self.__session(write=True) as session:
+            rows = session.execute(update(Tokens).where(Tokens.token_hash == token_hash).values(state=state).
+                                   returning(Tokens.token_id), execution_options={'synchronize_session': False})
+            if len(rows.all()) == 0:
+                raise Exception(f"Token #{token_hash} not found!")
+
+    def remove_token(self, *, token_hash: str):
+        with self.__session(write=True) as session:
+            session.execute(delete(Tokens).where(Tokens.token_hash == token_hash),
+                            execution_options={'synchronize_session': False})
+
+    def update_tokens_state(self, *, state: int, user_id: str = None, user_email: str = None,
+                            project_id: str = None, token_hashes: List[str] = None,
+                            states: List[int] = None) -> List[dict]:
+        clauses = queries.create_token_clauses(user_id=user_id, user_email=user_email, project_id=project_id,
+                                               token_hashes=token_hashes, states=states)
+        with self.__session(write=True) as session:
+            rows = session.execute(queries.update_tokens_state(state=state, clauses=clauses),
+                                   execution_options={'synchronize_session': False}).all()
+            return [row._asdict() for row in rows]
+
+    def remove_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                      token_hashes: List[str] = None) -> List[dict]:
+        clauses = queries.create_token_clauses(user_id=user_id, user_email=user_email, project_id=project_id,
+                                               token_hashes=token_hashes)
+        with self.__session(write=True) as session:
+            rows = session.execute(queries.delete_tokens(clauses=clauses),
+                                   execution_options={'synchronize_session': False}).all()
+            return [row._asdict() for row in rows]
+
+    def remove_expired_tokens(self, *, expires: datetime, limit: int) -> List[dict]:
+        with self.__session(write=True) as session:
+            expired = select(Tokens.token_id).where(Tokens.expires_at < to_utc(expires)).limit(limit)
+            rows = session.execute(delete(Tokens).where(Tokens.token_id.in_(expired)).returning(
+                Tokens.token_hash, Tokens.user_id, Tokens.user_email, Tokens.project_id),
+                execution_options={'synchronize_session': False}).all()
+            return [row._asdict() for row in rows]
+
+    def get_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                   token_hash: str = None, expires: datetime = None, states: List[int] = None,
+                   offset: int = 0, limit: int = 5, cursor: Tuple[datetime, int] = None,
+                   columns: List[str] = None) -> List[dict]:
+        stmt = queries.select_tokens(user_id=user_id, user_email=user_email, project_id=project_id,
+                                     token_hash=token_hash, expires=to_utc(expires), states=states, offset=offset,
+                                     limit=limit, cursor=None if cursor is None else (to_utc(cursor[0]), cursor[1]),
+                                     columns=columns)
+        with self.__session() as session:
+            return [self.__to_dict(row) for row in session.execute(stmt).mappings()]
+
+    def get_token_state(self, *, token_hash: str) -> Optional[Tuple[int, datetime]]:
+        with self.__session() as session:
+            row = session.execute(queries.select_token_state(token_hash=token_hash)).first()
+            return None if row is None else (row.state, to_utc(row.expires_at))
+
+    def get_token_states(self) -> List[Tuple[str, int]]:
+        with self.__session() as session:
+            rows = session.execute(queries.select_token_states(now=datetime.now(timezone.utc)))
+            return [(row.token_hash, row.state) for row in rows.all()]
+
+    def add_llm_key(self, *, user_id: str, user_email: str, llm_key_id: str,
+                    llm_key_name: str, api_key_hash: str, hash_version: int,
+                    created_at: datetime, expires_at: datetime = None, comment: str = None):
+        with self.__session(write=True) as session:
+            session.execute(insert(LlmKeys), [dict(user_id=user_id, user_email=user_email, llm_key_id=llm_key_id,
+                                                   llm_key_name=llm_key_name, api_key_hash=api_key_hash,
+                                                   hash_version=hash_version, created_at=to_utc(created_at),
+                                                   expires_at=to_utc(expires_at), comment=comment)])
+
+    def get_llm_keys(self, *, user_email: str = None, llm_key_id: str = None,
+                     offset: int = 0, limit: int = 200, cursor: Tuple[datetime, int] = None,
+                     columns: List[str] = None) -> List[dict]:
+        stmt = queries.select_llm_keys(user_email=user_email, llm_key_id=llm_key_id, offset=offset, limit=limit,
+                                       cursor=None if cursor is None else (to_utc(cursor[0]), cursor[1]),
+                                       columns=columns)
+        with self.__session() as session:
+            return [self.__to_dict(row) for row in session.execute(stmt).mappings()]
+
+    def remove_llm_key(self, *, llm_key_id: str):
+        with self.__session(write=True) as session:
+            session.execute(delete(LlmKeys).where(LlmKeys.llm_key_id == llm_key_id),
+                            execution_options={'synchronize_session': False})
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import base64
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+class TokenStore(ABC):
+    """
+    Storage of the tokens and LLM keys issued by Credential Manager.
+    DbApi stores them in Postgres; SqliteTokenStore and MemoryTokenStore implement the same semantics without a
+    database server, for single node deployments, tests and benchmarks.
+    """
+    def create_db(self):
+        """
+        Create the schema, if the store has one
+        """
+
+    def has_replicas(self) -> bool:
+        """
+        @return True if read only queries may be served by read replicas
+        """
+        return False
+
+    @staticmethod
+    def read_from_primary():
+        """
+        Read from the primary within the block, for stores with read replicas
+        """
+        return nullcontext()
+
+    @abstractmethod
+    def unit_of_work(self):
+        """
+        Context manager running the store calls made within the block as one unit: they see each other's writes
+        and no other write interleaves with them
+        """
+
+    @abstractmethod
+    def add_token(self, *, user_id: str, user_email: str, project_id: str, created_from: str, state: int,
+                  token_hash: str, hash_version: int, created_at: datetime, expires_at: datetime, comment: str):
+        """
+        Add a token
+        @raises Exception if a token with the same hash exists
+        """
+
+    @abstractmethod
+    def update_token(self, *, token_hash: str, state: int):
+        """
+        Update the state of a token
+        @raises Exception if the token does not exist
+        """
+
+    @abstractmethod
+    def remove_token(self, *, token_hash: str):
+        """
+        Remove a token
+        """
+
+    @abstractmethod
+    def update_tokens_state(self, *, state: int, user_id: str = None, user_email: str = None,
+                            project_id: str = None, token_hashes: List[str] = None,
+                            states: List[int] = None) -> List[dict]:
+        """
+        Update the state of all tokens matching the filters
+        @param states only update tokens currently in one of these states
+        @return list of updated tokens with their token hash, user id, user email, project id and new state
+        @raises Exception if no filter other than states is specified
+        """
+
+    @abstractmethod
+    def remove_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                      token_hashes: List[str] = None) -> List[dict]:
+        """
+        Remove all tokens matching the filters
+        @return list of removed tokens with their token hash, user id, user email, project id and state
+        @raises Exception if no filter is specified
+        """
+
+    @abstractmethod
+    def remove_expired_tokens(self, *, expires: datetime, limit: int) -> List[dict]:
+        """
+        Remove a batch of tokens that expired before the given time
+        @return list of removed tokens with their token hash, user id, user email and project id
+        """
+
+    @abstractmethod
+    def get_tokens(self, *, user_id: str = None, user_email: str = None, project_id: str = None,
+                   token_hash: str = None, expires: datetime = None, states: List[int] = None,
+                   offset: int = 0, limit: int = 5, cursor: Tuple[datetime, int] = None,
+                   columns: List[str] = None) -> List[dict]:
+        """
+        Get tokens ordered by expiry time, latest first, then by token id
+        @param expires      only tokens expiring before this time
+        @param offset       offset; ignored when a cursor is specified
+        @param cursor       (expires_at, token_id) of the last token of the previous page; tokens without an
+                            expiry time are listed first and have a None expires_at
+        @param columns      names of the columns to select; all columns if not specified
+        @return list of tokens; NULL columns are left out
+        @raises KeyError for an unknown column name
+        """
+
+    @abstractmethod
+    def get_token_state(self, *, token_hash: str) -> Optional[Tuple[int, datetime]]:
+        """
+        @return tuple of state and expiry time of a token; None if the token does not exist
+        """
+
+    @abstractmethod
+    def get_token_states(self) -> List[Tuple[str, int]]:
+        """
+        @return token hash and state of every token that has not expired
+        """
+
+    @abstractmethod
+    def add_llm_key(self, *, user_id: str, user_email: str, llm_key_id: str,
+                    llm_key_name: str, api_key_hash: str, hash_version: int,
+                    created_at: datetime, expires_at: datetime = None, comment: str = None):
+        """
+        Add an LLM key record
+        """
+
+    @abstractmethod
+    def get_llm_keys(self, *, user_email: str = None, llm_key_id: str = None,
+                     offset: int = 0, limit: int = 200, cursor: Tuple[datetime, int] = None,
+                     columns: List[str] = None) -> List[dict]:
+        """
+        Get LLM keys ordered by creation time, latest first, then by id
+        @param cursor (created_at, id) of the last key of the previous page
+        @return list of LLM key records; NULL columns are left out
+        """
+
+    @abstractmethod
+    def remove_llm_key(self, *, llm_key_id: str):
+        """
+        Remove an LLM key record
+        """
+
+    @staticmethod
+    def encode_cursor(*, sort_key: Optional[datetime], row_id: int) -> str:
+        """
+        Build the opaque cursor pointing after a row of a keyset paginated listing
+        @param sort_key value of the column the listing is ordered by; None if it is NULL
+        @param row_id primary key of the row
+        @return URL safe cursor
+        """
+        value = f"{'' if sort_key is None else sort_key.isoformat()}|{row_id}"
+        return base64.urlsafe_b64encode(value.encode('utf-8')).decode('utf-8')
+
+    @staticmethod
+    def decode_cursor(*, cursor: str) -> Tuple[Optional[datetime], int]:
+        """
+        Parse a cursor built by encode_cursor
+        @param cursor cursor
+        @return tuple of sort key (None if it is NULL) and row id
+        @raises ValueError if the cursor is malformed
+        """
+        try:
+            sort_key, row_id = base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8').split('|')
+            return None if sort_key == '' else datetime.fromisoformat(sort_key), int(row_id)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
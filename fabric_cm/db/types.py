@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+"""
+Column types whose storage depends on the compact schema option.
+
+With the compact schema, hex digests (token and API key hashes) are stored as bytea, half the size of their hex
+text, and token states as smallint. The option is set per engine, see enable_compact_schema, and the columns are
+converted by DbApi.create_db; the application keeps seeing hex strings and integers either way.
+"""
+from sqlalchemy import Integer, LargeBinary, SmallInteger, String
+from sqlalchemy.types import TypeDecorator
+
+
+def enable_compact_schema(*, engine):
+    """
+    Use the compact storage for the columns declared with the types below; call before the engine is first used
+    @param engine Engine; the sync_engine of an AsyncEngine
+    """
+    engine.dialect.compact_schema = True
+
+
+def is_compact_schema(dialect) -> bool:
+    return getattr(dialect, 'compact_schema', False)
+
+
+class HexDigest(TypeDecorator):
+    """
+    Hex digest, stored as text or, with the compact schema, as bytes
+    """
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if is_compact_schema(dialect):
+            return dialect.type_descriptor(LargeBinary())
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or not is_compact_schema(dialect):
+            return value
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            # Not a hex digest, e.g. a malformed hash in a request; matches no stored digest instead of failing
+            return value.encode('utf-8')
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return bytes(value).hex()
+
+
+class CompactInteger(TypeDecorator):
+    """
+    Small integer, e.g. an enum value, stored as integer or, with the compact schema, as smallint
+    """
+    impl = Integer
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if is_compact_schema(dialect):
+            return dialect.type_descriptor(SmallInteger())
+        return dialect.type_descriptor(Integer())
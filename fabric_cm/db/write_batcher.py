@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# MIT License
+#
+# Copyright (c) 2020 FABRIC Testbed
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# Author Komal Thareja (kthare10@renci.org)
+import queue
+import threading
+import time
+from typing import List
+
+from fabric_cm.db import queries
+
+
+class PendingWrite:
+    """
+    A row waiting in the write batcher for the transaction it is committed in
+    """
+    def __init__(self, *, table, values: dict):
+        self.table = table
+        self.values = values
+        self.error = None
+        self.done = threading.Event()
+
+
+class WriteBatcher:
+    """
+    Group commit for inserts: rows added by concurrent requests are collected for a short delay and committed
+    together, one multi-row INSERT per table in a single transaction, so that a burst of token creations pays
+    for one commit instead of one each. Each caller still blocks until its own row is committed.
+    """
+    _STOP = object()
+
+    def __init__(self, *, db, max_delay: float, max_batch_size: int = 100, logger=None):
+        """
+        @param db DbApi
+        @param max_delay seconds the first row of a batch waits for more rows; 0 disables batching
+        @param max_batch_size rows after which a batch is committed without waiting any longer
+        @param logger logger
+        """
+        self.db = db
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self.logger = logger
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the batcher thread; a no-op if batching is disabled or already running
+        """
+        if self.max_delay <= 0 or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.__run, name="WriteBatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop the batcher thread after committing the rows already queued
+        """
+        if self.thread is not None:
+            self.queue.put(self._STOP)
+            self.thread.join()
+            self.thread = None
+
+    def add(self, *, table, values: dict):
+        """
+        Insert a row with the next batch and wait until it is committed
+        @param table mapped class of the table
+        @param values column values of the row
+        @raises Exception if the row could not be inserted
+        """
+        if self.thread is None:
+            self.db.add_rows(rows=[(table, values)])
+            return
+        pending = PendingWrite(table=table, values=values)
+        self.queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        # The row was committed from the batcher thread; keep this request's reads consistent with it
+        queries.pin_reads_to_primary()
+
+    def __run(self):
+        stopped = False
+        while not stopped:
+            pending = self.queue.get()
+            if pending is self._STOP:
+                break
+            batch = [pending]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if pending is self._STOP:
+                    stopped = True
+                    break
+                batch.append(pending)
+            self.__flush(batch=batch)
+
+    def __flush(self, *, batch: List[PendingWrite]):
+        try:
+            self.db.add_rows(rows=[(p.table, p.values) for p in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+            else:
+                # A single bad row, e.g. a duplicate token hash, must not fail the whole batch
+                if self.logger is not None:
+                    self.logger.warning(f"Batch of {len(batch)} rows failed, inserting them one at a time: {e}")
+                for p in batch:
+                    self.__flush_one(pending=p)
+        finally:
+            for p in batch:
+                p.done.set()
+
+    def __flush_one(self, *, pending: PendingWrite):
+        try:
+            self.db.add_rows(rows=[(pending.table, pending.values)])
+        except Exception as e:
+            pending.error = e